@@ -3,9 +3,11 @@ Activity Feed configuration module.
 Manages which event types should be recorded in the activity feed.
 """
 
-from typing import Set, Literal
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Set, Literal, Mapping
 from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 EventCategory = Literal[
@@ -19,6 +21,20 @@ EventCategory = Literal[
 ]
 
 
+# Map event type prefixes to categories (e.g., 'element.created' -> 'elements')
+_CATEGORY_MAPPING: Mapping[str, EventCategory] = MappingProxyType(
+    {
+        "element": "elements",
+        "folder": "folders",
+        "gallery": "gallery",
+        "announcement": "announcements",
+        "project": "projects",
+        "comment": "comments",
+        "imagemap": "widgets",
+    }
+)
+
+
 class ActivityFeedConfig(BaseSettings):
     """
     Configuration for activity feed module.
@@ -50,7 +66,47 @@ class ActivityFeedConfig(BaseSettings):
         default=100, description="Maximum number of events to aggregate in one activity"
     )
 
-    model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "ignore"}
+    # Hand committed events to a per-worker background writer instead of
+    # inserting them inside the request transaction
+    ACTIVITY_BACKGROUND_WRITES: bool = Field(
+        default=False,
+        description="Insert activity events from a background task after commit",
+    )
+
+    ACTIVITY_WRITE_QUEUE_SIZE: int = Field(
+        default=10_000, description="Maximum events waiting for the background writer"
+    )
+
+    ACTIVITY_WRITE_BATCH_SIZE: int = Field(
+        default=500, description="Maximum events inserted by the writer at once"
+    )
+
+    # Run feed count and page queries concurrently on two pooled connections
+    ACTIVITY_CONCURRENT_FEED_QUERIES: bool = Field(
+        default=False,
+        description="Load feed pages on a second session while counting",
+    )
+
+    # Past this many rows (page * size) feeds report the planner's row
+    # estimate instead of running an exact COUNT
+    ACTIVITY_COUNT_ESTIMATE_THRESHOLD: int = Field(
+        default=1000,
+        description="Use an estimated total for pages beyond this many rows",
+    )
+
+    # Load the next project feed page in the background after serving one
+    ACTIVITY_FEED_PREFETCH: bool = Field(
+        default=False,
+        description="Prefetch the next project feed page into Redis",
+    )
+
+    ACTIVITY_FEED_PREFETCH_TTL: int = Field(
+        default=30, description="How long a prefetched feed page is kept (seconds)"
+    )
+
+    model_config = SettingsConfigDict(
+        env_file=".env", env_file_encoding="utf-8", extra="ignore"
+    )
 
     def is_category_enabled(self, category: EventCategory) -> bool:
         """Check if an event category is enabled."""
@@ -66,13 +122,10 @@ class ActivityFeedConfig(BaseSettings):
         Returns:
             True if the event should be recorded, False otherwise
         """
-        category = self._get_category_for_event_type(event_type)
-
-        if not category:
-            # Unknown event type, default to enabled
-            return True
+        category = _CATEGORY_MAPPING.get(event_type.partition(".")[0])
 
-        return self.is_category_enabled(category)  # type: ignore[arg-type]
+        # Unknown event type, default to enabled
+        return category is None or category in self.ACTIVITY_ENABLED_CATEGORIES
 
     def _get_category_for_event_type(self, event_type: str) -> str | None:
         """
@@ -84,21 +137,18 @@ class ActivityFeedConfig(BaseSettings):
         Returns:
             Category name or None if unknown
         """
-        # Map event types to categories
-        category_mapping = {
-            "element": "elements",
-            "folder": "folders",
-            "gallery": "gallery",
-            "announcement": "announcements",
-            "project": "projects",
-            "comment": "comments",
-            "imagemap": "widgets",
-        }
+        return _CATEGORY_MAPPING.get(event_type.partition(".")[0])
 
-        # Extract category from event type (e.g., 'element.created' -> 'element')
-        event_prefix = event_type.split(".")[0]
 
-        return category_mapping.get(event_prefix)
+@lru_cache(maxsize=1)
+def get_activity_config() -> ActivityFeedConfig:
+    """
+    Get the process-wide activity feed config.
+
+    Settings sources (.env, environment) are read once; use this instead of
+    instantiating ActivityFeedConfig directly.
+    """
+    return ActivityFeedConfig()
 
 
-activity_config = ActivityFeedConfig()
+activity_config = get_activity_config()
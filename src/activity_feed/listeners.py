@@ -1,465 +1,311 @@
 import logging
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.events import subscribe
+from app.activity_feed.config import activity_config
 from app.activity_feed.services.recorder import activity_recorder
+from app.activity_feed.services.project_resolver import project_id_resolver
 
-from app.projects.models import Project
-from app.comments.models import Comment
-from app.gallery.models import GalleryImage
-from app.announcements.models import Announcement
-from app.filemanager.models.element import ElementBase
-from app.filemanager.models.folder import FolderBase
 from app.imagemap.models import ImageMap
 
 logger = logging.getLogger(__name__)
 
 
-# ===== Project Events =====
+DetailsField = Tuple[str, Callable[[Any, Dict[str, Any]], Any]]
+ProjectLookup = Callable[[AsyncSession, Any], Awaitable[Optional[UUID]]]
 
 
-@subscribe("project.updated")
-async def handle_project_updated(
-    session: AsyncSession, user_id: UUID, project: Project, changes: dict, **kwargs
-):
-    """Handle project update event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=project.id,
-        event_type="project.updated",
-        target_id=str(project.id),
-        target_type="project",
-        details={"project_name": project.name, "changes": changes},
-    )
-
-
-# ===== Element Events =====
-
-
-@subscribe("element.created")
-async def handle_element_created(
-    session: AsyncSession, user_id: UUID, element: ElementBase, **kwargs
-):
-    """Handle element creation event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=element.project_id,
-        event_type="element.created",
-        target_id=str(element.id),
-        target_type="element",
-        details={
-            "element_name": element.name,
-            "element_type_id": element.type_id,
-            "folder_id": str(element.folder_id) if element.folder_id else None,
-        },
-    )
-
-
-@subscribe("element.updated")
-async def handle_element_updated(
-    session: AsyncSession,
-    user_id: UUID,
-    element: ElementBase,
-    changes: dict,
-    old_values: dict,
-    **kwargs,
-):
-    """Handle element update event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=element.project_id,
-        event_type="element.updated",
-        target_id=str(element.id),
-        target_type="element",
-        details={
-            "element_name": element.name,
-            "folder_id": str(element.folder_id) if element.folder_id else None,
-            "changes": changes,
-            "old_values": old_values,
-        },
-    )
-
-
-@subscribe("element.trashed")
-async def handle_element_trashed(
-    session: AsyncSession, user_id: UUID, element: ElementBase, **kwargs
-):
-    """Handle element trash event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=element.project_id,
-        event_type="element.trashed",
-        target_id=str(element.id),
-        target_type="element",
-        details={
-            "element_name": element.name,
-            "folder_id": str(element.folder_id) if element.folder_id else None,
-        },
-    )
-
-
-@subscribe("element.moved")
-async def handle_element_moved(
-    session: AsyncSession,
-    user_id: UUID,
-    element: ElementBase,
-    old_folder_id: Optional[UUID],
-    **kwargs,
-):
-    """Handle element move event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=element.project_id,
-        event_type="element.moved",
-        target_id=str(element.id),
-        target_type="element",
-        details={
-            "element_name": element.name,
-            "new_folder_id": str(element.folder_id) if element.folder_id else None,
-            "old_folder_id": str(old_folder_id) if old_folder_id else None,
-        },
-    )
-
-
-# ===== Folder Events =====
-
-
-@subscribe("folder.created")
-async def handle_folder_created(
-    session: AsyncSession, user_id: UUID, folder: FolderBase, **kwargs
-):
-    """Handle folder creation event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=folder.project_id,
-        event_type="folder.created",
-        target_id=str(folder.id),
-        target_type="folder",
-        details={
-            "folder_name": folder.name,
-            "parent_id": str(folder.parent_id) if folder.parent_id else None,
-        },
-    )
-
-
-@subscribe("folder.updated")
-async def handle_folder_updated(
-    session: AsyncSession,
-    user_id: UUID,
-    folder: FolderBase,
-    changes: dict,
-    old_values: dict,
-    **kwargs,
-):
-    """Handle folder update event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=folder.project_id,
-        event_type="folder.updated",
-        target_id=str(folder.id),
-        target_type="folder",
-        details={
-            "folder_name": folder.name,
-            "parent_id": str(folder.parent_id) if folder.parent_id else None,
-            "changes": changes,
-            "old_values": old_values,
-        },
-    )
-
-
-@subscribe("folder.trashed")
-async def handle_folder_trashed(
-    session: AsyncSession, user_id: UUID, folder: FolderBase, **kwargs
-):
-    """Handle folder trash event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=folder.project_id,
-        event_type="folder.trashed",
-        target_id=str(folder.id),
-        target_type="folder",
-        details={
-            "folder_name": folder.name,
-            "parent_id": str(folder.parent_id) if folder.parent_id else None,
-        },
-    )
-
-
-# ===== Comment Events =====
-
-
-@subscribe("comment.created")
-async def handle_comment_created(
-    session: AsyncSession, user_id: UUID, comment: Comment, **kwargs
-):
-    """Handle comment creation event."""
-    if comment.entity_type not in ["element", "folder"]:
-        return
-
-    project_id = None
-    if comment.entity_type == "element":
-        q = await session.execute(
-            select(ElementBase.project_id).where(ElementBase.id == comment.entity_id)
-        )
-        project_id = q.scalar_one_or_none()
-    elif comment.entity_type == "folder":
-        q = await session.execute(
-            select(FolderBase.project_id).where(FolderBase.id == comment.entity_id)
-        )
-        project_id = q.scalar_one_or_none()
-
-    if project_id:
-        await activity_recorder.record(
-            session=session,
-            user_id=user_id,
-            project_id=project_id,
-            event_type="comment.created",
-            target_id=str(comment.id),
-            target_type="comment",
-            details={
-                "parent_id": str(comment.entity_id),
-                "parent_type": comment.entity_type,
-                "text_snippet": (
-                    (comment.text[:75] + "...")
-                    if len(comment.text) > 75
-                    else comment.text
-                ),
-            },
-        )
-    else:
-        logger.warning(
-            f"Could not find project_id for comment on {comment.entity_type}:{comment.entity_id}"
-        )
-
-
-# ===== Gallery Events =====
-
-
-@subscribe("gallery.image.uploaded")
-async def handle_image_uploaded(
-    session: AsyncSession, user_id: UUID, image: GalleryImage, **kwargs
-):
-    """Handle gallery image upload event."""
-    if image.entity_type not in ["element", "folder"]:
-        return
-
-    project_id = None
-    if image.entity_type == "element":
-        q = await session.execute(
-            select(ElementBase.project_id).where(ElementBase.id == image.entity_id)
-        )
-        project_id = q.scalar_one_or_none()
-    elif image.entity_type == "folder":
-        q = await session.execute(
-            select(FolderBase.project_id).where(FolderBase.id == image.entity_id)
-        )
-        project_id = q.scalar_one_or_none()
-
-    if project_id:
-        await activity_recorder.record(
-            session=session,
-            user_id=user_id,
-            project_id=project_id,
-            event_type="gallery.image.uploaded",
-            target_id=str(image.id),
-            target_type="gallery_image",
-            details={
-                "image_name": image.name,
-                "parent_id": str(image.entity_id),
-                "parent_type": image.entity_type,
-            },
-        )
-    else:
-        logger.warning(
-            f"Could not find project_id for gallery image on {image.entity_type}:{image.entity_id}"
-        )
-
-
-# ===== Announcement Events =====
-
+class EventSpec(NamedTuple):
+    """
+    Describes how a domain event is turned into an activity record.
+
+    Attributes:
+        entity_arg: Name of the event kwarg holding the entity
+        project_id_attr: Entity attribute holding project_id
+        target_type: Target type, formatted with the entity
+        details_fields: (key, extractor(entity, event_kwargs)) pairs
+        project_lookup: Coroutine resolving project_id when the entity
+            doesn't carry it directly
+        parent_type_attr: Entity attribute holding its parent's type; events
+            on parents outside _TRACKED_PARENT_TYPES are skipped
+        display_name: Entity name for log messages, defaults to target_type
+    """
 
-@subscribe("announcement.created")
-async def handle_announcement_created(
-    session: AsyncSession, user_id: UUID, announcement: Announcement, **kwargs
-):
-    """Handle announcement creation event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=announcement.project_id,
-        event_type="announcement.created",
-        target_id=str(announcement.id),
-        target_type=f"announcement-{announcement.category.value}",
-        details={"title": announcement.title, "category": announcement.category.value},
-    )
+    entity_arg: str
+    project_id_attr: Optional[str]
+    target_type: str
+    details_fields: Tuple[DetailsField, ...]
+    project_lookup: Optional[ProjectLookup] = None
+    parent_type_attr: Optional[str] = None
+    display_name: Optional[str] = None
 
 
-@subscribe("announcement.updated")
-async def handle_announcement_updated(
-    session: AsyncSession, user_id: UUID, announcement: Announcement, **kwargs
-):
-    """Handle announcement update event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=announcement.project_id,
-        event_type="announcement.updated",
-        target_id=str(announcement.id),
-        target_type=f"announcement-{announcement.category.value}",
-        details={"title": announcement.title, "category": announcement.category.value},
-    )
+# ===== Helper Functions =====
 
 
-@subscribe("announcement.deleted")
-async def handle_announcement_deleted(
-    session: AsyncSession, user_id: UUID, announcement: Announcement, **kwargs
-):
-    """Handle announcement deletion event."""
-    await activity_recorder.record(
-        session=session,
-        user_id=user_id,
-        project_id=announcement.project_id,
-        event_type="announcement.deleted",
-        target_id=str(announcement.id),
-        target_type=f"announcement-{announcement.category.value}",
-        details={"title": announcement.title, "category": announcement.category.value},
+async def _get_project_id_for_parent(
+    session: AsyncSession, entity: Any
+) -> Optional[UUID]:
+    """Get project_id for a comment or gallery image via its parent entity."""
+    return await project_id_resolver.resolve(
+        session, entity.entity_type, entity.entity_id
     )
 
 
-# ===== ImageMap (Widget) Events =====
-
+@lru_cache(maxsize=1024)
+def _parse_entity_uuid(entity_id: str) -> UUID:
+    """Parse an imagemap entity_id; the same ids recur across edits."""
+    return UUID(entity_id)
 
-@subscribe("imagemap.created")
-async def handle_imagemap_created(
-    session: AsyncSession, user_id: UUID, imagemap: ImageMap, **kwargs
-):
-    """Handle imagemap (widget) creation event."""
 
-    project_id = await _get_project_id_for_imagemap(session, imagemap)
-
-    if project_id:
-        await activity_recorder.record(
-            session=session,
-            user_id=user_id,
-            project_id=project_id,
-            event_type="imagemap.created",
-            target_id=str(imagemap.id),
-            target_type="imagemap",
-            details={
-                "name": imagemap.name,
-                "entity_type": imagemap.entity_type,
-                "entity_id": imagemap.entity_id,
-            },
-        )
-    else:
-        logger.warning(
-            f"Could not find project_id for imagemap on {imagemap.entity_type}:{imagemap.entity_id}"
-        )
+async def _get_project_id_for_imagemap(
+    session: AsyncSession, imagemap: ImageMap
+) -> Optional[UUID]:
+    """
+    Get project_id for imagemap based on its entity_type.
 
+    Args:
+        session: Database session
+        imagemap: ImageMap instance
 
-@subscribe("imagemap.updated")
-async def handle_imagemap_updated(
-    session: AsyncSession, user_id: UUID, imagemap: ImageMap, **kwargs
-):
-    """Handle imagemap (widget) update event."""
-    project_id = await _get_project_id_for_imagemap(session, imagemap)
+    Returns:
+        Project UUID or None if not found
+    """
+    entity_type = imagemap.entity_type
+    if entity_type != "project" and entity_type not in _TRACKED_PARENT_TYPES:
+        return None
 
-    if project_id:
-        await activity_recorder.record(
-            session=session,
-            user_id=user_id,
-            project_id=project_id,
-            event_type="imagemap.updated",
-            target_id=str(imagemap.id),
-            target_type="imagemap",
-            details={
-                "name": imagemap.name,
-                "entity_type": imagemap.entity_type,
-                "entity_id": imagemap.entity_id,
-            },
-        )
+    entity_id = imagemap.entity_id
+    if isinstance(entity_id, UUID):
+        entity_uuid = entity_id
     else:
-        logger.warning(
-            f"Could not find project_id for imagemap on {imagemap.entity_type}:{imagemap.entity_id}"
-        )
-
-
-@subscribe("imagemap.deleted")
-async def handle_imagemap_deleted(
-    session: AsyncSession, user_id: UUID, imagemap: ImageMap, **kwargs
-):
-    """Handle imagemap (widget) deletion event."""
-    project_id = await _get_project_id_for_imagemap(session, imagemap)
+        try:
+            entity_uuid = _parse_entity_uuid(entity_id)
+        except (ValueError, TypeError, AttributeError):
+            logger.error("Invalid entity_id for imagemap: %s", entity_id)
+            return None
+
+    if entity_type == "project":
+        return entity_uuid
+
+    return await project_id_resolver.resolve(session, entity_type, entity_uuid)
+
+
+def _make_snippet(text: str, limit: int = 75) -> str:
+    """Truncate comment text for the feed, marking cuts with an ellipsis."""
+    return text if len(text) <= limit else f"{text[:limit]}\u2026"
+
+
+# ===== Event Specs =====
+
+
+_ELEMENT_BASE_DETAILS: Tuple[DetailsField, ...] = (
+    ("element_name", lambda e, kw: e.name),
+    ("folder_id", lambda e, kw: e.folder_id),
+)
+
+_FOLDER_BASE_DETAILS: Tuple[DetailsField, ...] = (
+    ("folder_name", lambda f, kw: f.name),
+    ("parent_id", lambda f, kw: f.parent_id),
+)
+
+_CHANGES_DETAILS: Tuple[DetailsField, ...] = (
+    ("changes", lambda e, kw: kw["changes"]),
+    ("old_values", lambda e, kw: kw["old_values"]),
+)
+
+_ANNOUNCEMENT_DETAILS: Tuple[DetailsField, ...] = (
+    ("title", lambda a, kw: a.title),
+    ("category", lambda a, kw: a.category.value),
+)
+
+_IMAGEMAP_DETAILS: Tuple[DetailsField, ...] = (
+    ("name", lambda m, kw: m.name),
+    ("entity_type", lambda m, kw: m.entity_type),
+    ("entity_id", lambda m, kw: m.entity_id),
+)
+
+# Widget events differ only in event_type, so they share one spec
+_IMAGEMAP_SPEC = EventSpec(
+    "imagemap", None, "imagemap", _IMAGEMAP_DETAILS, _get_project_id_for_imagemap
+)
+
+
+EVENT_SPECS: Dict[str, EventSpec] = {
+    # Project events
+    "project.updated": EventSpec(
+        "project",
+        "id",
+        "project",
+        (
+            ("project_name", lambda p, kw: p.name),
+            ("changes", lambda p, kw: kw["changes"]),
+        ),
+    ),
+    # Element events
+    "element.created": EventSpec(
+        "element",
+        "project_id",
+        "element",
+        (
+            ("element_name", lambda e, kw: e.name),
+            ("element_type_id", lambda e, kw: e.type_id),
+            ("folder_id", lambda e, kw: e.folder_id),
+        ),
+    ),
+    "element.updated": EventSpec(
+        "element", "project_id", "element", _ELEMENT_BASE_DETAILS + _CHANGES_DETAILS
+    ),
+    "element.trashed": EventSpec(
+        "element", "project_id", "element", _ELEMENT_BASE_DETAILS
+    ),
+    "element.moved": EventSpec(
+        "element",
+        "project_id",
+        "element",
+        (
+            ("element_name", lambda e, kw: e.name),
+            ("new_folder_id", lambda e, kw: e.folder_id),
+            ("old_folder_id", lambda e, kw: kw["old_folder_id"]),
+        ),
+    ),
+    # Folder events
+    "folder.created": EventSpec(
+        "folder", "project_id", "folder", _FOLDER_BASE_DETAILS
+    ),
+    "folder.updated": EventSpec(
+        "folder", "project_id", "folder", _FOLDER_BASE_DETAILS + _CHANGES_DETAILS
+    ),
+    "folder.trashed": EventSpec(
+        "folder", "project_id", "folder", _FOLDER_BASE_DETAILS
+    ),
+    # Comment events
+    "comment.created": EventSpec(
+        "comment",
+        None,
+        "comment",
+        (
+            ("parent_id", lambda c, kw: c.entity_id),
+            ("parent_type", lambda c, kw: c.entity_type),
+            ("text_snippet", lambda c, kw: _make_snippet(c.text)),
+        ),
+        _get_project_id_for_parent,
+        parent_type_attr="entity_type",
+    ),
+    # Gallery events
+    "gallery.image.uploaded": EventSpec(
+        "image",
+        None,
+        "gallery_image",
+        (
+            ("image_name", lambda i, kw: i.name),
+            ("parent_id", lambda i, kw: i.entity_id),
+            ("parent_type", lambda i, kw: i.entity_type),
+        ),
+        _get_project_id_for_parent,
+        parent_type_attr="entity_type",
+        display_name="gallery image",
+    ),
+    # Announcement events
+    "announcement.created": EventSpec(
+        "announcement",
+        "project_id",
+        "announcement-{entity.category.value}",
+        _ANNOUNCEMENT_DETAILS,
+    ),
+    "announcement.updated": EventSpec(
+        "announcement",
+        "project_id",
+        "announcement-{entity.category.value}",
+        _ANNOUNCEMENT_DETAILS,
+    ),
+    "announcement.deleted": EventSpec(
+        "announcement",
+        "project_id",
+        "announcement-{entity.category.value}",
+        _ANNOUNCEMENT_DETAILS,
+    ),
+    # ImageMap (Widget) events
+    "imagemap.created": _IMAGEMAP_SPEC,
+    "imagemap.updated": _IMAGEMAP_SPEC,
+    "imagemap.deleted": _IMAGEMAP_SPEC,
+}
+
+# Comments and gallery images are only tracked on these parents
+_TRACKED_PARENT_TYPES = frozenset(("element", "folder"))
+
+# Categories are fixed for the process lifetime, so disabled event types
+# can be resolved once here instead of on every dispatch
+ENABLED_EVENT_TYPES = frozenset(
+    event_type
+    for event_type in EVENT_SPECS
+    if activity_config.is_event_type_enabled(event_type)
+)
+
+
+# ===== Dispatcher =====
+
+
+def _make_handler(event_type: str, spec: EventSpec):
+    """Build the subscriber coroutine for a single event type."""
+
+    async def handler(session: AsyncSession, user_id: UUID, **kwargs):
+        entity = kwargs[spec.entity_arg]
+
+        if spec.project_lookup is None:
+            project_id = getattr(entity, spec.project_id_attr)
+        else:
+            if (
+                spec.parent_type_attr is not None
+                and getattr(entity, spec.parent_type_attr) not in _TRACKED_PARENT_TYPES
+            ):
+                return
+
+            project_id = await spec.project_lookup(session, entity)
+            if not project_id:
+                logger.warning(
+                    "Could not find project_id for %s on %s:%s",
+                    spec.display_name or spec.target_type,
+                    entity.entity_type,
+                    entity.entity_id,
+                )
+                return
 
-    if project_id:
         await activity_recorder.record(
             session=session,
             user_id=user_id,
             project_id=project_id,
-            event_type="imagemap.deleted",
-            target_id=str(imagemap.id),
-            target_type="imagemap",
+            event_type=event_type,
+            target_id=entity.id,
+            target_type=spec.target_type.format(entity=entity),
             details={
-                "name": imagemap.name,
-                "entity_type": imagemap.entity_type,
-                "entity_id": imagemap.entity_id,
+                key: extract(entity, kwargs) for key, extract in spec.details_fields
             },
         )
-    else:
-        logger.warning(
-            f"Could not find project_id for imagemap on {imagemap.entity_type}:{imagemap.entity_id}"
-        )
-
 
-# ===== Helper Functions =====
+    handler.__name__ = handler.__qualname__ = f"handle_{event_type.replace('.', '_')}"
+    handler.__doc__ = f"Handle {event_type} event."
+    return handler
 
 
-async def _get_project_id_for_imagemap(
-    session: AsyncSession, imagemap: ImageMap
-) -> Optional[UUID]:
+def subscribe_if_enabled(event_type: str):
     """
-    Get project_id for imagemap based on its entity_type.
+    Like `subscribe`, but registers nothing for disabled event types.
 
     Args:
-        session: Database session
-        imagemap: ImageMap instance
+        event_type: Event type string (e.g., 'comment.created')
 
     Returns:
-        Project UUID or None if not found
+        Decorator registering the handler, or a no-op decorator
     """
-    try:
-        entity_uuid = UUID(imagemap.entity_id)
-    except (ValueError, TypeError):
-        logger.error(f"Invalid entity_id for imagemap: {imagemap.entity_id}")
-        return None
-
-    project_id = None
-
-    if imagemap.entity_type == "project":
-        project_id = entity_uuid
+    if event_type in ENABLED_EVENT_TYPES:
+        return subscribe(event_type)
+    return lambda func: func
 
-    elif imagemap.entity_type == "element":
-        q = await session.execute(
-            select(ElementBase.project_id).where(ElementBase.id == entity_uuid)
-        )
-        project_id = q.scalar_one_or_none()
-
-    elif imagemap.entity_type == "folder":
-        q = await session.execute(
-            select(FolderBase.project_id).where(FolderBase.id == entity_uuid)
-        )
-        project_id = q.scalar_one_or_none()
 
-    return project_id
+for _event_type, _spec in EVENT_SPECS.items():
+    subscribe_if_enabled(_event_type)(_make_handler(_event_type, _spec))
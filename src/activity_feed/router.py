@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, Path, HTTPException, status
+from fastapi import APIRouter, Depends, Query, Path, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from typing import Optional
@@ -14,6 +14,18 @@ from app.activity_feed.services.heatmap_service import activity_heatmap_service
 router = APIRouter(prefix="/feed", tags=["Activity Feed"])
 
 
+def _feed_json(feed_data: ActivityFeedResponse) -> Response:
+    """
+    Serialize an already validated feed page in one pass.
+
+    Returning a Response bypasses FastAPI's response_model re-validation;
+    response_model is kept for the OpenAPI schema.
+    """
+    return Response(
+        content=feed_data.model_dump_json(), media_type="application/json"
+    )
+
+
 @router.get("/project/{project_id}", response_model=ActivityFeedResponse)
 async def get_project_feed(
     project_id: UUID = Path(..., description="ID проекта"),
@@ -28,7 +40,7 @@ async def get_project_feed(
     feed_data = await activity_feed_service.get_feed_for_project(
         session, user_id=user_id, project_id=project_id, page=page, size=size
     )
-    return feed_data
+    return _feed_json(feed_data)
 
 
 @router.get("/folder/{folder_id}", response_model=ActivityFeedResponse)
@@ -45,7 +57,7 @@ async def get_folder_feed(
     feed_data = await activity_feed_service.get_feed_for_folder(
         session, user_id=user_id, folder_id=folder_id, page=page, size=size
     )
-    return feed_data
+    return _feed_json(feed_data)
 
 
 @router.get("/element/{element_id}", response_model=ActivityFeedResponse)
@@ -62,7 +74,7 @@ async def get_element_feed(
     feed_data = await activity_feed_service.get_feed_for_element(
         session, user_id=user_id, element_id=element_id, page=page, size=size
     )
-    return feed_data
+    return _feed_json(feed_data)
 
 
 @router.get("/project/{project_id}/heatmap", response_model=ActivityHeatmapResponse)
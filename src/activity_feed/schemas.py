@@ -1,28 +1,26 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Any
 from uuid import UUID
 from datetime import datetime, date
 
 class ActivityUserSchema(BaseModel):
     """Информация о пользователе, совершившем действие."""
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     name: Optional[str] = "Unknown User"
 
-    class Config:
-        from_attributes = True
-
 class ActivityItemSchema(BaseModel):
     """Схема для одного агрегированного события в ленте."""
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     title: str = Field(..., description="Сгенерированный заголовок события")
-    summary: Dict[str, Any] = Field(..., description="Структурированные детали события для рендеринга на фронте")
+    summary: dict[str, Any] = Field(..., description="Структурированные детали события для рендеринга на фронте")
     started_at: datetime
     ended_at: datetime
     user: ActivityUserSchema
 
-    class Config:
-        from_attributes = True
-
 class ActivityFeedResponse(BaseModel):
     """Схема для ответа API ленты активности с пагинацией."""
     items: List[ActivityItemSchema]
@@ -30,6 +28,7 @@ class ActivityFeedResponse(BaseModel):
     page: int
     size: int
     pages: int
+    total_is_estimate: bool = Field(False, description="total взят из оценки планировщика, а не из точного COUNT")
 
 class ActivityHeatmapItem(BaseModel):
     """Данные об активности за один день."""
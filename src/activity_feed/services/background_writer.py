@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import insert
+
+from app.core.database import async_session_maker
+from app.activity_feed.config import activity_config
+from app.activity_feed.models import PendingActivity
+
+logger = logging.getLogger(__name__)
+
+# Core-level bulk INSERT for PendingActivity rows. render_nulls keeps rows
+# with None values (e.g. empty details) in the same multi-VALUES batch
+# instead of splitting the executemany by which keys are set.
+PENDING_ACTIVITY_INSERT = insert(PendingActivity).execution_options(
+    render_nulls=True
+)
+
+
+class ActivityWriter:
+    """
+    Writes committed activity rows from a per-worker background task.
+
+    Request sessions hand their buffered rows over after commit instead of
+    inserting them inline; the writer drains the queue in batches and
+    inserts each batch on its own session with a single executemany.
+
+    Start it from the application lifespan:
+
+        activity_writer.start()
+        ...
+        await activity_writer.stop()
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # One-off writes for rows submitted while the writer isn't running
+        self._fallback_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Create the queue and start the writer loop on the running loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=activity_config.ACTIVITY_WRITE_QUEUE_SIZE)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Flush queued rows and stop the writer loop.
+
+        Args:
+            timeout: Seconds to wait for the queue to drain
+        """
+        if self._fallback_tasks:
+            await asyncio.wait(self._fallback_tasks, timeout=timeout)
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Activity writer stopped with %d rows still queued",
+                self._queue.qsize(),
+            )
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def submit(self, rows: List[Dict[str, Any]]):
+        """
+        Queue rows for insertion without blocking.
+
+        If the writer isn't running (not started yet, or already stopped),
+        the rows are inserted by a one-off task instead of being lost.
+
+        Args:
+            rows: PendingActivity column dicts from a committed session
+        """
+        if not self.running:
+            task = asyncio.get_running_loop().create_task(self._write(rows))
+            self._fallback_tasks.add(task)
+            task.add_done_callback(self._fallback_tasks.discard)
+            return
+
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except asyncio.QueueFull:
+                logger.error(
+                    "Activity write queue is full, dropped %d events",
+                    len(rows) - index,
+                )
+                return
+
+    async def _run(self):
+        batch_size = activity_config.ACTIVITY_WRITE_BATCH_SIZE
+        while True:
+            rows = [await self._queue.get()]
+            while len(rows) < batch_size and not self._queue.empty():
+                rows.append(self._queue.get_nowait())
+
+            try:
+                await self._write(rows)
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    async def _write(self, rows: List[Dict[str, Any]]):
+        """Insert a batch of rows on its own session."""
+        try:
+            async with async_session_maker() as session:
+                await session.execute(PENDING_ACTIVITY_INSERT, rows)
+                await session.commit()
+        except Exception as e:
+            logger.error(
+                "Failed to write %d activity events: %s",
+                len(rows),
+                e,
+                exc_info=True,
+            )
+
+
+# Singleton instance
+activity_writer = ActivityWriter()
@@ -1,11 +1,27 @@
+import asyncio
 import logging
-from typing import Optional, List
+from typing import Awaitable, Dict, NamedTuple, Optional, List
 from uuid import UUID
 
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import (
+    Integer,
+    String,
+    select,
+    func,
+    and_,
+    or_,
+    cast,
+    bindparam,
+    case,
+    literal,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, JSONPATH, UUID as PGUUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, aliased
+from sqlalchemy.sql import Select
+from sqlalchemy.orm import selectinload, raiseload, aliased
+import orjson
 from fastapi import HTTPException
+from pydantic import TypeAdapter
 
 from app.filemanager.core import UnitOfWorkFactory
 from app.filemanager.services.access_scope.enhanced_access_scope_service import (
@@ -15,86 +31,358 @@ from app.filemanager.services.common import permission_checker, ResourceType, Pe
 from app.filemanager.models.folder import FolderBase
 from app.filemanager.models.element import ElementBase
 
+from app.core.database import async_session_maker
+from app.core.queue.connection import get_redis_client
+from app.activity_feed.config import activity_config
 from app.activity_feed.models import Activity
-from app.activity_feed.schemas import ActivityFeedResponse
+from app.activity_feed.schemas import ActivityFeedResponse, ActivityItemSchema
 from app.gallery.models import GalleryImage
 
 logger = logging.getLogger(__name__)
 
 
+# Typed so arrays stay uuid[] when statements are rendered with literal binds
+_UUID_ARRAY = ARRAY(PGUUID(as_uuid=True))
+
+
+def _id_array(subquery):
+    """
+    Build `ARRAY(SELECT id FROM subquery)::uuid[]`.
+
+    Unlike a `(SELECT array_agg(id) ...)` scalar subquery, the ARRAY
+    constructor is planned as an InitPlan evaluated once, so the array
+    operators see a constant and can use the GIN indexes on activities.
+    """
+    return cast(func.array(select(subquery.c.id).scalar_subquery()), _UUID_ARRAY)
+
+
+_PREFETCH_CACHE_PREFIX = "activity_feed:prefetch:"
+
+
+def _build_image_urls_column():
+    """
+    Correlated subquery returning {image_id: {thumbnailUrl, url}} for the
+    images referenced by an activity's summary (both item layouts).
+
+    Ids are pulled out with jsonpath and looked up by primary key, so the
+    feed page query returns rows that are ready to enrich without a second
+    round-trip.
+    """
+    image_ids = func.jsonb_path_query_array(
+        Activity.summary,
+        cast(
+            literal('$.groups[*] ? (@.type == "images_uploaded").items[*].id'),
+            JSONPATH,
+        ),
+        type_=JSONB,
+    ).op("||", return_type=JSONB)(
+        func.jsonb_path_query_array(
+            Activity.summary,
+            cast(
+                literal(
+                    '$.groups[*] ? (@.type == "images_uploaded")'
+                    ".items_by_parent.*[*].id"
+                ),
+                JSONPATH,
+            ),
+            type_=JSONB,
+        )
+    )
+    image_ref = func.jsonb_array_elements_text(image_ids).table_valued("value")
+    # Malformed ids become NULL instead of failing the cast
+    image_uuid = case(
+        (
+            image_ref.c.value.op("~*")(
+                "^[0-9a-f]{8}-?([0-9a-f]{4}-?){3}[0-9a-f]{12}$"
+            ),
+            cast(image_ref.c.value, PGUUID(as_uuid=True)),
+        )
+    )
+    return (
+        select(
+            func.jsonb_object_agg(
+                cast(GalleryImage.id, String),
+                func.jsonb_build_object(
+                    "thumbnailUrl", GalleryImage.thumbnail_url, "url", GalleryImage.url
+                ),
+                type_=JSONB,
+            )
+        )
+        .select_from(image_ref)
+        .join(GalleryImage, GalleryImage.id == image_uuid)
+        .correlate(Activity)
+        .scalar_subquery()
+    )
+
+
+_IMAGE_URLS_COLUMN = _build_image_urls_column()
+
+
+def _build_folder_tree_stmt():
+    """SELECT ids of a folder and all its descendants via a recursive CTE."""
+    folder_cte = (
+        select(FolderBase.id)
+        .where(FolderBase.id == bindparam("folder_id"))
+        .cte(name="folder_tree", recursive=True)
+    )
+
+    parent_alias = aliased(FolderBase)
+    folder_cte = folder_cte.union_all(
+        select(parent_alias.id).join(
+            folder_cte, parent_alias.parent_id == folder_cte.c.id
+        )
+    )
+
+    return select(folder_cte.c.id)
+
+
+_FOLDER_TREE_STMT = _build_folder_tree_stmt()
+
+
+class _FeedStatements(NamedTuple):
+    """Statements serving one feed; paging values are bound at execution."""
+
+    count: Select
+    ids: Select
+    page: Select
+
+
+def _build_feed_statements(filters) -> _FeedStatements:
+    """
+    Build count, id and page statements for activities matching filters.
+
+    LIMIT/OFFSET are bind parameters ('limit', 'offset'), so statements
+    built once at import are reused, and their compiled SQL cached, for
+    every page.
+    """
+    return _FeedStatements(
+        count=select(func.count(Activity.id)).where(filters),
+        ids=select(Activity.id).where(filters),
+        page=(
+            select(Activity, _IMAGE_URLS_COLUMN)
+            .where(filters)
+            .order_by(Activity.ended_at.desc())
+            .offset(bindparam("offset", type_=Integer))
+            .limit(bindparam("limit", type_=Integer))
+            .options(selectinload(Activity.user), raiseload("*"))
+        ),
+    )
+
+
+def _array_first_filters(array_filter, project_id):
+    """
+    Filter activities by an array predicate first, then by project.
+
+    The array predicate runs in a MATERIALIZED CTE, which the planner
+    cannot inline, so it is always answered from the GIN index instead
+    of a project_id scan that rechecks the array on every row.
+    """
+    activity_ids_cte = (
+        select(Activity.id)
+        .where(array_filter)
+        .cte("act_ids")
+        .prefix_with("MATERIALIZED")
+    )
+    return and_(
+        Activity.id.in_(select(activity_ids_cte.c.id)),
+        Activity.project_id == project_id,
+    )
+
+
+def _uuid_array_param(name: str):
+    """uuid[] bind parameter that stays typed when rendered as a literal."""
+    return cast(bindparam(name, type_=_UUID_ARRAY), _UUID_ARRAY)
+
+
+_FOLDER_FEED_STMTS = _build_feed_statements(
+    _array_first_filters(
+        Activity.affected_folders.overlap(_uuid_array_param("folder_ids")),
+        bindparam("project_id", type_=PGUUID(as_uuid=True)),
+    )
+)
+
+_ELEMENT_FEED_STMTS = _build_feed_statements(
+    _array_first_filters(
+        Activity.affected_elements.contains(_uuid_array_param("element_ids")),
+        bindparam("project_id", type_=PGUUID(as_uuid=True)),
+    )
+)
+
+
+# Validates a whole page of ORM rows in one call into the compiled core
+_ITEMS_ADAPTER = TypeAdapter(list[ActivityItemSchema])
+
+
 class ActivityFeedService:
 
-    async def _enrich_activities_with_image_urls(
-        self, session: AsyncSession, activities: List[Activity]
+    def __init__(self):
+        # One in-flight prefetch per (user, project)
+        self._prefetch_tasks: Dict[tuple, asyncio.Task] = {}
+
+    def _build_response(
+        self,
+        items: List[Activity],
+        *,
+        total: int,
+        page: int,
+        size: int,
+        total_is_estimate: bool = False,
+    ) -> ActivityFeedResponse:
+        """
+        Build a feed page from ORM rows.
+
+        Items are validated once through the list adapter; the response
+        itself is constructed without re-validating them.
+        """
+        return ActivityFeedResponse.model_construct(
+            items=_ITEMS_ADAPTER.validate_python(items, from_attributes=True),
+            total=total,
+            page=page,
+            size=size,
+            pages=(total + size - 1) // size if total > 0 else 0,
+            total_is_estimate=total_is_estimate,
+        )
+
+    def _enrich_activities_with_image_urls(
+        self,
+        activities: List[Activity],
+        images_map: Dict[str, dict],
     ) -> List[Activity]:
         """
         Находит события загрузки изображений и обогащает их поле 'summary' актуальными URL-ами.
+        images_map приходит вместе со страницей (_IMAGE_URLS_COLUMN).
         """
-        image_ids_to_fetch = set()
+        items_to_patch: List[tuple] = []
 
-        # 1. Собрать все ID изображений из событий
+        # 1. Собрать все элементы-изображения (и их ID) за один проход
         for activity in activities:
             if not activity.summary or not isinstance(activity.summary, dict):
                 continue
             for group in activity.summary.get("groups", []):
-                if group.get("type") == "images_uploaded":
-                    # Проверяем оба варианта структуры данных
-                    if "items" in group and isinstance(group["items"], list):
-                        for item in group["items"]:
-                            if isinstance(item, dict) and "id" in item:
-                                image_ids_to_fetch.add(item["id"])
-                    elif "items_by_parent" in group and isinstance(
-                        group["items_by_parent"], dict
-                    ):
-                        for parent_key, items in group["items_by_parent"].items():
-                            for item in items:
-                                if isinstance(item, dict) and "id" in item:
-                                    image_ids_to_fetch.add(item["id"])
-
-        if not image_ids_to_fetch:
+                if group.get("type") != "images_uploaded":
+                    continue
+                # Проверяем оба варианта структуры данных
+                if "items" in group and isinstance(group["items"], list):
+                    item_lists = (group["items"],)
+                elif "items_by_parent" in group and isinstance(
+                    group["items_by_parent"], dict
+                ):
+                    item_lists = group["items_by_parent"].values()
+                else:
+                    continue
+                for items in item_lists:
+                    for item in items:
+                        if isinstance(item, dict) and "id" in item:
+                            items_to_patch.append((item, item["id"]))
+
+        if not items_to_patch:
             return activities  # Нет изображений для обогащения
 
-        # 2. Сделать ОДИН запрос к БД для получения всех нужных картинок
-        image_query = select(
-            GalleryImage.id, GalleryImage.thumbnail_url, GalleryImage.url
-        ).where(GalleryImage.id.in_(list(image_ids_to_fetch)))
-        result = await session.execute(image_query)
-        # Создаем удобный словарь для быстрого доступа: { 'image_id': {thumbnailUrl: '...', url: '...'} }
-        images_map = {
-            str(row.id): {"thumbnailUrl": row.thumbnail_url, "url": row.url}
-            for row in result
-        }
-
-        # 3. Обогатить объекты 'summary' в 'activities'
-        for activity in activities:
-            if not activity.summary or not isinstance(activity.summary, dict):
-                continue
-            for group in activity.summary.get("groups", []):
-                if group.get("type") == "images_uploaded":
-                    # Обновляем items, если они есть
-                    if "items" in group and isinstance(group["items"], list):
-                        for item in group["items"]:
-                            if isinstance(item, dict):
-                                image_data = images_map.get(item.get("id"))  # type: ignore
-                                if image_data:
-                                    item["thumbnailUrl"] = image_data["thumbnailUrl"]
-                                    item["url"] = image_data["url"]
-                    # Обновляем items_by_parent, если они есть
-                    elif "items_by_parent" in group and isinstance(
-                        group["items_by_parent"], dict
-                    ):
-                        for parent_key, items in group["items_by_parent"].items():
-                            for item in items:
-                                if isinstance(item, dict):
-                                    image_data = images_map.get(item.get("id"))  # type: ignore
-                                    if image_data:
-                                        item["thumbnailUrl"] = image_data[
-                                            "thumbnailUrl"
-                                        ]
-                                        item["url"] = image_data["url"]
+        # 2. Обогатить собранные элементы без повторного обхода 'summary'
+        for item, image_id in items_to_patch:
+            image_data = images_map.get(image_id)
+            if image_data:
+                item.update(image_data)
 
         return activities
 
+    async def _get_page(
+        self,
+        session: AsyncSession,
+        statements: _FeedStatements,
+        params: Dict[str, object],
+        *,
+        page: int,
+        size: int,
+    ) -> ActivityFeedResponse:
+        """
+        Count and load one page of activities using prebuilt statements.
+
+        With ACTIVITY_CONCURRENT_FEED_QUERIES the page is loaded on a second
+        pooled session while the count runs, so both cost one round-trip.
+        Deep pages (past ACTIVITY_COUNT_ESTIMATE_THRESHOLD rows) report the
+        planner's row estimate instead of an exact count.
+        """
+        offset = (page - 1) * size
+        estimate = page * size > activity_config.ACTIVITY_COUNT_ESTIMATE_THRESHOLD
+
+        def count() -> Awaitable[Optional[int]]:
+            # Built where it is awaited, so an earlier failure can't leave
+            # an unawaited coroutine behind
+            if estimate:
+                return self._estimate_count(session, statements.ids.params(params))
+            return session.scalar(statements.count, params)
+
+        page_params = {**params, "offset": offset, "limit": size}
+
+        if activity_config.ACTIVITY_CONCURRENT_FEED_QUERIES:
+            # A session can't run two statements at once, hence page_session
+            async with async_session_maker() as page_session:
+                total, result = await asyncio.gather(
+                    count(), page_session.execute(statements.page, page_params)
+                )
+                rows = result.all()
+            total = total or 0
+        else:
+            total = await count() or 0
+            if total == 0 and not estimate:
+                return ActivityFeedResponse(
+                    items=[], total=0, page=page, size=size, pages=0
+                )
+
+            result = await session.execute(statements.page, page_params)
+            rows = result.all()
+
+        items = [activity for activity, _ in rows]
+        images_map: Dict[str, dict] = {}
+        for _, image_urls in rows:
+            if image_urls:
+                images_map.update(image_urls)
+
+        if estimate:
+            # The estimate can't be below what this page has already shown
+            total = max(total, offset + len(items))
+
+        items = self._enrich_activities_with_image_urls(items, images_map)
+
+        return self._build_response(
+            items, total=total, page=page, size=size, total_is_estimate=estimate
+        )
+
+    async def _estimate_count(self, session: AsyncSession, stmt) -> Optional[int]:
+        """
+        Get the planner's row estimate for stmt without executing it.
+
+        Falls back to an exact count if the statement can't be rendered
+        with inline literals (EXPLAIN doesn't take bind parameters here).
+
+        Args:
+            session: Database session
+            stmt: SELECT whose result size should be estimated
+
+        Returns:
+            Estimated number of rows
+        """
+        connection = await session.connection()
+        try:
+            sql = str(
+                stmt.compile(
+                    dialect=connection.dialect,
+                    compile_kwargs={"literal_binds": True},
+                )
+            )
+        except Exception as e:
+            logger.debug("Falling back to exact count, cannot inline query: %s", e)
+            return await session.scalar(
+                select(func.count()).select_from(stmt.subquery())
+            )
+
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = result.scalar()
+        if isinstance(plan, (str, bytes)):
+            plan = orjson.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
     async def get_feed_for_project(
         self,
         session: AsyncSession,
@@ -103,14 +391,117 @@ class ActivityFeedService:
         project_id: UUID,
         page: int,
         size: int,
+    ) -> ActivityFeedResponse:
+        if not activity_config.ACTIVITY_FEED_PREFETCH:
+            return await self._load_project_feed(
+                session, user_id=user_id, project_id=project_id, page=page, size=size
+            )
+
+        cache_key = f"{_PREFETCH_CACHE_PREFIX}{user_id}:{project_id}:{page}:{size}"
+        response = await self._get_prefetched_page(cache_key)
+        if response is not None:
+            # Access may have been revoked since the page was prefetched
+            async with UnitOfWorkFactory.create(session) as uow:
+                await uow.require_permission(
+                    permission_checker,
+                    ResourceType.PROJECT,
+                    project_id,
+                    user_id,
+                    Permission.READ,
+                )
+        else:
+            response = await self._load_project_feed(
+                session, user_id=user_id, project_id=project_id, page=page, size=size
+            )
+
+        if page < response.pages:
+            self._schedule_prefetch(
+                user_id=user_id, project_id=project_id, page=page + 1, size=size
+            )
+
+        return response
+
+    async def _get_prefetched_page(
+        self, cache_key: str
+    ) -> Optional[ActivityFeedResponse]:
+        """Get a prefetched feed page from Redis, if one is still cached."""
+        try:
+            redis_client = await get_redis_client()
+            cached = await redis_client.get(cache_key)
+        except Exception as e:
+            logger.warning("Feed prefetch cache unavailable: %s", e)
+            return None
+
+        if cached is None:
+            return None
+        return ActivityFeedResponse.model_validate_json(cached)
+
+    def _schedule_prefetch(
+        self, *, user_id: Optional[UUID], project_id: UUID, page: int, size: int
+    ):
+        """Start loading the next page in the background, unless one is running."""
+        task_key = (user_id, project_id)
+        running = self._prefetch_tasks.get(task_key)
+        if running is not None and not running.done():
+            return
+
+        task = asyncio.get_running_loop().create_task(
+            self._prefetch_project_page(
+                user_id=user_id, project_id=project_id, page=page, size=size
+            )
+        )
+        self._prefetch_tasks[task_key] = task
+
+        def _forget(done: asyncio.Task):
+            if self._prefetch_tasks.get(task_key) is done:
+                del self._prefetch_tasks[task_key]
+
+        task.add_done_callback(_forget)
+
+    async def _prefetch_project_page(
+        self, *, user_id: Optional[UUID], project_id: UUID, page: int, size: int
+    ):
+        """Load a project feed page on its own session and cache it briefly."""
+        try:
+            async with async_session_maker() as session:
+                response = await self._load_project_feed(
+                    session,
+                    user_id=user_id,
+                    project_id=project_id,
+                    page=page,
+                    size=size,
+                )
+
+            redis_client = await get_redis_client()
+            await redis_client.setex(
+                f"{_PREFETCH_CACHE_PREFIX}{user_id}:{project_id}:{page}:{size}",
+                activity_config.ACTIVITY_FEED_PREFETCH_TTL,
+                response.model_dump_json(),
+            )
+        except Exception as e:
+            logger.warning(
+                "Failed to prefetch feed page %s for project %s: %s",
+                page,
+                project_id,
+                e,
+            )
+
+    async def _load_project_feed(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: Optional[UUID],
+        project_id: UUID,
+        page: int,
+        size: int,
     ) -> ActivityFeedResponse:
         async with UnitOfWorkFactory.create(session) as uow:
-            await permission_checker.require_permission(
+            await uow.require_permission(
+                permission_checker,
                 ResourceType.PROJECT,
                 project_id,
                 user_id,
                 Permission.READ,
-                context={"uow": uow, "permission_checker": permission_checker},
             )
 
             # 1. Создаем CTE ОДИН РАЗ
@@ -146,17 +537,13 @@ class ActivityFeedService:
                 or_(
                     func.cardinality(Activity.affected_elements) == 0,
                     Activity.affected_elements.op("<@")(
-                        select(
-                            func.array_agg(accessible_elements_subquery.c.id)
-                        ).scalar_subquery()
+                        _id_array(accessible_elements_subquery)
                     ),
                 ),
                 or_(
                     func.cardinality(Activity.affected_folders) == 0,
                     Activity.affected_folders.op("<@")(
-                        select(
-                            func.array_agg(accessible_folders_subquery.c.id)
-                        ).scalar_subquery()
+                        _id_array(accessible_folders_subquery)
                     ),
                 ),
             ]
@@ -166,34 +553,12 @@ class ActivityFeedService:
 
             final_filters = and_(*base_filters, *security_filters)
 
-            count_query = select(func.count(Activity.id)).where(final_filters)
-            total = await uow.session.scalar(count_query) or 0
-
-            if total == 0:
-                return ActivityFeedResponse(
-                    items=[], total=0, page=page, size=size, pages=0
-                )
-
-            query = (
-                select(Activity)
-                .where(final_filters)
-                .order_by(Activity.ended_at.desc())
-                .offset((page - 1) * size)
-                .limit(size)
-                .options(selectinload(Activity.user))
-            )
-
-            result = await uow.session.execute(query)
-            items = list(result.scalars().unique().all())
-
-            items = await self._enrich_activities_with_image_urls(uow.session, items)
-
-            return ActivityFeedResponse(
-                items=items,  # type: ignore
-                total=total,
+            return await self._get_page(
+                uow.session,
+                _build_feed_statements(final_filters),
+                {},
                 page=page,
                 size=size,
-                pages=(total + size - 1) // size if total > 0 else 0,
             )
 
     async def get_feed_for_folder(
@@ -209,56 +574,24 @@ class ActivityFeedService:
             folder = await uow.session.get(FolderBase, folder_id)
             if not folder:
                 raise HTTPException(status_code=404, detail="Folder not found")
-            await permission_checker.require_permission(
+            await uow.require_permission(
+                permission_checker,
                 ResourceType.FOLDER,
                 folder_id,
                 user_id,
                 Permission.READ,
-                context={"uow": uow, "permission_checker": permission_checker},
             )
 
             all_folder_ids = await self._get_folder_and_subfolder_ids(
                 uow.session, folder_id
             )
 
-            count_query = select(func.count(Activity.id)).where(
-                and_(
-                    Activity.project_id == folder.project_id,
-                    Activity.affected_folders.overlap(all_folder_ids),
-                )
-            )
-            total = await uow.session.scalar(count_query) or 0
-
-            if total == 0:
-                return ActivityFeedResponse(
-                    items=[], total=0, page=page, size=size, pages=0
-                )
-
-            query = (
-                select(Activity)
-                .where(
-                    and_(
-                        Activity.project_id == folder.project_id,
-                        Activity.affected_folders.overlap(all_folder_ids),
-                    )
-                )
-                .order_by(Activity.ended_at.desc())
-                .offset((page - 1) * size)
-                .limit(size)
-                .options(selectinload(Activity.user))
-            )
-
-            result = await uow.session.execute(query)
-            items = list(result.scalars().unique().all())
-
-            items = await self._enrich_activities_with_image_urls(uow.session, items)
-
-            return ActivityFeedResponse(
-                items=items,  # type: ignore
-                total=total,
+            return await self._get_page(
+                uow.session,
+                _FOLDER_FEED_STMTS,
+                {"folder_ids": all_folder_ids, "project_id": folder.project_id},
                 page=page,
                 size=size,
-                pages=(total + size - 1) // size if total > 0 else 0,
             )
 
     async def get_feed_for_element(
@@ -274,52 +607,20 @@ class ActivityFeedService:
             element = await uow.session.get(ElementBase, element_id)
             if not element:
                 raise HTTPException(status_code=404, detail="Element not found")
-            await permission_checker.require_permission(
+            await uow.require_permission(
+                permission_checker,
                 ResourceType.ELEMENT,
                 element_id,
                 user_id,
                 Permission.READ,
-                context={"uow": uow, "permission_checker": permission_checker},
-            )
-
-            count_query = select(func.count(Activity.id)).where(
-                and_(
-                    Activity.project_id == element.project_id,
-                    Activity.affected_elements.contains([element_id]),
-                )
-            )
-            total = await uow.session.scalar(count_query) or 0
-
-            if total == 0:
-                return ActivityFeedResponse(
-                    items=[], total=0, page=page, size=size, pages=0
-                )
-
-            query = (
-                select(Activity)
-                .where(
-                    and_(
-                        Activity.project_id == element.project_id,
-                        Activity.affected_elements.contains([element_id]),
-                    )
-                )
-                .order_by(Activity.ended_at.desc())
-                .offset((page - 1) * size)
-                .limit(size)
-                .options(selectinload(Activity.user))
             )
 
-            result = await uow.session.execute(query)
-            items = list(result.scalars().unique().all())
-
-            items = await self._enrich_activities_with_image_urls(uow.session, items)
-
-            return ActivityFeedResponse(
-                items=items,  # type: ignore
-                total=total,
+            return await self._get_page(
+                uow.session,
+                _ELEMENT_FEED_STMTS,
+                {"element_ids": [element_id], "project_id": element.project_id},
                 page=page,
                 size=size,
-                pages=(total + size - 1) // size if total > 0 else 0,
             )
 
     async def _get_folder_and_subfolder_ids(
@@ -329,48 +630,9 @@ class ActivityFeedService:
         Рекурсивно получает ID всех дочерних папок.
         Возвращает список UUID (не строк!).
         """
-        folder_cte = (
-            select(FolderBase.id)
-            .where(FolderBase.id == folder_id)
-            .cte(name="folder_tree", recursive=True)
-        )
-
-        parent_alias = aliased(FolderBase)
-        folder_cte = folder_cte.union_all(
-            select(parent_alias.id).join(
-                folder_cte, parent_alias.parent_id == folder_cte.c.id
-            )
-        )
-
-        query = select(folder_cte.c.id)
-        result = await session.execute(query)
+        result = await session.execute(_FOLDER_TREE_STMT, {"folder_id": folder_id})
 
         return list(result.scalars().all())
 
-    async def _get_folder_and_subfolder_ids_str(
-        self, session: AsyncSession, folder_id: UUID
-    ) -> List[str]:
-        """
-        Рекурсивно получает ID всех дочерних папок и возвращает их как список строк.
-        Использует рекурсивный CTE для эффективности.
-        """
-        folder_cte = (
-            select(FolderBase.id)
-            .where(FolderBase.id == folder_id)
-            .cte(name="folder_tree", recursive=True)
-        )
-
-        parent_alias = aliased(FolderBase)
-        folder_cte = folder_cte.union_all(
-            select(parent_alias.id).join(
-                folder_cte, parent_alias.parent_id == folder_cte.c.id
-            )
-        )
-
-        query = select(folder_cte.c.id)
-        result = await session.execute(query)
-
-        return [str(uuid_val) for uuid_val in result.scalars().all()]
-
 
 activity_feed_service = ActivityFeedService()
@@ -33,8 +33,8 @@ class ActivityHeatmapService:
         Получает данные для heatmap-календаря из сводной таблицы.
         """
         async with UnitOfWorkFactory.create(session) as uow:
-            await permission_checker.require_permission(
-                ResourceType.PROJECT, project_id, user_id, Permission.READ, context={'uow': uow, 'permission_checker': permission_checker}
+            await uow.require_permission(
+                permission_checker, ResourceType.PROJECT, project_id, user_id, Permission.READ
             )
 
             query = (
@@ -0,0 +1,154 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.filemanager.models.element import ElementBase
+from app.filemanager.models.folder import FolderBase
+
+logger = logging.getLogger(__name__)
+
+
+_ENTITY_MODELS = {
+    "element": ElementBase,
+    "folder": FolderBase,
+}
+
+# Built once so each flush only binds parameters; the expanding IN
+# keeps a single compiled-cache entry regardless of batch size.
+# All entity types go out as one UNION ALL, so a flush is one round-trip.
+_PROJECT_ID_STMT = union_all(
+    *(
+        select(
+            literal(entity_type).label("entity_type"),
+            model.id.label("id"),
+            model.project_id.label("project_id"),
+        ).where(model.id.in_(bindparam(f"{entity_type}_ids", expanding=True)))
+        for entity_type, model in _ENTITY_MODELS.items()
+    )
+)
+
+
+class ProjectIdResolver:
+    """
+    Resolves project_id for elements and folders referenced by events.
+
+    Lookups arriving within the same event-loop tick are coalesced into
+    a single `WHERE id IN (...)` query for all entity types. Resolved values are
+    kept in a short-TTL local cache, since an entity never changes project.
+    """
+
+    def __init__(self, cache_ttl: float = 300.0, cache_max_size: int = 4096):
+        self.cache_ttl = cache_ttl
+        self.cache_max_size = cache_max_size
+        self._cache: Dict[Tuple[str, UUID], Tuple[UUID, float]] = {}
+        self._pending: Dict[
+            AsyncSession, Dict[str, Dict[UUID, asyncio.Future]]
+        ] = {}
+        self._flush_scheduled = False
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def resolve(
+        self, session: AsyncSession, entity_type: str, entity_id: UUID
+    ) -> Optional[UUID]:
+        """
+        Get project_id for an element or folder.
+
+        Args:
+            session: Database session
+            entity_type: 'element' or 'folder'
+            entity_id: Entity UUID
+
+        Returns:
+            Project UUID or None if not found
+        """
+        if entity_type not in _ENTITY_MODELS:
+            return None
+
+        cached = self._cache_get(entity_type, entity_id)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        bucket = self._pending.setdefault(session, {}).setdefault(entity_type, {})
+        future = bucket.get(entity_id)
+        if future is None:
+            future = loop.create_future()
+            bucket[entity_id] = future
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._start_flush)
+
+        # Shield the shared future so a cancelled caller doesn't cancel others
+        return await asyncio.shield(future)
+
+    def _start_flush(self):
+        """Take all lookups collected during this tick and query them."""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        if pending:
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._flush(pending)
+            )
+
+    async def _flush(
+        self, pending: Dict[AsyncSession, Dict[str, Dict[UUID, asyncio.Future]]]
+    ):
+        for session, buckets in pending.items():
+            params = {
+                f"{entity_type}_ids": list(buckets.get(entity_type, ()))
+                for entity_type in _ENTITY_MODELS
+            }
+            try:
+                result = await session.execute(_PROJECT_ID_STMT, params)
+                found = {
+                    (row.entity_type, row.id): row.project_id for row in result
+                }
+            except Exception as e:
+                for futures in buckets.values():
+                    for future in futures.values():
+                        if not future.done():
+                            future.set_exception(e)
+                continue
+
+            for entity_type, futures in buckets.items():
+                for entity_id, future in futures.items():
+                    project_id = found.get((entity_type, entity_id))
+                    if project_id is not None:
+                        self._cache_set(entity_type, entity_id, project_id)
+                    if not future.done():
+                        future.set_result(project_id)
+
+    def _cache_get(self, entity_type: str, entity_id: UUID) -> Optional[UUID]:
+        entry = self._cache.get((entity_type, entity_id))
+        if entry is None:
+            return None
+        project_id, expires_at = entry
+        if expires_at < time.monotonic():
+            self._cache.pop((entity_type, entity_id), None)
+            return None
+        return project_id
+
+    def _cache_set(self, entity_type: str, entity_id: UUID, project_id: UUID):
+        current_time = time.monotonic()
+        self._cache[(entity_type, entity_id)] = (
+            project_id,
+            current_time + self.cache_ttl,
+        )
+
+        # Clean expired entries from cache (simple cleanup)
+        if len(self._cache) > self.cache_max_size:
+            self._cache = {
+                k: v for k, v in self._cache.items() if v[1] > current_time
+            }
+            if len(self._cache) > self.cache_max_size:
+                self._cache.clear()
+
+
+# Singleton instance
+project_id_resolver = ProjectIdResolver()
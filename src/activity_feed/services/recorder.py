@@ -1,21 +1,44 @@
 import time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from uuid import UUID
 
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.activity_feed.config import activity_config
 from app.core.queue import queue_manager
-from app.activity_feed.models import PendingActivity
+from app.filemanager.core.unit_of_work import register_session_buffer
+from app.activity_feed.services.background_writer import (
+    PENDING_ACTIVITY_INSERT,
+    activity_writer,
+)
 
 logger = logging.getLogger(__name__)
 
+# session.info key holding rows recorded but not yet inserted
+_BUFFER_KEY = "_activity_buffer"
+# session.info key holding session keys already scheduled for aggregation
+_ENQUEUED_KEY = "_activity_enqueued"
+# session.info key mapping open savepoints to the buffer length at their start
+_SAVEPOINTS_KEY = "_activity_savepoints"
+
+# Buffered events are pending changes, so a UnitOfWork left without commit
+# rolls them back like the ORM writes they belong to
+register_session_buffer(_BUFFER_KEY)
+
 
 class ActivityRecorder:
     """
     Records raw activity events to buffer before aggregation.
     Respects category configuration to filter events.
+
+    Events are collected on the session and written with a single bulk
+    INSERT when the session commits (or on an explicit `flush`). With
+    ACTIVITY_BACKGROUND_WRITES they are handed to the background writer
+    after commit instead.
     """
 
     def _generate_session_key(self, user_id: UUID, project_id: UUID) -> str:
@@ -23,6 +46,16 @@ class ActivityRecorder:
         timestamp_bucket = int(time.time() // activity_config.ACTIVITY_SESSION_DURATION)
         return f"{user_id}:{project_id}:{timestamp_bucket}"
 
+    def _serialize_details(self, details: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalize details to JSON-native values so they can be stored as JSONB.
+        orjson handles UUIDs and datetimes natively, including nested ones
+        in 'changes'/'old_values', in a single C-level pass.
+        """
+        return orjson.loads(
+            orjson.dumps(details, default=str, option=orjson.OPT_NAIVE_UTC)
+        )
+
     async def record(
         self,
         session: AsyncSession,
@@ -30,7 +63,7 @@ class ActivityRecorder:
         user_id: UUID,
         project_id: UUID,
         event_type: str,
-        target_id: str,
+        target_id: Union[UUID, str],
         target_type: str,
         details: Dict[str, Any],
     ):
@@ -44,45 +77,152 @@ class ActivityRecorder:
             event_type: Type of event (e.g., 'element.created')
             target_id: ID of target entity
             target_type: Type of target entity
-            details: Additional event details
+            details: Additional event details, UUID values are allowed
         """
         # Check if event category is enabled
         if not activity_config.is_event_type_enabled(event_type):
-            category = activity_config._get_category_for_event_type(event_type)
-            logger.debug(
-                f"Skipping event '{event_type}' (category: {category}) - "
-                f"disabled in configuration"
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Skipping event '%s' (category: %s) - disabled in configuration",
+                    event_type,
+                    activity_config._get_category_for_event_type(event_type),
+                )
             return
 
         session_key = self._generate_session_key(user_id, project_id)
 
-        pending_event = PendingActivity(
-            session_key=session_key,
-            user_id=user_id,
-            project_id=project_id,
-            event_type=event_type,
-            target_id=str(target_id),
-            target_type=target_type,
-            details=details,
+        session.info.setdefault(_BUFFER_KEY, []).append(
+            {
+                "session_key": session_key,
+                "user_id": user_id,
+                "project_id": project_id,
+                "event_type": event_type,
+                "target_id": str(target_id),
+                "target_type": target_type,
+                "details": self._serialize_details(details),
+            }
         )
-        session.add(pending_event)
 
         # Schedule background aggregation task
-        # _job_key ensures only one task per session is queued
-        # New events will restart the timer for existing task
-        await queue_manager.enqueue(
-            "process_activity_session",
+        # _job_key ensures only one task per session is queued, so within
+        # a transaction each session key needs only one enqueue round-trip
+        enqueued = session.info.setdefault(_ENQUEUED_KEY, set())
+        if session_key not in enqueued:
+            await queue_manager.enqueue(
+                "process_activity_session",
+                session_key,
+                _defer_by=activity_config.ACTIVITY_SESSION_DURATION,
+                _job_key=f"activity_session:{session_key}",
+            )
+            enqueued.add(session_key)
+
+        logger.debug(
+            "Recorded event '%s' for session %.20s... (user: %s, project: %s)",
+            event_type,
             session_key,
-            _defer_by=activity_config.ACTIVITY_SESSION_DURATION,
-            _job_key=f"activity_session:{session_key}",
+            user_id,
+            project_id,
         )
 
-        logger.debug(
-            f"Recorded event '{event_type}' for session {session_key[:20]}... "
-            f"(user: {user_id}, project: {project_id})"
+    async def flush(self, session: AsyncSession):
+        """
+        Insert buffered events now instead of waiting for commit.
+
+        Args:
+            session: Database session the events were recorded on
+        """
+        rows = _take_buffer(session.info)
+        if rows:
+            await session.execute(PENDING_ACTIVITY_INSERT, rows)
+
+
+def _take_buffer(info: Dict[str, Any]):
+    """
+    Pop buffered rows that are about to be inserted.
+
+    Once inserted, a savepoint rollback undoes them in the database, so
+    open savepoint marks restart from the now empty buffer.
+    """
+    marks = info.get(_SAVEPOINTS_KEY)
+    if marks:
+        for transaction in marks:
+            marks[transaction] = 0
+    return info.pop(_BUFFER_KEY, None)
+
+
+@event.listens_for(Session, "before_commit")
+def _insert_buffered_activities(session: Session):
+    """Write all buffered events in one executemany before commit."""
+    if activity_config.ACTIVITY_BACKGROUND_WRITES and activity_writer.running:
+        # Left in the buffer for _submit_buffered_activities
+        return
+
+    if session.in_nested_transaction():
+        # A savepoint release; rows recorded before the savepoint would be
+        # undone with it if an enclosing savepoint rolls back later
+        return
+
+    rows = _take_buffer(session.info)
+    if rows:
+        session.execute(PENDING_ACTIVITY_INSERT, rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_buffered_activities(session: Session):
+    """Queue committed events for the background writer."""
+    if session.in_nested_transaction():
+        # Savepoint release, the rows aren't committed yet
+        return
+
+    session.info.pop(_ENQUEUED_KEY, None)
+    rows = session.info.pop(_BUFFER_KEY, None)
+    if rows:
+        activity_writer.submit(rows)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _mark_savepoint(session: Session, transaction: SessionTransaction):
+    """Remember where the buffer stood when a savepoint was opened."""
+    if transaction.nested:
+        session.info.setdefault(_SAVEPOINTS_KEY, {})[transaction] = len(
+            session.info.get(_BUFFER_KEY, ())
         )
 
 
+@event.listens_for(Session, "after_transaction_end")
+def _clear_transaction_state(session: Session, transaction: SessionTransaction):
+    """
+    Drop savepoint marks and leftover events once the outermost transaction
+    ends. Committed events are already taken by then, so anything still
+    buffered was never committed, e.g. the session was closed.
+    """
+    if transaction.parent is None:
+        session.info.pop(_SAVEPOINTS_KEY, None)
+        session.info.pop(_BUFFER_KEY, None)
+        session.info.pop(_ENQUEUED_KEY, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_buffered_activities(
+    session: Session, previous_transaction: SessionTransaction
+):
+    """
+    Drop events buffered within the rolled back transaction.
+
+    A savepoint rollback cuts the buffer back to its length when the
+    savepoint started, like the pending objects it would have expunged.
+    """
+    if previous_transaction.parent is None:
+        session.info.pop(_BUFFER_KEY, None)
+        session.info.pop(_ENQUEUED_KEY, None)
+        return
+
+    mark = session.info.get(_SAVEPOINTS_KEY, {}).pop(previous_transaction, None)
+    buffer = session.info.get(_BUFFER_KEY)
+    if mark is not None and buffer:
+        del buffer[mark:]
+
+
 # Singleton instance
 activity_recorder = ActivityRecorder()
+
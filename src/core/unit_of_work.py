@@ -3,9 +3,12 @@ Unit of Work pattern implementation for FileManager.
 Manages database transactions and repository access.
 """
 
-import asyncio
-from typing import Optional, TypeVar, Generic, Type, Dict, Any, Callable
+import functools
+import inspect
+from typing import Optional, TypeVar, Generic, Type, Any, Callable, Dict, Set
 from contextlib import asynccontextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.filemanager.logging import get_logger
@@ -14,15 +17,84 @@ logger = get_logger("app.filemanager.core.unit_of_work")
 
 T = TypeVar("T")
 
+# session.info key counting objects attached and flushes started
+_WRITES_KEY = "_uow_writes"
+
+
+# session.info keys under which other modules buffer rows until commit;
+# a non-empty buffer counts as a pending change
+_SESSION_BUFFER_KEYS: Set[str] = set()
+
+
+def register_session_buffer(info_key: str) -> None:
+    """
+    Treat rows buffered in session.info[info_key] as pending changes.
+
+    Lets writes kept outside the ORM until commit (e.g. recorded
+    activities) mark a unit of work dirty, so leaving it without commit
+    rolls them back.
+
+    Args:
+        info_key: session.info key holding the buffered rows
+    """
+    _SESSION_BUFFER_KEYS.add(info_key)
+
+
+def _has_buffered_rows(info: Dict[str, Any]) -> bool:
+    return any(info.get(key) for key in _SESSION_BUFFER_KEYS)
+
+
+@event.listens_for(Session, "after_attach")
+@event.listens_for(Session, "before_flush")
+def _count_session_writes(session: Session, *args):
+    """Let UnitOfWork tell read-only use apart without scanning the session."""
+    session.info[_WRITES_KEY] = session.info.get(_WRITES_KEY, 0) + 1
+
+
+# Upper bound on memoized permission decisions per unit of work
+_PERMISSION_CACHE_SIZE = 64
+
+# Attribute name -> repository class, filled on first UnitOfWork creation
+_REPOSITORY_CLASSES: Optional[Dict[str, type]] = None
+
+
+def _get_repository_classes() -> Dict[str, type]:
+    """Import repository classes once, lazily to avoid circular imports."""
+    global _REPOSITORY_CLASSES
+    if _REPOSITORY_CLASSES is None:
+        from app.filemanager.repositories import (
+            ElementRepository,
+            FolderRepository,
+            TagRepository,
+            PermissionRepository,
+            TypeRepository,
+            MentionRepository,
+        )
+
+        _REPOSITORY_CLASSES = {
+            "elements": ElementRepository,
+            "folders": FolderRepository,
+            "tags": TagRepository,
+            "permissions": PermissionRepository,
+            "types": TypeRepository,
+            "mentions": MentionRepository,
+        }
+    return _REPOSITORY_CLASSES
+
 
 class RepositoryProxy(Generic[T]):
-    """Optimized proxy for repository to ensure session consistency."""
+    """
+    Optimized proxy for repository to ensure session consistency.
+
+    Session-bound wrappers are created on first access and stored on the
+    proxy itself, so later lookups are plain attribute hits and never go
+    through __getattr__ again.
+    """
 
     def __init__(self, repository_class: Type[T], session: AsyncSession):
         self._repository_class = repository_class
         self._session = session
         self._instance: Optional[T] = None
-        self._method_cache: Dict[str, Callable] = {}
 
     def _get_repository(self) -> T:
         """Lazy initialization of repository instance."""
@@ -31,30 +103,27 @@ class RepositoryProxy(Generic[T]):
         return self._instance
 
     def __getattr__(self, name: str) -> Any:
-        # Check cache first
-        if name in self._method_cache:
-            return self._method_cache[name]
-
-        # Get repository instance
-        repository = self._get_repository()
-
-        # Get the method from repository
-        method = getattr(repository, name)
+        # Only called for names not yet in the instance __dict__
+        method = getattr(self._get_repository(), name)
 
-        # If it's a callable, create wrapper and cache it
-        if callable(method):
+        if not callable(method):
+            return method
 
+        if inspect.iscoroutinefunction(method):
+            # Calling it already yields the awaitable the caller expects
+            wrapper: Callable = functools.partial(method, self._session)
+        else:
+            # Callers always await proxy methods, so other callables get an
+            # async shim. A sync-looking decorator may still return a
+            # coroutine, so the result is checked on every call.
             async def wrapper(*args, **kwargs):
                 result = method(self._session, *args, **kwargs)
-                if asyncio.iscoroutine(result):
+                if inspect.isawaitable(result):
                     return await result
                 return result
 
-            # Cache the wrapper
-            self._method_cache[name] = wrapper
-            return wrapper
-
-        return method
+        self.__dict__[name] = wrapper
+        return wrapper
 
 
 class UnitOfWork:
@@ -67,43 +136,95 @@ class UnitOfWork:
         self._session = session
         self._committed = False
         self._rolled_back = False
+        self._writes_at_start = session.info.get(_WRITES_KEY, 0)
+        self._permission_cache: Dict[tuple, bool] = {}
 
-        # Lazy import to avoid circular dependencies
-        self._repository_classes = None
+    def __getattr__(self, name: str) -> Any:
+        """
+        Create repository proxies (uow.elements, uow.folders, ...) on first
+        access, so units of work that only use the session allocate none.
+        """
+        repository_class = (
+            None if name.startswith("_") else _get_repository_classes().get(name)
+        )
+        if repository_class is None:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+
+        proxy = RepositoryProxy(repository_class, self._session)
+        self.__dict__[name] = proxy
+        return proxy
+
+    async def require_permission(
+        self,
+        checker: Any,
+        resource_type: Any,
+        resource_id: Any,
+        user_id: Any,
+        permission: Any,
+    ) -> None:
+        """
+        Run checker.require_permission, memoizing granted checks.
 
-        # Initialize repository proxies
-        self._init_repositories()
+        Only successful checks are remembered; a denial raises as usual
+        and is re-evaluated next time.
 
-    def _init_repositories(self):
-        """Initialize repository proxies with lazy import."""
-        # Import repositories only when needed to avoid circular imports
-        from app.filemanager.repositories import (
-            ElementRepository,
-            FolderRepository,
-            TagRepository,
-            PermissionRepository,
-            TypeRepository,
-            MentionRepository,
+        Args:
+            checker: Permission checker exposing require_permission
+            resource_type: Type of the checked resource
+            resource_id: ID of the checked resource
+            user_id: User being checked (None for anonymous)
+            permission: Required permission
+        """
+        key = (resource_type, resource_id, user_id, permission)
+        if key in self._permission_cache:
+            return
+
+        await checker.require_permission(
+            resource_type,
+            resource_id,
+            user_id,
+            permission,
+            context={"uow": self, "permission_checker": checker},
         )
 
-        self.elements = RepositoryProxy(ElementRepository, self._session)
-        self.folders = RepositoryProxy(FolderRepository, self._session)
-        self.tags = RepositoryProxy(TagRepository, self._session)
-        self.permissions = RepositoryProxy(PermissionRepository, self._session)
-        self.types = RepositoryProxy(TypeRepository, self._session)
-        self.mentions = RepositoryProxy(MentionRepository, self._session)
+        if len(self._permission_cache) >= _PERMISSION_CACHE_SIZE:
+            self._permission_cache.clear()
+        self._permission_cache[key] = True
 
     @property
     def session(self) -> AsyncSession:
         """Get the underlying database session."""
         return self._session
 
+    @property
+    def has_writes(self) -> bool:
+        """
+        Cheap check whether this unit of work may have changed anything:
+        objects were added, a flush ran, a loaded object was modified, or
+        one was marked for deletion (session.delete fires no listener), or
+        rows are buffered until commit.
+        """
+        sync_session = self._session.sync_session
+        return (
+            self._session.info.get(_WRITES_KEY, 0) != self._writes_at_start
+            or sync_session.identity_map.check_modified()
+            or bool(self._session.deleted)
+            or _has_buffered_rows(self._session.info)
+        )
+
     @property
     def is_dirty(self) -> bool:
         """
         Проверяет, есть ли в сессии несохраненные изменения.
         """
-        return bool(self._session.new or self._session.dirty or self._session.deleted)
+        return bool(
+            self._session.new
+            or self._session.dirty
+            or self._session.deleted
+            or _has_buffered_rows(self._session.info)
+        )
 
     async def commit(self) -> None:
         """Commit the transaction."""
@@ -192,7 +313,8 @@ class UnitOfWorkFactory:
             # Если не было явного commit или rollback...
             if not uow._committed and not uow._rolled_back:
                 # ...и если в сессии были реальные изменения...
-                if uow.is_dirty:
+                # (has_writes отсекает read-only случаи без обхода сессии)
+                if uow.has_writes and uow.is_dirty:
                     # ...тогда выдаем предупреждение и откатываем транзакцию.
                     logger.warning(
                         "UnitOfWork exiting with pending changes and without explicit commit/rollback, rolling back"
@@ -7,14 +7,34 @@ import logging
 from fastapi import FastAPI
 
 from app.monitoring.config import monitoring_config, AlertLevel
-from app.monitoring.middleware import MonitoringMiddleware
+from app.monitoring.middleware import MonitoringMiddleware, alert_queue
 from app.monitoring.telegram import telegram_reporter
-from app.monitoring.arq_monitoring import monitored_task, monitored_periodic_task
 from app.monitoring.decorators import deduplicated
 
 
 logger = logging.getLogger(__name__)
 
+# ARQ task monitoring is only needed by workers, so it is imported on
+# first access instead of with the package (PEP 562)
+_ARQ_EXPORTS = frozenset(
+    (
+        "monitored_task",
+        "monitored_periodic_task",
+        "flush_task_stats",
+        "shutdown_pending_stats",
+    )
+)
+
+
+def __getattr__(name: str):
+    if name in _ARQ_EXPORTS:
+        from app.monitoring import arq_monitoring
+
+        value = getattr(arq_monitoring, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def setup_monitoring(app: FastAPI) -> None:
     """
@@ -46,6 +66,9 @@ def setup_monitoring(app: FastAPI) -> None:
     # Add exception monitoring middleware
     if monitoring_config.MONITOR_EXCEPTIONS:
         app.add_middleware(MonitoringMiddleware)
+        # Alerts are sent in the background; flush the ones still queued
+        # (often the crash alerts) before the event loop goes away
+        app.router.add_event_handler("shutdown", alert_queue.stop)
         logger.info("Exception monitoring middleware added")
     
     # Log configuration
@@ -83,6 +106,9 @@ __all__ = [
     "setup_monitoring",
     "monitoring_config",
     "telegram_reporter",
+    "alert_queue",
     "monitored_task",
     "monitored_periodic_task",
+    "flush_task_stats",
+    "shutdown_pending_stats",
 ]
@@ -3,20 +3,334 @@ ARQ task monitoring wrapper.
 Catches and reports failures in background tasks.
 """
 
+import asyncio
+import inspect
 import logging
+import reprlib
 import time
 import traceback
 import functools
-from typing import Any, Callable, Dict
-from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import orjson
 
 from app.monitoring.config import monitoring_config, AlertLevel
+from app.monitoring.decorators import sent_recently
 from app.monitoring.telegram import telegram_reporter
 from app.core.queue.connection import get_redis_client
 
 
 logger = logging.getLogger(__name__)
 
+# Health-check jobs must not count as queue activity themselves
+_JOBS_NO_HEARTBEAT = frozenset(("check_system_health", "send_daily_report"))
+
+STATS_TTL = 86400 * 7  # Keep daily stats for 7 days
+EXECUTION_TIMES_KEPT = 100
+
+# Bounded repr for task arguments in alerts: large payloads are elided
+# while formatting instead of being fully stringified and then sliced
+_args_repr = reprlib.Repr()
+_args_repr.maxstring = 100
+_args_repr.maxother = 100
+_args_repr.maxlist = _args_repr.maxtuple = _args_repr.maxdict = 5
+_args_repr.maxset = _args_repr.maxfrozenset = 5
+
+
+def _queue_incr_many(pipe: Any, ops: Iterable[Tuple[str, int, int]]):
+    """Queue INCRBY + EXPIRE on a pipeline for each (key, delta, ttl)"""
+    for key, delta, ttl in ops:
+        pipe.incrby(key, delta)
+        pipe.expire(key, ttl)
+
+
+async def _incr_many(
+    redis_client: Any, ops: Iterable[Tuple[str, int, int]]
+) -> List[int]:
+    """
+    Increment counters and refresh their TTLs in one round-trip.
+
+    Args:
+        redis_client: Redis client
+        ops: (key, delta, ttl) triples
+
+    Returns:
+        New counter values, in the order of `ops`
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    _queue_incr_many(pipe, ops)
+    results = await pipe.execute()
+    return results[::2]
+
+
+class _StatsAggregator:
+    """
+    Collects task stats in-process and writes them to Redis in batches.
+
+    Counters are summed and execution times appended locally; a background
+    flusher sends everything in one pipeline every
+    ARQ_STATS_FLUSH_INTERVAL_SECONDS, or sooner once
+    ARQ_STATS_FLUSH_MAX_EVENTS have been collected.
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.times: Dict[str, List[str]] = defaultdict(list)
+        self.values: Dict[str, Tuple[Union[str, bytes], int]] = {}
+        self._events = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def incr(self, key: str):
+        self.counters[key] += 1
+        self._events += 1
+
+    def add_time(self, key: str, execution_time: float):
+        self.times[key].append(str(execution_time))
+        self._events += 1
+
+    def setex(self, key: str, ttl: int, value: Union[str, bytes]):
+        """Keep only the latest value per key, like consecutive SETEX calls"""
+        self.values[key] = (value, ttl)
+
+    async def maybe_flush(self):
+        """Start the periodic flusher, flushing now if the buffer is full"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        if self._events >= monitoring_config.ARQ_STATS_FLUSH_MAX_EVENTS:
+            await self.flush()
+
+    async def flush(self):
+        """Write all collected stats in a single pipeline"""
+        counters, self.counters = self.counters, defaultdict(int)
+        times, self.times = self.times, defaultdict(list)
+        values, self.values = self.values, {}
+        self._events = 0
+
+        if not (counters or times or values):
+            return
+
+        try:
+            redis_client = await get_redis_client()
+            pipe = redis_client.pipeline(transaction=False)
+
+            _queue_incr_many(
+                pipe, ((key, count, STATS_TTL) for key, count in counters.items())
+            )
+
+            for key, samples in times.items():
+                pipe.lpush(key, *samples)
+                pipe.ltrim(key, 0, EXECUTION_TIMES_KEPT)
+                pipe.expire(key, STATS_TTL)
+
+            for key, (value, ttl) in values.items():
+                pipe.setex(key, ttl, value)
+
+            await pipe.execute()
+
+        except Exception as e:
+            logger.error(f"Failed to flush task stats: {e}")
+
+    async def stop(self):
+        """Stop the flusher and write whatever is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(monitoring_config.ARQ_STATS_FLUSH_INTERVAL_SECONDS)
+            await self.flush()
+
+
+_stats_aggregator = _StatsAggregator()
+
+# UTC date used in stats keys, recomputed only when the day rolls over
+_today_cache = {"date": "", "day": -1}
+
+
+def _today() -> str:
+    """Get today's UTC date as YYYY-MM-DD"""
+    now = int(time.time())
+    day = now // 86400
+    if day != _today_cache["day"]:
+        t = time.gmtime(now)
+        _today_cache.update(
+            day=day, date=f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}"
+        )
+    return _today_cache["date"]
+
+
+class _TaskKeys(NamedTuple):
+    success: str
+    time: str
+    last_success: str
+    failure: str
+    last_failure: str
+
+
+@functools.lru_cache(maxsize=512)
+def _task_keys(task_name: str, today: str) -> _TaskKeys:
+    """Build the Redis stats keys for a task on a given day"""
+    return _TaskKeys(
+        success=monitoring_config.get_redis_key(
+            "stats", today, f"tasks:success:{task_name}"
+        ),
+        time=monitoring_config.get_redis_key("stats", today, f"tasks:time:{task_name}"),
+        last_success=monitoring_config.get_redis_key(
+            "tasks", "last_success", task_name
+        ),
+        failure=monitoring_config.get_redis_key(
+            "stats", today, f"tasks:failure:{task_name}"
+        ),
+        last_failure=monitoring_config.get_redis_key(
+            "tasks", "last_failure", task_name
+        ),
+    )
+
+
+class _MonitorScheduler:
+    """
+    Runs monitoring coroutines (stats, alerts) in the background.
+
+    At most `limit` jobs are in flight; spawning past that waits for a free
+    slot, so a burst of failing tasks can't pile up unbounded alert work.
+    Job errors are logged in one place instead of surfacing as
+    "Task exception was never retrieved".
+    """
+
+    def __init__(self, limit: int):
+        self._semaphore = asyncio.Semaphore(limit)
+        self._jobs: Set[asyncio.Task] = set()
+
+    async def spawn(self, coro: Coroutine[Any, Any, None]):
+        """Start a job once a slot is free"""
+        await self._semaphore.acquire()
+        task = asyncio.get_running_loop().create_task(coro)
+        self._jobs.add(task)
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        self._jobs.discard(task)
+        self._semaphore.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Monitoring job failed: {task.exception()}")
+
+    async def drain(self):
+        """Wait for all spawned jobs to finish"""
+        while self._jobs:
+            await asyncio.gather(*self._jobs, return_exceptions=True)
+
+
+_monitor_scheduler = _MonitorScheduler(limit=monitoring_config.ARQ_MONITOR_MAX_JOBS)
+
+
+class _AlertRateLimiter:
+    """
+    Token bucket in front of task alerts sent to Telegram.
+
+    Allows bursts of up to `burst` alerts and refills at `per_minute`. When
+    the bucket is empty the alert is dropped rather than waited for, so a
+    failure storm doesn't turn into a queue of 429 retries; the number of
+    dropped alerts is attached to the next one that goes out.
+    """
+
+    def __init__(self, per_minute: int, burst: int):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.suppressed = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def acquire(self, details: Dict[str, Any]) -> bool:
+        """Take a token, noting earlier suppressed alerts in `details`"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        if self._tokens < 1:
+            self.suppressed += 1
+            return False
+
+        self._tokens -= 1
+        if self.suppressed:
+            details["Suppressed Alerts"] = self.suppressed
+            self.suppressed = 0
+        return True
+
+
+_alert_limiter = _AlertRateLimiter(
+    per_minute=monitoring_config.ARQ_ALERTS_PER_MINUTE,
+    burst=monitoring_config.ARQ_ALERT_BURST,
+)
+
+
+async def shutdown_pending_stats():
+    """Wait for background stats and alert jobs to finish"""
+    await _monitor_scheduler.drain()
+
+
+async def flush_task_stats():
+    """
+    Write pending and aggregated task stats to Redis.
+    Call from the ARQ worker's on_shutdown so buffered stats aren't lost.
+    """
+    await shutdown_pending_stats()
+    await _stats_aggregator.stop()
+
+
+# Bounded pool for synchronous tasks, created on first use
+_sync_task_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _to_coroutine_function(func: Callable) -> Callable:
+    """
+    Make a synchronous task awaitable by running it in a thread pool,
+    so it can't stall the worker's event loop.
+
+    Plain wrappers around coroutine functions are detected through
+    ``__wrapped__``; any other callable that still returns an awaitable
+    has its result awaited on the loop.
+    """
+    if inspect.iscoroutinefunction(inspect.unwrap(func)):
+        return func
+
+    @functools.wraps(func)
+    async def run_in_pool(*args, **kwargs):
+        global _sync_task_pool
+        if _sync_task_pool is None:
+            _sync_task_pool = ThreadPoolExecutor(
+                max_workers=monitoring_config.ARQ_SYNC_TASK_WORKERS,
+                thread_name_prefix="arq-sync-task",
+            )
+        result = await asyncio.get_running_loop().run_in_executor(
+            _sync_task_pool, functools.partial(func, *args, **kwargs)
+        )
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    return run_in_pool
+
 
 def monitored_task(func: Callable) -> Callable:
     """
@@ -28,158 +342,208 @@ def monitored_task(func: Callable) -> Callable:
         @task
         async def my_task(ctx, ...):
             ...
-    """
 
-    @functools.wraps(func)
-    async def wrapper(ctx: Dict[str, Any], *args, **kwargs):
-        """Wrapper that monitors task execution"""
+    Synchronous tasks are run in a bounded thread pool.
+    """
 
-        task_name = func.__name__
+    func = _to_coroutine_function(func)
+    task_name = func.__name__
 
-        # Skip monitoring if disabled or task is ignored
-        if not monitoring_config.MONITOR_ARQ_TASKS:
-            return await func(ctx, *args, **kwargs)
+    # Skip monitoring if disabled or task is ignored: the task runs
+    # unwrapped, without the monitoring frame on every call
+    if (
+        not monitoring_config.MONITOR_ARQ_TASKS
+        or task_name in monitoring_config.ARQ_IGNORED_TASKS
+    ):
+        return func
 
-        if task_name in monitoring_config.ARQ_IGNORED_TASKS:
-            return await func(ctx, *args, **kwargs)
+    # Resolved once at decoration time, so each call reads closure locals
+    # instead of walking monitoring_config
+    failure_alert = monitoring_config.ARQ_TASK_FAILURE_ALERT
+    heartbeat = task_name not in _JOBS_NO_HEARTBEAT
+    slow_threshold_ns = int(monitoring_config.ARQ_TASK_SLOW_THRESHOLD_SECONDS * 1e9)
+    spawn = _monitor_scheduler.spawn
 
-        start_time = time.time()
-        error_occurred = False
-        error_details = None
+    @functools.wraps(func)
+    async def wrapper(ctx: Dict[str, Any], *args, **kwargs):
+        """Wrapper that monitors task execution"""
+        start_ns = time.monotonic_ns()
+        error: Optional[Exception] = None
 
         try:
             # Execute the task
             result = await func(ctx, *args, **kwargs)
 
-            # Record successful completion
-            await _record_task_success(task_name, start_time)
-
-            # Check if task was slow
-            execution_time = time.time() - start_time
-            if execution_time > monitoring_config.ARQ_TASK_SLOW_THRESHOLD_SECONDS:
-                await _report_slow_task(task_name, execution_time, args, kwargs)
-
-            # Mark job as completed for health checks
-            if task_name not in ["check_system_health", "send_daily_report"]:
-                await _mark_job_completed()
+            elapsed_ns = time.monotonic_ns() - start_ns
+
+            # Record successful completion, check if task was slow and
+            # mark job as completed for health checks
+            await spawn(
+                _on_task_success(
+                    task_name,
+                    elapsed_ns,
+                    elapsed_ns > slow_threshold_ns,
+                    heartbeat,
+                    args,
+                    kwargs,
+                )
+            )
 
             return result
 
         except Exception as e:
-            error_occurred = True
-            error_details = {"error": e, "traceback": traceback.format_exc()}
-
-            # Record failure
-            await _record_task_failure(task_name, e, start_time)
+            error = e
 
-            # Send alert if enabled
-            if monitoring_config.ARQ_TASK_FAILURE_ALERT:
-                await _report_task_failure(task_name, e, args, kwargs)
+            # Record failure and send alert if enabled
+            await spawn(_on_task_failure(task_name, e, failure_alert, args, kwargs))
 
             # Re-raise the exception to maintain ARQ retry behavior
             raise
 
         finally:
             # Log task completion
-            execution_time = time.time() - start_time
-            if error_occurred:
+            execution_time = (time.monotonic_ns() - start_ns) / 1e9
+            if error is not None:
                 logger.error(
-                    f"Task {task_name} failed after {execution_time:.2f}s: {error_details['error']}"  # type: ignore
+                    "Task %s failed after %.2fs: %s", task_name, execution_time, error
                 )
             else:
                 logger.info(
-                    f"Task {task_name} completed successfully in {execution_time:.2f}s"
+                    "Task %s completed successfully in %.2fs", task_name, execution_time
                 )
 
     return wrapper
 
 
-async def _record_task_success(task_name: str, start_time: float):
-    """Record successful task execution for statistics"""
+async def _on_task_success(
+    task_name: str,
+    elapsed_ns: int,
+    slow: bool,
+    heartbeat: bool,
+    args: tuple,
+    kwargs: dict,
+):
+    """Run success bookkeeping, resolving the Redis client once"""
+    try:
+        redis_client = await get_redis_client()
+    except Exception as e:
+        logger.error(f"Failed to record task success: {e}")
+        return
+
+    await _record_task_success(redis_client, task_name, elapsed_ns)
+    if heartbeat:
+        await _mark_job_completed(redis_client)
+    if slow:
+        await _report_slow_task(redis_client, task_name, elapsed_ns, args, kwargs)
+
+
+async def _on_task_failure(
+    task_name: str, error: Exception, alert: bool, args: tuple, kwargs: dict
+):
+    """Run failure bookkeeping, resolving the Redis client once"""
     try:
         redis_client = await get_redis_client()
-        today = datetime.utcnow().strftime("%Y-%m-%d")
+    except Exception as e:
+        logger.error(f"Failed to record task failure: {e}")
+        return
+
+    await _record_task_failure(redis_client, task_name, error)
+    if alert:
+        await _report_task_failure(redis_client, task_name, error, args, kwargs)
+
+
+async def _record_task_success(redis_client: Any, task_name: str, elapsed_ns: int):
+    """Record successful task execution for statistics"""
+    try:
+        execution_time = elapsed_ns / 1e9
+        keys = _task_keys(task_name, _today())
+        success_key = keys.success
+        time_key = keys.time
+        last_success_key = keys.last_success
+
+        if monitoring_config.ARQ_STATS_FLUSH_INTERVAL_SECONDS > 0:
+            _stats_aggregator.incr(success_key)
+            _stats_aggregator.add_time(time_key, execution_time)
+            _stats_aggregator.setex(last_success_key, 3600, str(time.time()))
+            await _stats_aggregator.maybe_flush()
+            return
+
+        # All stats go out in a single round-trip
+        pipe = redis_client.pipeline(transaction=False)
 
         # Increment success counter
-        success_key = monitoring_config.get_redis_key(
-            "stats", today, f"tasks:success:{task_name}"
-        )
-        await redis_client.incr(success_key)
-        await redis_client.expire(success_key, 86400 * 7)  # Keep for 7 days
+        pipe.incr(success_key)
+        pipe.expire(success_key, STATS_TTL)
 
         # Update execution time stats
-        execution_time = time.time() - start_time
-        time_key = monitoring_config.get_redis_key(
-            "stats", today, f"tasks:time:{task_name}"
-        )
-        await redis_client.lpush(time_key, str(execution_time))  # type: ignore
-        await redis_client.ltrim(
-            time_key, 0, 100
-        )  # Keep last 100 executions # type: ignore
-        await redis_client.expire(time_key, 86400 * 7)
+        pipe.lpush(time_key, str(execution_time))
+        pipe.ltrim(time_key, 0, EXECUTION_TIMES_KEPT)
+        pipe.expire(time_key, STATS_TTL)
 
         # Update last success time
-        last_success_key = monitoring_config.get_redis_key(
-            "tasks", "last_success", task_name
-        )
-        await redis_client.setex(last_success_key, 3600, str(time.time()))
+        pipe.setex(last_success_key, 3600, str(time.time()))
+
+        await pipe.execute()
 
     except Exception as e:
         logger.error(f"Failed to record task success: {e}")
 
 
-async def _record_task_failure(task_name: str, error: Exception, start_time: float):
+async def _record_task_failure(redis_client: Any, task_name: str, error: Exception):
     """Record task failure for statistics"""
     try:
-        redis_client = await get_redis_client()
-        today = datetime.utcnow().strftime("%Y-%m-%d")
-
-        # Increment failure counter
-        failure_key = monitoring_config.get_redis_key(
-            "stats", today, f"tasks:failure:{task_name}"
-        )
-        await redis_client.incr(failure_key)
-        await redis_client.expire(failure_key, 86400 * 7)
+        today = _today()
+        keys = _task_keys(task_name, today)
 
-        # Record error type
         error_type = type(error).__name__
+        failure_key = keys.failure
         error_type_key = monitoring_config.get_redis_key(
             "stats", today, f"tasks:errors:{error_type}"
         )
-        await redis_client.incr(error_type_key)
-        await redis_client.expire(error_type_key, 86400 * 7)
-
-        # Update last failure time and error
-        last_failure_key = monitoring_config.get_redis_key(
-            "tasks", "last_failure", task_name
-        )
+        last_failure_key = keys.last_failure
         failure_data = {
             "time": time.time(),
             "error": str(error)[:200],
             "type": error_type,
         }
 
-        import json
+        if monitoring_config.ARQ_STATS_FLUSH_INTERVAL_SECONDS > 0:
+            _stats_aggregator.incr(failure_key)
+            _stats_aggregator.incr(error_type_key)
+            _stats_aggregator.setex(last_failure_key, 86400, orjson.dumps(failure_data))
+            await _stats_aggregator.maybe_flush()
+            return
+
+        # All stats go out in a single round-trip
+        pipe = redis_client.pipeline(transaction=False)
 
-        await redis_client.setex(
-            last_failure_key, 86400, json.dumps(failure_data)  # Keep for 1 day
+        # Increment failure counter
+        pipe.incr(failure_key)
+        pipe.expire(failure_key, STATS_TTL)
+
+        # Record error type
+        pipe.incr(error_type_key)
+        pipe.expire(error_type_key, STATS_TTL)
+
+        # Update last failure time and error
+        pipe.setex(
+            last_failure_key, 86400, orjson.dumps(failure_data)  # Keep for 1 day
         )
 
+        await pipe.execute()
+
     except Exception as e:
         logger.error(f"Failed to record task failure: {e}")
 
 
 async def _report_task_failure(
-    task_name: str, error: Exception, args: tuple, kwargs: dict
+    redis_client: Any, task_name: str, error: Exception, args: tuple, kwargs: dict
 ):
     """Send alert about task failure"""
     try:
         # Prepare task arguments for display (limit size)
-        args_str = str(args)[:200] if args else "None"
-        kwargs_str = str(kwargs)[:200] if kwargs else "None"
-
-        # Get traceback
-        tb_str = traceback.format_exc()
+        args_str = _args_repr.repr(args)[:200] if args else "None"
+        kwargs_str = _args_repr.repr(kwargs)[:200] if kwargs else "None"
 
         # Prepare details
         details = {
@@ -189,16 +553,26 @@ async def _report_task_failure(
         }
 
         # Check if this is a recurring failure
-        redis_client = await get_redis_client()
         failure_count_key = monitoring_config.get_redis_key(
             "tasks", "failure_count", task_name
         )
-        failure_count = await redis_client.incr(failure_count_key)
-        await redis_client.expire(failure_count_key, 3600)  # Reset counter every hour
+        # Reset counter every hour
+        (failure_count,) = await _incr_many(
+            redis_client, [(failure_count_key, 1, 3600)]
+        )
 
         if failure_count > 1:
             details["Failure Count"] = f"{failure_count} in last hour"
 
+        if not _alert_limiter.acquire(details):
+            logger.warning(f"Task failure alert for {task_name} rate limited")
+            return
+
+        # Format traceback only once the alert is going out
+        tb_str = "".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )
+
         # Send alert
         await telegram_reporter.send_alert(
             title="Background Task Failed",
@@ -214,24 +588,26 @@ async def _report_task_failure(
 
 
 async def _report_slow_task(
-    task_name: str, execution_time: float, args: tuple, kwargs: dict
+    redis_client: Any, task_name: str, elapsed_ns: int, args: tuple, kwargs: dict
 ):
     """Report slow task execution"""
     try:
-        # Use deduplication for slow task alerts
-        redis_client = await get_redis_client()
+        # Use deduplication for slow task alerts, alert once per hour
         slow_key = monitoring_config.get_redis_key("tasks", "slow", task_name)
 
-        # Check if we already sent alert recently
-        last_alert = await redis_client.get(slow_key)
-        if last_alert:
-            return  # Skip if already alerted
+        # This worker already alerted, no need to ask Redis
+        if sent_recently(slow_key, 3600):
+            return
 
-        # Set flag with TTL
-        await redis_client.setex(slow_key, 3600, "1")  # Alert once per hour
+        # Atomic check-and-set across workers: only the first writer alerts.
+        # The key also feeds the slow tasks list in batch alerts.
+        is_first = await redis_client.set(slow_key, "1", ex=3600, nx=True)
+        if not is_first:
+            return  # Skip if already alerted
 
         # Prepare details
-        args_str = str(args)[:100] if args else "None"
+        execution_time = elapsed_ns / 1e9
+        args_str = _args_repr.repr(args)[:100] if args else "None"
         details = {
             "Task": task_name,
             "Execution Time": f"{execution_time:.2f} seconds",
@@ -239,6 +615,10 @@ async def _report_slow_task(
             "Args": args_str,
         }
 
+        if not _alert_limiter.acquire(details):
+            logger.warning(f"Slow task alert for {task_name} rate limited")
+            return
+
         # Send warning alert
         await telegram_reporter.send_alert(
             title="Slow Background Task",
@@ -251,10 +631,9 @@ async def _report_slow_task(
         logger.error(f"Failed to report slow task: {e}")
 
 
-async def _mark_job_completed():
+async def _mark_job_completed(redis_client: Any):
     """Mark that a job was completed for health monitoring"""
     try:
-        redis_client = await get_redis_client()
         key = monitoring_config.get_redis_key("queue", "last_job_completed")
         await redis_client.setex(key, 3600, str(time.time()))
     except Exception as e:
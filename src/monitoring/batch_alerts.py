@@ -3,8 +3,10 @@ Batch alerts for non-critical warnings.
 Sends aggregated reports instead of individual alerts.
 """
 
+import asyncio
+import heapq
 import logging
-import json
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from collections import defaultdict
@@ -12,11 +14,45 @@ from collections import defaultdict
 from app.core.queue.decorators import periodic_task
 from app.core.queue.connection import get_redis_client
 from app.monitoring.config import monitoring_config
+from app.monitoring.middleware import SLOW_SAMPLE_SEPARATOR
 from app.monitoring.telegram import telegram_reporter, AlertLevel
 
 
 logger = logging.getLogger(__name__)
 
+# Rows shown per section of the batch summary
+_SUMMARY_TOP_N = 5
+
+# Reads one SCAN page of failure counters and returns a flat
+# [next_cursor, key, count, key, count, ...] array of the non-zero ones,
+# so each page costs one round-trip instead of a SCAN plus a GET per key.
+# The cursor loop stays on the client, so Redis is never blocked for more
+# than one page. ARGV[1] is the cursor, ARGV[2] the MATCH pattern and
+# ARGV[3] the SCAN COUNT hint. The matched keys can't be declared in KEYS
+# up front, so the script assumes a single (non-cluster) Redis instance.
+_FAILED_TASKS_LUA = """
+local page = redis.call("SCAN", ARGV[1], "MATCH", ARGV[2], "COUNT", ARGV[3])
+local out = {page[1]}
+for _, key in ipairs(page[2]) do
+    local value = tonumber(redis.call("GET", key))
+    if value and value > 0 then
+        out[#out + 1] = key
+        out[#out + 1] = tostring(value)
+    end
+end
+return out
+"""
+
+_failed_tasks_script = None
+
+
+def _get_failed_tasks_script(redis_client):
+    """Register the failure counters script once; it is run via EVALSHA."""
+    global _failed_tasks_script
+    if _failed_tasks_script is None:
+        _failed_tasks_script = redis_client.register_script(_FAILED_TASKS_LUA)
+    return _failed_tasks_script
+
 
 @periodic_task
 async def send_batch_alerts(ctx: dict):
@@ -30,70 +66,108 @@ async def send_batch_alerts(ctx: dict):
     logger.info("Processing batch alerts...")
 
     try:
-        # Collect all batch data
-        slow_requests = await _collect_slow_requests_batch()
-        task_warnings = await _collect_task_warnings_batch()
+        # Collect all batch data, with both collectors reading the buckets
+        # for the same moment
+        now = datetime.utcnow()
+        today = f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+        batch_hour = f"{today}-{now.hour:02d}"
+
+        # The collectors read disjoint keys, so run them concurrently; a
+        # failure in one must not drop the other's data
+        slow_requests, task_warnings = await asyncio.gather(
+            _collect_slow_requests_batch(batch_hour),
+            _collect_task_warnings_batch(today),
+            return_exceptions=True,
+        )
+        if isinstance(slow_requests, Exception):
+            logger.error(f"Failed to collect slow requests batch: {slow_requests}")
+            slow_requests = []
+        if isinstance(task_warnings, Exception):
+            logger.error(f"Failed to collect task warnings: {task_warnings}")
+            task_warnings = {}
 
         # Build and send summary if there's data
         if slow_requests or task_warnings:
             await _send_batch_summary(slow_requests, task_warnings)
 
+        if monitoring_config.BATCH_SUMMARY_COALESCE_MINUTES > 0:
+            await _flush_batch_summaries()
+
     except Exception as e:
         logger.error(f"Failed to process batch alerts: {e}")
 
 
-async def _collect_slow_requests_batch() -> List[Dict[str, Any]]:
-    """Collect slow requests from the current batch"""
+async def _collect_slow_requests_batch(batch_hour: str) -> List[Dict[str, Any]]:
+    """Collect slow requests from the batch for the given UTC hour"""
     try:
         redis_client = await get_redis_client()
 
-        # Get current hour batch
-        batch_key = monitoring_config.get_redis_key(
-            "slow_requests_batch", datetime.utcnow().strftime("%Y-%m-%d-%H")
-        )
-
-        # Get all items from the batch
-        batch_items = await redis_client.lrange(batch_key, 0, -1)  # type: ignore
-
-        # Clear the batch after reading
-        await redis_client.delete(batch_key)
-
-        # Parse and aggregate
-        requests_by_endpoint = defaultdict(list)
-
-        for item in batch_items:
-            try:
-                data = json.loads(item)
-                endpoint = data["path"]
-                requests_by_endpoint[endpoint].append(
-                    {
-                        "time": data["time"],
-                        "user": data["user"],
-                        "timestamp": data["timestamp"],
-                    }
+        agg_key = monitoring_config.get_redis_key("slow_requests_agg", batch_hour)
+
+        # Read and clear the aggregates in one MULTI/EXEC, so requests
+        # recorded in between can't be dropped. UNLINK frees the keys in the
+        # background instead of blocking Redis on large batches.
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hgetall(agg_key)
+        pipe.unlink(agg_key)
+        aggregates, _ = await pipe.execute()
+
+        # Fields are "<endpoint>:count", "<endpoint>:sum" and "<endpoint>:max"
+        stats_by_endpoint = defaultdict(dict)
+        for field, value in aggregates.items():
+            endpoint, _, stat = field.rpartition(":")
+            stats_by_endpoint[endpoint][stat] = float(value)
+
+        # Each endpoint keeps only its 3 slowest samples, so they are
+        # fetched for every endpoint in one more round-trip
+        samples_by_endpoint = {}
+        if stats_by_endpoint:
+            endpoints = list(stats_by_endpoint)
+            samples_keys = [
+                monitoring_config.get_redis_key(
+                    "slow_requests_samples", batch_hour, endpoint
                 )
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.warning(f"Failed to parse batch item: {e}")
+                for endpoint in endpoints
+            ]
+
+            pipe = redis_client.pipeline(transaction=True)
+            for samples_key in samples_keys:
+                pipe.zrevrange(samples_key, 0, 2, withscores=True)
+            pipe.unlink(*samples_keys)
+            *samples_per_key, _ = await pipe.execute()
+
+            for endpoint, samples in zip(endpoints, samples_per_key):
+                endpoint_samples = samples_by_endpoint[endpoint] = []
+                for item, elapsed in samples:
+                    try:
+                        timestamp, user = item.split(SLOW_SAMPLE_SEPARATOR, 1)
+                        endpoint_samples.append(
+                            {
+                                "time": elapsed,
+                                "user": user,
+                                "timestamp": float(timestamp),
+                            }
+                        )
+                    except ValueError as e:
+                        logger.warning(f"Failed to parse batch item: {e}")
 
         # Format for return
         result = []
-        for endpoint, requests in requests_by_endpoint.items():
-            # Sort by time (slowest first)
-            requests.sort(key=lambda x: x["time"], reverse=True)
+        for endpoint, stats in stats_by_endpoint.items():
+            count = int(stats.get("count", 0))
+            if not count:
+                continue
 
             result.append(
                 {
                     "endpoint": endpoint,
-                    "count": len(requests),
-                    "max_time": max(r["time"] for r in requests),
-                    "avg_time": sum(r["time"] for r in requests) / len(requests),
-                    "samples": requests[:3],  # Top 3 slowest
+                    "count": count,
+                    "max_time": stats.get("max", 0.0),
+                    "avg_time": stats.get("sum", 0.0) / count,
+                    "samples": samples_by_endpoint.get(endpoint, []),
                 }
             )
 
-        # Sort by count
-        result.sort(key=lambda x: x["count"], reverse=True)
-
         return result
 
     except Exception as e:
@@ -101,49 +175,52 @@ async def _collect_slow_requests_batch() -> List[Dict[str, Any]]:
         return []
 
 
-async def _collect_task_warnings_batch() -> Dict[str, Any]:
-    """Collect task-related warnings from the batch period"""
+async def _collect_task_warnings_batch(today: str) -> Dict[str, Any]:
+    """Collect task-related warnings for the given UTC day"""
     try:
         redis_client = await get_redis_client()
-        today = datetime.utcnow().strftime("%Y-%m-%d")
 
-        # Collect failed tasks
-        failed_tasks = {}
         failure_pattern = monitoring_config.get_redis_key(
             "stats", today, "tasks:failure:*"
         )
+        slow_pattern = monitoring_config.get_redis_key("tasks", "slow", "*")
+        scan_count = monitoring_config.REDIS_SCAN_COUNT
+
+        async def _scan_failed() -> Dict[str, int]:
+            script = _get_failed_tasks_script(redis_client)
+            failed_tasks = {}
+            cursor = 0
+            while True:
+                cursor, *flat = await script(
+                    args=[cursor, failure_pattern, scan_count], client=redis_client
+                )
 
-        cursor = 0
-        while True:
-            cursor, keys = await redis_client.scan(
-                cursor, match=failure_pattern, count=100
-            )
+                for key, count in zip(flat[::2], flat[1::2]):
+                    failed_tasks[key.split(":")[-1]] = int(count)
 
-            for key in keys:
-                task_name = key.split(":")[-1]
-                count = await redis_client.get(key)
-                if count and int(count) > 0:
-                    failed_tasks[task_name] = int(count)
+                if int(cursor) == 0:
+                    break
 
-            if cursor == 0:
-                break
+            return failed_tasks
 
-        # Collect slow tasks
-        slow_tasks = {}
-        slow_pattern = monitoring_config.get_redis_key("tasks", "slow", "*")
+        async def _scan_slow() -> Dict[str, bool]:
+            slow_tasks = {}
+            cursor = 0
+            while True:
+                cursor, keys = await redis_client.scan(
+                    cursor, match=slow_pattern, count=scan_count
+                )
 
-        cursor = 0
-        while True:
-            cursor, keys = await redis_client.scan(
-                cursor, match=slow_pattern, count=100
-            )
+                for key in keys:
+                    slow_tasks[key.split(":")[-1]] = True  # Just mark as slow
 
-            for key in keys:
-                task_name = key.split(":")[-1]
-                slow_tasks[task_name] = True  # Just mark as slow
+                if cursor == 0:
+                    break
 
-            if cursor == 0:
-                break
+            return slow_tasks
+
+        # Both scans are independent, so their round-trips can overlap
+        failed_tasks, slow_tasks = await asyncio.gather(_scan_failed(), _scan_slow())
 
         return {"failed": failed_tasks, "slow": list(slow_tasks.keys())}
 
@@ -157,17 +234,20 @@ async def _send_batch_summary(
 ):
     """Send aggregated summary of warnings"""
 
-    if (
-        not slow_requests
-        and not task_warnings.get("failed")
-        and not task_warnings.get("slow")
-    ):
+    failed_tasks = task_warnings.get("failed") or {}
+    slow_tasks = task_warnings.get("slow") or []
+
+    if not slow_requests and not failed_tasks and not slow_tasks:
         logger.debug("No issues to report in batch summary, skipping")
         return
 
     try:
+        # Sample ages are relative to a single reading of the clock; samples
+        # carry time.time() epoch seconds
+        now_ts = time.time()
+
         lines = [
-            f"⚠️ *Batch Alert Summary*",
+            "⚠️ *Batch Alert Summary*",
             f"_{monitoring_config.MONITORING_ENV.upper()}_",
             f"_Period: Last {monitoring_config.BATCH_WINDOW_MINUTES} minutes_",
             "",
@@ -177,7 +257,11 @@ async def _send_batch_summary(
         if slow_requests:
             lines.append("*🐌 Slow Requests:*")
 
-            for req in slow_requests[:5]:  # Top 5 endpoints
+            # Only the top endpoints are shown, however many were collected
+            top_requests = heapq.nlargest(
+                _SUMMARY_TOP_N, slow_requests, key=lambda x: x["count"]
+            )
+            for req in top_requests:
                 lines.append(
                     f"• `{req['endpoint']}`: {req['count']} requests, "
                     f"max {req['max_time']:.1f}s, avg {req['avg_time']:.1f}s"
@@ -185,48 +269,47 @@ async def _send_batch_summary(
 
                 # Show samples
                 for sample in req["samples"]:
-                    time_ago = int(
-                        (datetime.utcnow().timestamp() - sample["timestamp"]) / 60
-                    )
+                    time_ago = int((now_ts - sample["timestamp"]) / 60)
                     lines.append(
                         f"  - {sample['time']:.1f}s by {sample['user']} "
                         f"({time_ago}m ago)"
                     )
 
-            if len(slow_requests) > 5:
-                lines.append(f"  _...and {len(slow_requests) - 5} more endpoints_")
+            more_endpoints = len(slow_requests) - _SUMMARY_TOP_N
+            if more_endpoints > 0:
+                lines.append(f"  _...and {more_endpoints} more endpoints_")
 
             lines.append("")
 
         # Task warnings section
-        if task_warnings.get("failed"):
+        if failed_tasks:
             lines.append("*❌ Failed Tasks:*")
 
-            for task_name, count in sorted(
-                task_warnings["failed"].items(), key=lambda x: x[1], reverse=True
-            )[:5]:
+            for task_name, count in heapq.nlargest(
+                _SUMMARY_TOP_N, failed_tasks.items(), key=lambda x: x[1]
+            ):
                 lines.append(f"• `{task_name}`: {count} failures")
 
-            if len(task_warnings["failed"]) > 5:
-                lines.append(
-                    f"  _...and {len(task_warnings['failed']) - 5} more tasks_"
-                )
+            more_failed = len(failed_tasks) - _SUMMARY_TOP_N
+            if more_failed > 0:
+                lines.append(f"  _...and {more_failed} more tasks_")
 
             lines.append("")
 
-        if task_warnings.get("slow"):
+        if slow_tasks:
             lines.append("*⏱️ Slow Tasks:*")
 
-            for task_name in task_warnings["slow"][:5]:
+            for task_name in slow_tasks[:_SUMMARY_TOP_N]:
                 lines.append(f"• `{task_name}`")
 
-            if len(task_warnings["slow"]) > 5:
-                lines.append(f"  _...and {len(task_warnings['slow']) - 5} more tasks_")
+            more_slow = len(slow_tasks) - _SUMMARY_TOP_N
+            if more_slow > 0:
+                lines.append(f"  _...and {more_slow} more tasks_")
 
             lines.append("")
 
         # Add summary stats
-        total_issues = len(slow_requests) + len(task_warnings.get("failed", {}))
+        total_issues = len(slow_requests) + len(failed_tasks)
         if total_issues > 0:
             lines.append(f"*Total Issues:* {total_issues}")
             lines.append(
@@ -234,16 +317,100 @@ async def _send_batch_summary(
                 f"Slow tasks >{monitoring_config.ARQ_TASK_SLOW_THRESHOLD_SECONDS}s_"
             )
 
-        # Send the summary
+        # Send the summary, or leave it for the next coalesced flush
         full_text = "\n".join(lines)
 
-        await telegram_reporter.send_message(
-            text=full_text,
-            level=AlertLevel.WARNING,
-            disable_notification=True,  # Don't buzz for batch alerts
-        )
+        if monitoring_config.BATCH_SUMMARY_COALESCE_MINUTES > 0:
+            await _queue_batch_summary(full_text)
+            logger.info(f"Batch alert queued with {total_issues} issues")
+            return
+
+        await _send_summary_text(full_text)
 
         logger.info(f"Batch alert sent with {total_issues} issues")
 
     except Exception as e:
         logger.error(f"Failed to send batch summary: {e}")
+
+
+async def _send_summary_text(text: str):
+    """Send a summary message to Telegram"""
+    await telegram_reporter.send_message(
+        text=text,
+        level=AlertLevel.WARNING,
+        disable_notification=True,  # Don't buzz for batch alerts
+    )
+
+
+async def _queue_batch_summary(text: str):
+    """Add a composed summary to the pending buffer"""
+    redis_client = await get_redis_client()
+    pending_key = monitoring_config.get_redis_key("batch_summaries", "pending")
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.rpush(pending_key, text)
+    pipe.expire(pending_key, 86400)
+    await pipe.execute()
+
+
+def _coalesce_summaries(summaries: List[str], max_length: int) -> List[str]:
+    """
+    Join summaries into as few messages as fit within max_length.
+
+    A summary longer than max_length goes out on its own and is truncated
+    by the reporter.
+    """
+    messages = []
+    current = ""
+    for text in summaries:
+        if current and len(current) + 2 + len(text) > max_length:
+            messages.append(current)
+            current = text
+        else:
+            current = f"{current}\n\n{text}" if current else text
+    if current:
+        messages.append(current)
+    return messages
+
+
+async def _flush_batch_summaries():
+    """
+    Send buffered summaries, at most once per BATCH_SUMMARY_COALESCE_MINUTES.
+
+    The flush lock doubles as the coalescing window: while it is held, new
+    summaries keep accumulating in the pending list.
+    """
+    try:
+        redis_client = await get_redis_client()
+        pending_key = monitoring_config.get_redis_key("batch_summaries", "pending")
+
+        if not await redis_client.llen(pending_key):
+            return
+
+        lock_key = monitoring_config.get_redis_key("batch_summaries", "flush_lock")
+        acquired = await redis_client.set(
+            lock_key,
+            "1",
+            ex=monitoring_config.BATCH_SUMMARY_COALESCE_MINUTES * 60,
+            nx=True,
+        )
+        if not acquired:
+            return  # Flushed recently, keep collecting
+
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.lrange(pending_key, 0, -1)
+        pipe.unlink(pending_key)
+        summaries, _ = await pipe.execute()
+
+        messages = _coalesce_summaries(
+            summaries, monitoring_config.ALERT_MAX_MESSAGE_LENGTH
+        )
+        for text in messages:
+            await _send_summary_text(text)
+
+        logger.info(
+            f"Flushed {len(summaries)} batch summaries in {len(messages)} messages"
+        )
+
+    except Exception as e:
+        logger.error(f"Failed to flush batch summaries: {e}")
@@ -3,8 +3,10 @@ Monitoring module configuration.
 Centralized settings for all monitoring components.
 """
 
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
 from pydantic_settings import BaseSettings
 from enum import Enum
 
@@ -19,6 +21,24 @@ class AlertLevel(str, Enum):
     INFO = "info"  # Daily digest
 
 
+@lru_cache(maxsize=1024)
+def _build_redis_key(prefix: str, parts: Tuple[str, ...]) -> str:
+    """Join key parts; most keys repeat for a whole day or hour"""
+    return f"{prefix}:{':'.join(parts)}"
+
+
+# Fields the cached derived values below are computed from
+_DERIVED_FROM_FIELDS = frozenset(
+    (
+        "MONITORING_ENABLED",
+        "MONITORING_ENV",
+        "TELEGRAM_BOT_TOKEN",
+        "TELEGRAM_CHAT_ID",
+        "IGNORED_PATHS",
+    )
+)
+
+
 class MonitoringConfig(BaseSettings):
     """Main monitoring configuration"""
 
@@ -57,6 +77,14 @@ class MonitoringConfig(BaseSettings):
         default=4000, description="Maximum Telegram message length"
     )
 
+    ALERT_QUEUE_SIZE: int = Field(
+        default=1024, description="Pending request alerts kept before dropping new ones"
+    )
+
+    ALERT_WORKERS: int = Field(
+        default=4, description="Concurrent senders draining the request alert queue"
+    )
+
     # Health check settings
     HEALTH_CHECK_INTERVAL_MINUTES: int = Field(
         default=5, description="Interval for health checks"
@@ -145,6 +173,35 @@ class MonitoringConfig(BaseSettings):
         default=60.0, description="Threshold for slow background task alerts"
     )
 
+    ARQ_STATS_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=0,
+        description=(
+            "Aggregate task stats in-process and flush them to Redis every N "
+            "seconds (0 writes stats after every task)"
+        ),
+    )
+
+    ARQ_STATS_FLUSH_MAX_EVENTS: int = Field(
+        default=1000, description="Flush aggregated task stats after this many events"
+    )
+
+    ARQ_MONITOR_MAX_JOBS: int = Field(
+        default=100,
+        description="Maximum in-flight background stats and alert jobs per worker",
+    )
+
+    ARQ_ALERTS_PER_MINUTE: int = Field(
+        default=20, description="Sustained rate of task alerts sent to Telegram"
+    )
+
+    ARQ_ALERT_BURST: int = Field(
+        default=5, description="Task alerts allowed in a burst before rate limiting"
+    )
+
+    ARQ_SYNC_TASK_WORKERS: int = Field(
+        default=4, description="Thread pool size for synchronous ARQ tasks"
+    )
+
     ARQ_IGNORED_TASKS: List[str] = Field(
         default=[
             "mark_job_completed",
@@ -159,6 +216,14 @@ class MonitoringConfig(BaseSettings):
 
     BATCH_MAX_ALERTS: int = Field(default=10, description="Maximum alerts in one batch")
 
+    BATCH_SUMMARY_COALESCE_MINUTES: int = Field(
+        default=0,
+        description=(
+            "Buffer batch summaries in Redis and send them as one message at most "
+            "once per this many minutes (0 sends every summary right away)"
+        ),
+    )
+
     # Redis keys configuration
     REDIS_KEY_PREFIX: str = Field(
         default="monitoring", description="Prefix for monitoring Redis keys"
@@ -168,21 +233,51 @@ class MonitoringConfig(BaseSettings):
         default=24, description="TTL for monitoring data in Redis"
     )
 
+    REDIS_SCAN_COUNT: int = Field(
+        default=1024,
+        description=(
+            "COUNT hint for SCAN over monitoring keys; higher values mean fewer "
+            "round-trips at the cost of more Redis work per SCAN call"
+        ),
+    )
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "ignore"}
 
+    # Derived values read on every request, computed once from the fields
+    _is_production: bool = PrivateAttr(default=False)
+    _is_enabled: bool = PrivateAttr(default=False)
+    _ignored_path_prefixes: Tuple[str, ...] = PrivateAttr(default=())
+
+    def model_post_init(self, __context: Any) -> None:
+        self._refresh_derived()
+
+    # The shared singleton is a frozen snapshot, but MonitoringConfig itself
+    # stays a mutable settings model, so assigning a field must not leave
+    # the cached values stale
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in _DERIVED_FROM_FIELDS:
+            self._refresh_derived()
+
+    def _refresh_derived(self) -> None:
+        """Recompute cached values after the fields they depend on change"""
+        self._is_production = self.MONITORING_ENV.lower() in ("production", "prod")
+        self._is_enabled = bool(
+            self.MONITORING_ENABLED
+            and self.TELEGRAM_BOT_TOKEN is not None
+            and self.TELEGRAM_CHAT_ID is not None
+        )
+        self._ignored_path_prefixes = tuple(self.IGNORED_PATHS)
+
     @property
     def is_production(self) -> bool:
         """Check if running in production"""
-        return self.MONITORING_ENV.lower() in ["production", "prod"]
+        return self._is_production
 
     @property
     def is_enabled(self) -> bool:
         """Check if monitoring is fully configured and enabled"""
-        return (
-            self.MONITORING_ENABLED
-            and self.TELEGRAM_BOT_TOKEN is not None
-            and self.TELEGRAM_CHAT_ID is not None
-        )
+        return self._is_enabled
 
     def should_monitor_exception(self, exception_type: str) -> bool:
         """Check if exception type should be monitored"""
@@ -190,14 +285,11 @@ class MonitoringConfig(BaseSettings):
 
     def should_monitor_path(self, path: str) -> bool:
         """Check if path should be monitored"""
-        for ignored in self.IGNORED_PATHS:
-            if path.startswith(ignored):
-                return False
-        return True
+        return not path.startswith(self._ignored_path_prefixes)
 
     def get_redis_key(self, *parts: str) -> str:
         """Generate Redis key with prefix"""
-        return f"{self.REDIS_KEY_PREFIX}:{':'.join(parts)}"
+        return _build_redis_key(self.REDIS_KEY_PREFIX, parts)
 
 
 class HealthCheckConfig(BaseModel):
@@ -238,8 +330,104 @@ class MetricsConfig(BaseModel):
         extra = "forbid"
 
 
+@dataclass(frozen=True, slots=True)
+class MonitoringConfigSnapshot:
+    """
+    Read-only copy of MonitoringConfig built by freeze_monitoring_config.
+
+    Fields mirror MonitoringConfig, with list settings stored as tuples and
+    the derived properties stored as plain values.
+    """
+
+    MONITORING_ENABLED: bool
+    MONITORING_ENV: str
+
+    TELEGRAM_BOT_TOKEN: Optional[str]
+    TELEGRAM_CHAT_ID: Optional[str]
+    TELEGRAM_THREAD_ID: Optional[int]
+
+    ALERT_RATE_LIMIT_MINUTES: int
+    ALERT_MAX_TRACEBACK_LINES: int
+    ALERT_MAX_MESSAGE_LENGTH: int
+    ALERT_QUEUE_SIZE: int
+    ALERT_WORKERS: int
+
+    HEALTH_CHECK_INTERVAL_MINUTES: int
+    HEALTH_DB_TIMEOUT_SECONDS: int
+    HEALTH_REDIS_TIMEOUT_SECONDS: int
+    HEALTH_DISK_CRITICAL_PERCENT: int
+    HEALTH_DISK_WARNING_PERCENT: int
+    HEALTH_MEMORY_CRITICAL_PERCENT: int
+    HEALTH_QUEUE_STUCK_MINUTES: int
+
+    DAILY_REPORT_ENABLED: bool
+    DAILY_REPORT_HOUR: int
+    DAILY_REPORT_MINUTE: int
+
+    MONITOR_EXCEPTIONS: bool
+    IGNORED_EXCEPTIONS: Tuple[str, ...]
+    IGNORED_PATHS: Tuple[str, ...]
+
+    SLOW_REQUEST_THRESHOLD_SECONDS: float
+    MONITOR_SLOW_REQUESTS: bool
+    SLOW_REQUESTS_BATCH_MINUTES: int
+
+    MONITOR_ARQ_TASKS: bool
+    ARQ_TASK_FAILURE_ALERT: bool
+    ARQ_TASK_SLOW_THRESHOLD_SECONDS: float
+    ARQ_STATS_FLUSH_INTERVAL_SECONDS: float
+    ARQ_STATS_FLUSH_MAX_EVENTS: int
+    ARQ_MONITOR_MAX_JOBS: int
+    ARQ_ALERTS_PER_MINUTE: int
+    ARQ_ALERT_BURST: int
+    ARQ_SYNC_TASK_WORKERS: int
+    ARQ_IGNORED_TASKS: Tuple[str, ...]
+
+    BATCH_WINDOW_MINUTES: int
+    BATCH_MAX_ALERTS: int
+    BATCH_SUMMARY_COALESCE_MINUTES: int
+
+    REDIS_KEY_PREFIX: str
+    REDIS_KEY_TTL_HOURS: int
+    REDIS_SCAN_COUNT: int
+
+    is_production: bool
+    is_enabled: bool
+    _ignored_path_prefixes: Tuple[str, ...]
+
+    should_monitor_exception = MonitoringConfig.should_monitor_exception
+    should_monitor_path = MonitoringConfig.should_monitor_path
+    get_redis_key = MonitoringConfig.get_redis_key
+
+
+def freeze_monitoring_config(config: MonitoringConfig) -> MonitoringConfigSnapshot:
+    """
+    Snapshot a loaded config into a frozen, slotted dataclass.
+
+    Settings are read on every request and task; slot loads skip the
+    pydantic attribute machinery. Helper methods are shared with
+    MonitoringConfig.
+
+    Args:
+        config: Loaded and validated configuration
+
+    Returns:
+        Read-only snapshot with the same attributes and helpers
+    """
+    values = {
+        name: tuple(value) if isinstance(value, list) else value
+        for name, value in config.model_dump().items()
+    }
+    return MonitoringConfigSnapshot(
+        **values,
+        is_production=config.is_production,
+        is_enabled=config.is_enabled,
+        _ignored_path_prefixes=config._ignored_path_prefixes,
+    )
+
+
 # Singleton instances
-monitoring_config = MonitoringConfig()
+monitoring_config = freeze_monitoring_config(MonitoringConfig())
 health_config = HealthCheckConfig()
 metrics_config = MetricsConfig()
 
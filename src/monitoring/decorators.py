@@ -1,7 +1,32 @@
+import time
 import functools
-from typing import Optional, Callable
+from typing import Dict, Optional, Callable
 from app.core.queue.connection import get_redis_client
 
+# Keys this process marked recently: key -> monotonic expiry time.
+# Lets repeat calls within the TTL skip the Redis round-trip.
+_local_dedup: Dict[str, float] = {}
+
+
+def sent_recently(key: str, ttl: int) -> bool:
+    """
+    Check-and-set an in-process dedup flag for `ttl` seconds.
+
+    Returns True if this process already marked `key` within its TTL,
+    otherwise marks it and returns False.
+    """
+    now = time.monotonic()
+    if _local_dedup.get(key, 0) > now:
+        return True
+
+    # Clean expired entries (simple cleanup)
+    if len(_local_dedup) > 1024:
+        for stale_key in [k for k, v in _local_dedup.items() if v <= now]:
+            del _local_dedup[stale_key]
+
+    _local_dedup[key] = now + ttl
+    return False
+
 
 def deduplicated(key: str, ttl: int = 60, prefix: str = "monitoring:dedup") -> Callable:
     """
@@ -12,9 +37,13 @@ def deduplicated(key: str, ttl: int = 60, prefix: str = "monitoring:dedup") -> C
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
+            dedup_key = f"{prefix}:{key}"
+
+            if sent_recently(dedup_key, ttl):
+                return None  # Already executed by this process
+
             try:
                 redis = await get_redis_client()
-                dedup_key = f"{prefix}:{key}"
 
                 # Atomic check-and-set
                 is_first = await redis.set(dedup_key, "1", ex=ttl, nx=True)
@@ -4,16 +4,18 @@ Catches and reports unhandled exceptions to Telegram.
 """
 
 import time
+import asyncio
 import hashlib
 import traceback
 import logging
-from typing import Dict, Optional, Any
+import functools
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 from fastapi import Request, Response, HTTPException
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.monitoring.config import monitoring_config, AlertLevel
 from app.monitoring.telegram import telegram_reporter
@@ -22,6 +24,135 @@ from app.core.queue.connection import get_redis_client
 
 logger = logging.getLogger(__name__)
 
+# Fingerprints are only dedup keys, so a fast non-cryptographic hash
+# is enough; blake2b is the stdlib fallback when xxhash is not installed
+try:
+    from xxhash import xxh3_64 as _fingerprint_hash
+except ImportError:
+    _fingerprint_hash = functools.partial(hashlib.blake2b, digest_size=16)
+
+# Maximum paths remembered by the middleware's path filter cache
+_FILTER_CACHE_SIZE = 8192
+
+# ASCII unit separator between the fields of a slow request sample
+SLOW_SAMPLE_SEPARATOR = "\x1f"
+
+# HSET the field only if the new value is larger, keeping a running max
+_HSET_MAX_LUA = (
+    "local v = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0') "
+    "if v < tonumber(ARGV[2]) then redis.call('HSET', KEYS[1], ARGV[1], ARGV[2]) end"
+)
+
+_hset_max_script = None
+
+
+def _get_hset_max_script(redis_client):
+    """Register the running max script once; it is run via EVALSHA."""
+    global _hset_max_script
+    if _hset_max_script is None:
+        _hset_max_script = redis_client.register_script(_HSET_MAX_LUA)
+    return _hset_max_script
+
+
+def _format_traceback(exception: BaseException) -> str:
+    """
+    Format an exception's traceback from the exception itself.
+
+    Unlike traceback.format_exc(), this doesn't depend on being called
+    while the exception is being handled.
+    """
+    return "".join(
+        traceback.format_exception(type(exception), exception, exception.__traceback__)
+    )
+
+
+class AlertQueue:
+    """
+    Sends request alerts to Telegram from a fixed pool of workers.
+
+    Reporting code queues the alert coroutine and returns immediately. The
+    queue is bounded, so an error storm costs constant memory and at most
+    ALERT_WORKERS concurrent Telegram calls; alerts past ALERT_QUEUE_SIZE
+    are dropped and counted instead of piling up.
+
+    Workers start with the first alert. setup_monitoring stops the queue
+    on application shutdown, so queued alerts are still sent; apps that
+    don't use it must call:
+
+        await alert_queue.stop()
+    """
+
+    def __init__(self, maxsize: int, workers: int):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Create the queue and start the workers on the running loop"""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, coro: Coroutine[Any, Any, Any]):
+        """
+        Queue an alert coroutine without blocking.
+
+        Args:
+            coro: Alert coroutine, closed unawaited if the queue is full
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(coro)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Alert queue is full, dropped {self.dropped} alerts")
+            coro.close()
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Send queued alerts and stop the workers.
+
+        Args:
+            timeout: Seconds to wait for the queue to drain
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Alert queue stopped with {self._queue.qsize()} alerts unsent"
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            coro = await self._queue.get()
+            try:
+                await coro
+            except Exception as e:
+                logger.error(f"Failed to send alert: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# Singleton instance
+alert_queue = AlertQueue(
+    maxsize=monitoring_config.ALERT_QUEUE_SIZE,
+    workers=monitoring_config.ALERT_WORKERS,
+)
+
 
 class ErrorDeduplicator:
     """
@@ -30,25 +161,63 @@ class ErrorDeduplicator:
     """
 
     def __init__(self):
-        self.local_cache: Dict[str, float] = {}  # Fallback for Redis failure
+        # Last alert time per fingerprint seen by this worker; checked before
+        # Redis and used alone when Redis is unavailable
+        self.local_cache: OrderedDict[str, float] = OrderedDict()
         self.rate_limit_minutes = monitoring_config.ALERT_RATE_LIMIT_MINUTES
 
+        # Fingerprints are unbounded, so their keys are built from a fixed
+        # prefix instead of going through the shared get_redis_key cache
+        self._error_key_prefix = monitoring_config.get_redis_key("error", "")
+
+        # Daily stat keys, rebuilt when the UTC day changes
+        self._key_cache: Dict[Tuple[str, Any], str] = {}
+        self._key_cache_day = -1
+        self._today = ""
+
+    def stat_key(self, stat: str, value: Any = None) -> str:
+        """
+        Get today's stats key, e.g. stats:<day>:errors:type:ValueError.
+
+        Args:
+            stat: Stat name, e.g. 'errors:type'
+            value: Optional last key component
+
+        Returns:
+            Redis key for the current UTC day
+        """
+        day = int(time.time()) // 86400
+        if day != self._key_cache_day:
+            self._key_cache_day = day
+            self._today = time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+            self._key_cache.clear()
+
+        key = self._key_cache.get((stat, value))
+        if key is None:
+            if len(self._key_cache) > 4096:
+                self._key_cache.clear()
+            suffix = stat if value is None else f"{stat}:{value}"
+            key = monitoring_config.get_redis_key("stats", self._today, suffix)
+            self._key_cache[(stat, value)] = key
+        return key
+
     def generate_fingerprint(self, path: str, method: str, exception: Exception) -> str:
         """Generate unique fingerprint for error"""
-        # Get first line of exception message
-        error_msg = str(exception).split("\n")[0] if str(exception) else ""
+        # First 100 chars of the message's first line; cut before searching
+        # for the newline so huge messages aren't split line by line
+        error_msg = str(exception)[:100].partition("\n")[0]
 
         # Create fingerprint from key components
         key_parts = [
             path,
             method,
             type(exception).__name__,
-            error_msg[:100],  # First 100 chars of error message
+            error_msg,
         ]
 
         # Create hash for consistent key
         key_str = "|".join(key_parts)
-        return hashlib.md5(key_str.encode()).hexdigest()
+        return _fingerprint_hash(key_str.encode()).hexdigest()
 
     async def should_send_alert(self, fingerprint: str) -> bool:
         """
@@ -58,29 +227,38 @@ class ErrorDeduplicator:
             True if alert should be sent, False if rate limited
         """
         current_time = time.time()
+        rate_limit_seconds = self.rate_limit_minutes * 60
+
+        # Already alerted from this worker within the window: skip Redis
+        last_sent_time = self.local_cache.get(fingerprint)
+        if (
+            last_sent_time is not None
+            and current_time - last_sent_time < rate_limit_seconds
+        ):
+            return False
 
         try:
             # Try Redis first
             redis_client = await get_redis_client()
-            redis_key = monitoring_config.get_redis_key("error", fingerprint)
-
-            # Check if key exists
-            last_sent = await redis_client.get(redis_key)
-
-            if last_sent:
-                last_sent_time = float(last_sent)
-                time_diff = current_time - last_sent_time
-
-                if time_diff < (self.rate_limit_minutes * 60):
-                    logger.debug(
-                        f"Error {fingerprint} rate limited, last sent {time_diff:.1f}s ago"
-                    )
-                    return False
-
-            # Set new timestamp with TTL
-            ttl = self.rate_limit_minutes * 60 * 2  # Double the rate limit for TTL
-            await redis_client.setex(redis_key, ttl, str(current_time))
+            redis_key = self._error_key_prefix + fingerprint
+
+            # Claim the alert for this window; the key lives exactly as long
+            # as the window, and PTTL tells when the current holder sent it
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.set(redis_key, str(current_time), ex=rate_limit_seconds, nx=True)
+            pipe.pttl(redis_key)
+            claimed, ttl_ms = await pipe.execute()
+
+            if not claimed:
+                time_diff = rate_limit_seconds - max(ttl_ms, 0) / 1000
+                logger.debug(
+                    f"Error {fingerprint} rate limited, last sent {time_diff:.1f}s ago"
+                )
+                # Another worker alerted; remember it for the rest of the window
+                self._remember_sent(fingerprint, current_time - time_diff, current_time)
+                return False
 
+            self._remember_sent(fingerprint, current_time, current_time)
             return True
 
         except Exception as e:
@@ -88,121 +266,110 @@ class ErrorDeduplicator:
                 f"Redis unavailable for deduplication: {e}, using local cache"
             )
 
-            # Fallback to local cache
-            if fingerprint in self.local_cache:
-                last_sent_time = self.local_cache[fingerprint]
-                time_diff = current_time - last_sent_time
-
-                if time_diff < (self.rate_limit_minutes * 60):
-                    return False
+            # Fallback to local cache, already checked above
+            self._remember_sent(fingerprint, current_time, current_time)
+            return True
 
-            self.local_cache[fingerprint] = current_time
+    def _remember_sent(self, fingerprint: str, sent_time: float, current_time: float):
+        """Record when an alert for this fingerprint was last sent"""
+        self.local_cache[fingerprint] = sent_time
+        self.local_cache.move_to_end(fingerprint)
 
-            # Clean old entries from local cache (simple cleanup)
-            if len(self.local_cache) > 1000:
-                cutoff_time = current_time - (self.rate_limit_minutes * 60)
-                self.local_cache = {
-                    k: v for k, v in self.local_cache.items() if v > cutoff_time
-                }
-
-            return True
+        # Entries are kept in insertion order, so expired ones are at the
+        # front; drop them there instead of rebuilding the whole dict
+        cutoff_time = current_time - (self.rate_limit_minutes * 60)
+        while self.local_cache:
+            oldest = next(iter(self.local_cache))
+            if self.local_cache[oldest] > cutoff_time:
+                break
+            del self.local_cache[oldest]
 
     async def record_error(self, path: str, status_code: int, exception_type: str):
         """Record error for statistics"""
         try:
             redis_client = await get_redis_client()
 
-            # Increment daily error counter
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-
-            # Total errors
-            total_key = monitoring_config.get_redis_key("stats", today, "errors:total")
-            await redis_client.incr(total_key)
-            await redis_client.expire(total_key, 86400 * 7)  # Keep for 7 days
-
-            # Errors by type
-            type_key = monitoring_config.get_redis_key(
-                "stats", today, f"errors:type:{exception_type}"
+            # Daily counters: total, by type, by endpoint and by status code
+            keys = (
+                self.stat_key("errors:total"),
+                self.stat_key("errors:type", exception_type),
+                self.stat_key("errors:endpoint", path),
+                self.stat_key("errors:status", status_code),
             )
-            await redis_client.incr(type_key)
-            await redis_client.expire(type_key, 86400 * 7)
 
-            # Errors by endpoint
-            endpoint_key = monitoring_config.get_redis_key(
-                "stats", today, f"errors:endpoint:{path}"
-            )
-            await redis_client.incr(endpoint_key)
-            await redis_client.expire(endpoint_key, 86400 * 7)
-
-            # Errors by status code
-            status_key = monitoring_config.get_redis_key(
-                "stats", today, f"errors:status:{status_code}"
-            )
-            await redis_client.incr(status_key)
-            await redis_client.expire(status_key, 86400 * 7)
+            # All counters go out in one round-trip
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.incr(key)
+                pipe.expire(key, 86400 * 7)  # Keep for 7 days
+            await pipe.execute()
 
         except Exception as e:
             logger.error(f"Failed to record error statistics: {e}")
 
 
-class MonitoringMiddleware(BaseHTTPMiddleware):
+class MonitoringMiddleware:
     """
     Middleware for monitoring exceptions and performance.
+
+    Implemented as plain ASGI middleware: it only observes requests, so it
+    wraps the downstream app directly instead of paying for
+    BaseHTTPMiddleware's per-request task and memory stream.
     """
 
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
         self.deduplicator = ErrorDeduplicator()
         self.enabled = monitoring_config.is_enabled
+        self.monitor_slow_requests = monitoring_config.MONITOR_SLOW_REQUESTS
+        self.slow_request_threshold = monitoring_config.SLOW_REQUEST_THRESHOLD_SECONDS
+        self._slow_key_prefix = monitoring_config.get_redis_key("slow_requests", "")
+
+        # Path and exception type filter decisions, keyed by the raw value
+        self._path_cache: Dict[str, bool] = {}
+        self._exception_cache: Dict[str, bool] = {}
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
         Process request and catch exceptions.
         """
-        # Skip monitoring if disabled
-        if not self.enabled:
-            return await call_next(request)
+        # Skip monitoring if disabled or not an HTTP request
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
         # Skip ignored paths
-        if not monitoring_config.should_monitor_path(request.url.path):
-            return await call_next(request)
-
-        # Track request timing
-        start_time = time.time()
+        if not self._should_monitor_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
 
-        # Store request info for error reporting
-        request_info = {
-            "path": request.url.path,
-            "method": request.method,
-            "query": str(request.url.query) if request.url.query else None,
-            "headers": dict(request.headers) if request.headers else {},
-        }
+        # Track request timing, only needed for slow request reports
+        if self.monitor_slow_requests:
+            start_time = time.monotonic()
+        response_started = False
 
-        # Get user info if available
-        user_info = None
-        if hasattr(request.state, "user"):
-            user_info = {
-                "id": str(getattr(request.state.user, "id", "unknown")),
-                "email": getattr(request.state.user, "email", None),
-            }
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
         try:
             # Process request
-            response = await call_next(request)
-
-            # Track slow requests (Phase 2)
-            if monitoring_config.MONITOR_SLOW_REQUESTS:
-                elapsed = time.time() - start_time
-                if elapsed > monitoring_config.SLOW_REQUEST_THRESHOLD_SECONDS:
-                    await self._report_slow_request(request_info, elapsed, user_info)
-
-            return response
+            await self.app(scope, receive, send_wrapper)
 
         except HTTPException as e:
             # HTTPExceptions are usually handled properly
             # Only report 500+ errors
             if e.status_code >= 500:
-                await self._handle_exception(e, request_info, user_info, e.status_code)
+                request = Request(scope)
+                await self._handle_exception(
+                    e,
+                    self._get_request_info(request),
+                    self._get_user_info(request),
+                    e.status_code,
+                    _format_traceback(e),
+                )
             raise
 
         except Exception as e:
@@ -210,10 +377,13 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
             exception_type = type(e).__name__
 
             # Check if we should monitor this exception
-            if not monitoring_config.should_monitor_exception(exception_type):
+            if not self._should_monitor_exception(exception_type):
                 logger.debug(f"Ignoring exception type: {exception_type}")
                 raise
 
+            request = Request(scope)
+            request_info = self._get_request_info(request)
+
             # Generate fingerprint for deduplication
             fingerprint = self.deduplicator.generate_fingerprint(
                 request_info["path"], request_info["method"], e
@@ -222,19 +392,88 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
             # Check rate limiting
             should_alert = await self.deduplicator.should_send_alert(fingerprint)
 
+            # Format the traceback only for alerts that actually go out
             if should_alert:
-                await self._handle_exception(e, request_info, user_info, 500)
+                await self._handle_exception(
+                    e,
+                    request_info,
+                    self._get_user_info(request),
+                    500,
+                    _format_traceback(e),
+                )
 
             # Record for statistics
             await self.deduplicator.record_error(
                 request_info["path"], 500, exception_type
             )
 
+            # A partly sent response can't be replaced, let the server close it
+            if response_started:
+                raise
+
             # Return generic error response
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=500,
                 content={"detail": "Internal server error", "error_id": fingerprint},
             )
+            await response(scope, receive, send)
+            return
+
+        # Track slow requests (Phase 2)
+        if self.monitor_slow_requests:
+            elapsed = time.monotonic() - start_time
+            if elapsed > self.slow_request_threshold:
+                request = Request(scope)
+                await self._report_slow_request(
+                    self._get_request_info(request),
+                    elapsed,
+                    self._get_user_info(request),
+                )
+
+    def _should_monitor_path(self, path: str) -> bool:
+        """Cached monitoring_config.should_monitor_path"""
+        monitored = self._path_cache.get(path)
+        if monitored is None:
+            monitored = monitoring_config.should_monitor_path(path)
+            # Paths with ids are unbounded, start over instead of growing
+            if len(self._path_cache) >= _FILTER_CACHE_SIZE:
+                self._path_cache.clear()
+            self._path_cache[path] = monitored
+        return monitored
+
+    def _should_monitor_exception(self, exception_type: str) -> bool:
+        """Cached monitoring_config.should_monitor_exception"""
+        monitored = self._exception_cache.get(exception_type)
+        if monitored is None:
+            monitored = monitoring_config.should_monitor_exception(exception_type)
+            self._exception_cache[exception_type] = monitored
+        return monitored
+
+    @staticmethod
+    def _get_request_info(request: Request) -> Dict[str, Any]:
+        """
+        Collect request info for error and slow request reports.
+
+        Only called on those paths, so successful requests never build it.
+        """
+        query = request.url.query
+        return {
+            "path": request.url.path,
+            "method": request.method,
+            "query": str(query) if query else None,
+            "user_agent": request.headers.get("user-agent"),
+        }
+
+    @staticmethod
+    def _get_user_info(request: Request) -> Optional[Dict[str, Any]]:
+        """Get user info if available, only when a report needs it"""
+        user = getattr(request.state, "user", None)
+        if user is None:
+            return None
+        return {
+            "id": str(getattr(user, "id", "unknown")),
+            "email": getattr(user, "email", None),
+        }
 
     async def _handle_exception(
         self,
@@ -242,12 +481,10 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
         request_info: Dict[str, Any],
         user_info: Optional[Dict[str, Any]],
         status_code: int,
+        tb_str: str,
     ):
         """Send exception alert to Telegram"""
         try:
-            # Get traceback
-            tb_str = traceback.format_exc()
-
             # Prepare details
             details = {
                 "Endpoint": f"{request_info['method']} {request_info['path']}",
@@ -265,18 +502,20 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
                 details["User"] = "Anonymous"
 
             # Add relevant headers
-            headers = request_info.get("headers", {})
-            if "user-agent" in headers:
-                details["User-Agent"] = headers["user-agent"][:100]
-
-            # Send alert
-            await telegram_reporter.send_alert(
-                title=f"ERROR {status_code}",
-                message=f"Unhandled exception in {request_info['path']}",
-                level=AlertLevel.CRITICAL,
-                details=details,
-                error=exception,
-                traceback_str=tb_str,
+            user_agent = request_info.get("user_agent")
+            if user_agent:
+                details["User-Agent"] = user_agent[:100]
+
+            # Send alert from the alert workers
+            alert_queue.submit(
+                telegram_reporter.send_alert(
+                    title=f"ERROR {status_code}",
+                    message=f"Unhandled exception in {request_info['path']}",
+                    level=AlertLevel.CRITICAL,
+                    details=details,
+                    error=exception,
+                    traceback_str=tb_str,
+                )
             )
 
         except Exception as e:
@@ -296,35 +535,45 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
 
             # Check if we should send alert (rate limiting)
             redis_client = await get_redis_client()
-            slow_key = monitoring_config.get_redis_key("slow_requests", fingerprint)
-
-            # Get current batch
-            batch_key = monitoring_config.get_redis_key(
-                "slow_requests_batch", datetime.utcnow().strftime("%Y-%m-%d-%H")
+            slow_key = self._slow_key_prefix + fingerprint
+
+            # Current batch: per-endpoint count/sum/max aggregates plus the
+            # endpoint's slowest samples, scored by response time
+            batch_hour = datetime.utcnow().strftime("%Y-%m-%d-%H")
+            endpoint = f"{request_info['method']} {request_info['path']}"
+            agg_key = monitoring_config.get_redis_key("slow_requests_agg", batch_hour)
+            samples_key = monitoring_config.get_redis_key(
+                "slow_requests_samples", batch_hour, endpoint
             )
 
-            # Add to batch
-            batch_data = {
-                "path": f"{request_info['method']} {request_info['path']}",
-                "time": elapsed_time,
-                "user": (
-                    user_info.get("email", "anonymous") if user_info else "anonymous"
-                ),
-                "timestamp": time.time(),
-            }
-
-            import json
-
-            await redis_client.lpush(batch_key, json.dumps(batch_data))  # type: ignore
-            await redis_client.expire(batch_key, 3600)
+            user = user_info.get("email", "anonymous") if user_info else "anonymous"
+            # Flat "timestamp<US>user" member, split by batch_alerts
+            sample = SLOW_SAMPLE_SEPARATOR.join((str(time.time()), user))
 
-            # Check if we should send immediate alert (first occurrence)
-            is_first = await redis_client.set(
+            # One round-trip for the first-occurrence check, the batch
+            # aggregates and the daily stats
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.set(
                 slow_key,
                 "1",
                 ex=monitoring_config.SLOW_REQUESTS_BATCH_MINUTES * 60,
                 nx=True,  # Only set if doesn't exist
             )
+            pipe.hincrby(agg_key, f"{endpoint}:count", 1)
+            pipe.hincrbyfloat(agg_key, f"{endpoint}:sum", elapsed_time)
+            await _get_hset_max_script(redis_client)(
+                keys=[agg_key], args=[f"{endpoint}:max", elapsed_time], client=pipe
+            )
+            pipe.expire(agg_key, 3600)
+            # Keep only the 3 slowest samples per endpoint
+            pipe.zadd(samples_key, {sample: elapsed_time})
+            pipe.zremrangebyrank(samples_key, 0, -4)
+            pipe.expire(samples_key, 3600)
+            self._queue_slow_request_stats(pipe, request_info["path"], elapsed_time)
+            results = await pipe.execute()
+
+            # SET NX succeeds only for the first slow request in the batch
+            is_first = results[0]
 
             if is_first:
                 # Send immediate alert for first slow request
@@ -342,39 +591,26 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
                 if request_info.get("query"):
                     details["Query"] = request_info["query"][:100]
 
-                await telegram_reporter.send_alert(
-                    title="Slow Request Detected",
-                    message=f"Request took {elapsed_time:.1f}s to complete",
-                    level=AlertLevel.WARNING,
-                    details=details,
+                alert_queue.submit(
+                    telegram_reporter.send_alert(
+                        title="Slow Request Detected",
+                        message=f"Request took {elapsed_time:.1f}s to complete",
+                        level=AlertLevel.WARNING,
+                        details=details,
+                    )
                 )
 
-            # Record statistics
-            await self._record_slow_request_stats(request_info["path"], elapsed_time)
-
         except Exception as e:
             logger.error(f"Failed to report slow request: {e}")
 
-    async def _record_slow_request_stats(self, path: str, elapsed_time: float):
-        """Record slow request statistics"""
-        try:
-            redis_client = await get_redis_client()
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-
-            # Increment counter
-            count_key = monitoring_config.get_redis_key(
-                "stats", today, f"slow_requests:{path}"
-            )
-            await redis_client.incr(count_key)
-            await redis_client.expire(count_key, 86400 * 7)
-
-            # Store response times
-            times_key = monitoring_config.get_redis_key(
-                "stats", today, "slow_requests:times"
-            )
-            await redis_client.lpush(times_key, f"{path}:{elapsed_time:.2f}")  # type: ignore
-            await redis_client.ltrim(times_key, 0, 100)  # Keep last 100  # type: ignore
-            await redis_client.expire(times_key, 86400 * 7)
-
-        except Exception as e:
-            logger.error(f"Failed to record slow request stats: {e}")
+    def _queue_slow_request_stats(self, pipe: Any, path: str, elapsed_time: float):
+        """Queue slow request statistics on the report pipeline"""
+        # Per-path counter and the most recent response times
+        count_key = self.deduplicator.stat_key("slow_requests", path)
+        times_key = self.deduplicator.stat_key("slow_requests:times")
+
+        pipe.incr(count_key)
+        pipe.expire(count_key, 86400 * 7)
+        pipe.lpush(times_key, f"{path}:{elapsed_time:.2f}")
+        pipe.ltrim(times_key, 0, 100)  # Keep last 100
+        pipe.expire(times_key, 86400 * 7)
@@ -6,11 +6,12 @@ Health checks and daily reports.
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, List
 import asyncio
 
 # import psutil
 
+import orjson
 from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -190,10 +191,16 @@ async def _check_queue_health(errors: List[str]) -> bool:
     try:
         redis_client = await get_redis_client()
 
-        # Check last job completion time
         last_job_key = monitoring_config.get_redis_key("queue", "last_job_completed")
-        last_job_time = await redis_client.get(last_job_key)
+        queue_size_key = "arq:queue"
+
+        # Last job time and queue key type in one round-trip
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(last_job_key)
+        pipe.type(queue_size_key)
+        last_job_time, key_type = await pipe.execute()
 
+        # Check last job completion time
         if last_job_time:
             time_diff = time.time() - float(last_job_time)
             stuck_threshold = monitoring_config.HEALTH_QUEUE_STUCK_MINUTES * 60
@@ -206,13 +213,10 @@ async def _check_queue_health(errors: List[str]) -> bool:
                 return False
 
         # УНИВЕРСАЛЬНАЯ ПРОВЕРКА РАЗМЕРА ОЧЕРЕДИ
-        queue_size_key = "arq:queue"
         queue_size = 0
 
         try:
-            # Определяем тип ключа
-            key_type = await redis_client.type(queue_size_key)
-
+            # Тип ключа уже получен вместе с last_job_time
             if key_type == "zset":
                 queue_size = await redis_client.zcard(queue_size_key)
             elif key_type == "list":
@@ -252,15 +256,14 @@ async def _store_health_status(components: Dict[str, bool], errors: List[str]):
             "errors": errors,
         }
 
-        import json
+        # Serialized once for both the current status and the history
+        payload = orjson.dumps(status_data)
 
-        await redis_client.setex(
-            status_key, 3600, json.dumps(status_data)  # Keep for 1 hour
-        )
+        await redis_client.setex(status_key, 3600, payload)  # Keep for 1 hour
 
         # Store in history
         history_key = monitoring_config.get_redis_key("health", "history")
-        await redis_client.lpush(history_key, json.dumps(status_data))  # type: ignore
+        await redis_client.lpush(history_key, payload)  # type: ignore
         await redis_client.ltrim(
             history_key, 0, 100
         )  # Keep last 100 checks # type: ignore
@@ -420,6 +423,31 @@ async def _get_project_statistics(
         return {}
 
 
+async def _scan_pages(
+    redis_client, pattern: str, count: int
+) -> AsyncIterator[List[str]]:
+    """
+    Yield SCAN pages, requesting the next page while the caller
+    processes the current one.
+
+    SCAN calls still follow each other cursor by cursor, but each one
+    overlaps with the caller's own commands (e.g. an MGET) on that page.
+    """
+    next_page = asyncio.ensure_future(redis_client.scan(0, match=pattern, count=count))
+    try:
+        while next_page is not None:
+            cursor, keys = await next_page
+            next_page = None
+            if cursor != 0:
+                next_page = asyncio.ensure_future(
+                    redis_client.scan(cursor, match=pattern, count=count)
+                )
+            yield keys
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+
 async def _get_error_statistics() -> Dict[str, Any]:
     """Get error statistics from Redis"""
     try:
@@ -436,45 +464,28 @@ async def _get_error_statistics() -> Dict[str, Any]:
         type_pattern = monitoring_config.get_redis_key("stats", today, "errors:type:*")
 
         # Use SCAN to safely iterate through keys
-        cursor = 0
-        while True:
-            cursor, keys = await redis_client.scan(
-                cursor, match=type_pattern, count=100  # Process in batches of 100
-            )
-
-            for key in keys:
-                # Extract error type from key
-                # Key format: monitoring:stats:YYYY-MM-DD:errors:type:ErrorType
-                key_parts = key.split(":")
-                if len(key_parts) >= 6:
-                    error_type = key_parts[-1]
-                    count = await redis_client.get(key)
+        scan_count = monitoring_config.REDIS_SCAN_COUNT
+        async for keys in _scan_pages(redis_client, type_pattern, scan_count):
+            # Key format: monitoring:stats:YYYY-MM-DD:errors:type:ErrorType
+            keys = [key for key in keys if len(key.split(":")) >= 6]
+            if keys:
+                # One MGET per SCAN page instead of a GET per key
+                counts = await redis_client.mget(keys)
+                for key, count in zip(keys, counts):
                     if count:
-                        errors_by_type[error_type] = int(count)
-
-            # Break when cursor returns to 0
-            if cursor == 0:
-                break
+                        # Extract error type from key
+                        errors_by_type[key.rsplit(":", 1)[-1]] = int(count)
 
         # Get slow requests count
         slow_requests = 0
         slow_pattern = monitoring_config.get_redis_key(
             "stats", today, "slow_requests:*"
         )
-        cursor = 0
-        while True:
-            cursor, keys = await redis_client.scan(
-                cursor, match=slow_pattern, count=100
-            )
-
-            for key in keys:
-                if not key.endswith(":times"):  # Skip the times list
-                    count = await redis_client.get(key)
-                    if count:
-                        slow_requests += int(count)
-
-            if cursor == 0:
-                break
+        async for keys in _scan_pages(redis_client, slow_pattern, scan_count):
+            keys = [key for key in keys if not key.endswith(":times")]  # Skip lists
+            if keys:
+                counts = await redis_client.mget(keys)
+                slow_requests += sum(int(count) for count in counts if count)
 
         return {
             "total": total_errors,
@@ -0,0 +1,188 @@
+"""
+Unit tests for the background activity writer.
+Tests queueing, batching, overflow and the recorder handoff.
+"""
+
+import logging
+
+import pytest
+from uuid import uuid4
+from unittest.mock import patch, AsyncMock, MagicMock
+from sqlalchemy import select
+
+from app.activity_feed.services.background_writer import (
+    ActivityWriter,
+    PENDING_ACTIVITY_INSERT,
+)
+from app.activity_feed.services.recorder import activity_recorder
+from app.activity_feed.models import PendingActivity
+from app.activity_feed.config import ActivityFeedConfig
+
+
+def _rows(count):
+    return [
+        {"event_type": "element.updated", "target_id": str(i)} for i in range(count)
+    ]
+
+
+@pytest.fixture
+def session_maker():
+    """Mock async_session_maker returning one shared session."""
+    session = AsyncMock()
+    maker = MagicMock()
+    maker.return_value.__aenter__.return_value = session
+    with patch(
+        "app.activity_feed.services.background_writer.async_session_maker", maker
+    ):
+        yield session
+
+
+@pytest.mark.asyncio
+class TestActivityWriter:
+    """Test suite for the background activity writer."""
+
+    async def test_submitted_rows_are_inserted_in_one_batch(self, session_maker):
+        """Test that rows submitted together are written with one executemany."""
+        writer = ActivityWriter()
+        writer.start()
+        rows = _rows(3)
+
+        writer.submit(rows)
+        await writer.stop()
+
+        session_maker.execute.assert_awaited_once_with(PENDING_ACTIVITY_INSERT, rows)
+        session_maker.commit.assert_awaited_once()
+
+    async def test_batches_are_capped_by_batch_size(self, session_maker):
+        """Test that a large submit is split into batches."""
+        writer = ActivityWriter()
+        with patch(
+            "app.activity_feed.services.background_writer.activity_config"
+        ) as config:
+            config.ACTIVITY_WRITE_QUEUE_SIZE = 100
+            config.ACTIVITY_WRITE_BATCH_SIZE = 2
+            writer.start()
+            writer.submit(_rows(5))
+            await writer.stop()
+
+        batches = [call.args[1] for call in session_maker.execute.await_args_list]
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+
+    async def test_full_queue_drops_rows(self, session_maker, caplog):
+        """Test that rows past the queue size are dropped and logged."""
+        writer = ActivityWriter()
+        with patch(
+            "app.activity_feed.services.background_writer.activity_config"
+        ) as config:
+            config.ACTIVITY_WRITE_QUEUE_SIZE = 2
+            config.ACTIVITY_WRITE_BATCH_SIZE = 100
+            writer.start()
+
+            with caplog.at_level(logging.ERROR):
+                # The writer loop hasn't run yet, so the queue fills up
+                writer.submit(_rows(5))
+            await writer.stop()
+
+        assert "dropped 3 events" in caplog.text
+        session_maker.execute.assert_awaited_once()
+        assert len(session_maker.execute.await_args.args[1]) == 2
+
+    async def test_stop_drains_queue(self, session_maker):
+        """Test that stop writes queued rows before stopping the loop."""
+        writer = ActivityWriter()
+        writer.start()
+        writer.submit(_rows(2))
+        writer.submit(_rows(1))
+
+        await writer.stop()
+
+        assert writer.running is False
+        written = sum(
+            len(call.args[1]) for call in session_maker.execute.await_args_list
+        )
+        assert written == 3
+
+    async def test_failed_batch_does_not_stop_writer(self, session_maker):
+        """Test that a failed insert is logged and the writer keeps going."""
+        session_maker.execute.side_effect = [Exception("DB down"), None]
+        writer = ActivityWriter()
+        writer.start()
+
+        writer.submit(_rows(1))
+        await writer._queue.join()
+        writer.submit(_rows(1))
+        await writer.stop()
+
+        assert session_maker.execute.await_count == 2
+
+    async def test_submit_without_running_writer_inserts_directly(self, session_maker):
+        """Test that rows submitted before start are still written."""
+        writer = ActivityWriter()
+        rows = _rows(2)
+
+        writer.submit(rows)
+        await writer.stop()
+
+        session_maker.execute.assert_awaited_once_with(PENDING_ACTIVITY_INSERT, rows)
+
+
+@pytest.fixture
+def background_writes():
+    """Enable background writes with a mock running writer."""
+    config = ActivityFeedConfig(ACTIVITY_BACKGROUND_WRITES=True)
+    writer = MagicMock(running=True)
+
+    with patch("app.activity_feed.services.recorder.activity_config", config), patch(
+        "app.activity_feed.services.recorder.activity_writer", writer
+    ), patch(
+        "app.activity_feed.services.recorder.queue_manager.enqueue",
+        new_callable=AsyncMock,
+    ):
+        yield writer
+
+
+async def _record(session, user, project):
+    await activity_recorder.record(
+        session=session,
+        user_id=user.id,
+        project_id=project.id,
+        event_type="element.updated",
+        target_id=str(uuid4()),
+        target_type="element",
+        details={"element_name": "Test Element"},
+    )
+
+
+@pytest.mark.asyncio
+class TestRecorderHandoff:
+    """Test the recorder's commit handoff to the background writer."""
+
+    async def test_committed_events_are_submitted(
+        self, background_writes, db_session, user, project
+    ):
+        """Test that with background writes events go to the writer after commit."""
+        await _record(db_session, user, project)
+        background_writes.submit.assert_not_called()
+
+        await db_session.commit()
+
+        background_writes.submit.assert_called_once()
+        (rows,) = background_writes.submit.call_args.args
+        assert [row["details"]["element_name"] for row in rows] == ["Test Element"]
+
+        # Nothing was inserted inline by the commit itself
+        result = await db_session.execute(
+            select(PendingActivity).where(PendingActivity.user_id == user.id)
+        )
+        assert result.scalars().all() == []
+
+    async def test_rolled_back_events_are_not_submitted(
+        self, background_writes, db_session, user, project
+    ):
+        """Test that a rollback drops events instead of handing them over."""
+        await _record(db_session, user, project)
+
+        await db_session.rollback()
+        await db_session.commit()
+
+        background_writes.submit.assert_not_called()
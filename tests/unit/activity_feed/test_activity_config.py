@@ -232,7 +232,7 @@ class TestActivityRecorder:
             )
 
             # Проверяем, что запись сохранилась в БД
-            await db_session.flush()  # Гарантируем отправку в БД
+            await activity_recorder.flush(db_session)  # Гарантируем отправку в БД
 
             # Should create pending activity
             result = await db_session.execute(
@@ -445,13 +445,26 @@ class TestFeedServiceHelpers:
         db_session.add(activity)
         await db_session.commit()
 
-        # Enrich
-        enriched = await activity_feed_service._enrich_activities_with_image_urls(
-            db_session, [activity]
-        )
+        # URLs are resolved by the feed page query itself
+        from unittest.mock import patch, AsyncMock
+
+        with patch(
+            "app.activity_feed.services.feed_service.permission_checker.require_permission",
+            new_callable=AsyncMock,
+        ):
+            with patch(
+                "app.activity_feed.services.feed_service.enhanced_access_scope_service"
+            ):
+                response = await activity_feed_service.get_feed_for_project(
+                    session=db_session,
+                    user_id=user.id,
+                    project_id=project.id,
+                    page=1,
+                    size=20,
+                )
 
         # Check URLs added
-        image_item = enriched[0].summary["groups"][0]["items"][0]
+        image_item = response.items[0].summary["groups"][0]["items"][0]
         assert "thumbnailUrl" in image_item
         assert image_item["thumbnailUrl"] == "https://example.com/thumb.jpg"
 
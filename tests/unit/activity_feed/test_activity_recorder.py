@@ -11,6 +11,7 @@ from sqlalchemy import select
 from app.activity_feed.services.recorder import activity_recorder
 from app.activity_feed.models import PendingActivity
 from app.activity_feed.config import ActivityFeedConfig
+from app.filemanager.core import UnitOfWorkFactory
 
 
 @pytest.mark.asyncio
@@ -35,7 +36,7 @@ class TestActivityRecorder:
                 details={"element_name": "Test Element"},
             )
 
-        await db_session.flush()
+        await activity_recorder.flush(db_session)
 
         # Verify pending event was created
         result = await db_session.execute(
@@ -147,7 +148,7 @@ class TestActivityRecorder:
                     details={"element_name": f"Element {i}"},
                 )
 
-        await db_session.flush()
+        await activity_recorder.flush(db_session)
 
         # All should have same session_key
         result = await db_session.execute(
@@ -186,7 +187,7 @@ class TestActivityRecorder:
                     details=details,
                 )
 
-        await db_session.flush()
+        await activity_recorder.flush(db_session)
 
         # Verify all were recorded
         result = await db_session.execute(
@@ -219,7 +220,7 @@ class TestActivityRecorder:
                 details=complex_details,
             )
 
-        await db_session.flush()
+        await activity_recorder.flush(db_session)
 
         result = await db_session.execute(
             select(PendingActivity).where(PendingActivity.user_id == user.id)
@@ -230,6 +231,147 @@ class TestActivityRecorder:
         assert pending.details == complex_details
         assert pending.details["nested"]["data"]["value"] == 123
 
+    async def test_record_stringifies_uuid_values(self, db_session, user, project):
+        """Test that raw UUIDs in target_id and details are stored as strings."""
+        element_id = uuid4()
+        folder_id = uuid4()
+
+        with patch(
+            "app.activity_feed.services.recorder.queue_manager.enqueue",
+            new_callable=AsyncMock,
+        ):
+            await activity_recorder.record(
+                session=db_session,
+                user_id=user.id,
+                project_id=project.id,
+                event_type="element.created",
+                target_id=element_id,
+                target_type="element",
+                details={"element_name": "Test", "folder_id": folder_id},
+            )
+
+        await activity_recorder.flush(db_session)
+
+        result = await db_session.execute(
+            select(PendingActivity).where(PendingActivity.user_id == user.id)
+        )
+        pending = result.scalar_one()
+
+        assert pending.target_id == str(element_id)
+        assert pending.details["folder_id"] == str(folder_id)
+
+    async def test_record_buffers_until_commit(self, db_session, user, project):
+        """Test that buffered events are bulk-inserted on commit."""
+        with patch(
+            "app.activity_feed.services.recorder.queue_manager.enqueue",
+            new_callable=AsyncMock,
+        ):
+            for i in range(3):
+                await activity_recorder.record(
+                    session=db_session,
+                    user_id=user.id,
+                    project_id=project.id,
+                    event_type="element.updated",
+                    target_id=str(uuid4()),
+                    target_type="element",
+                    details={"element_name": f"Element {i}"},
+                )
+
+        await db_session.flush()
+        result = await db_session.execute(
+            select(PendingActivity).where(PendingActivity.user_id == user.id)
+        )
+        assert result.scalars().all() == []
+
+        await db_session.commit()
+
+        result = await db_session.execute(
+            select(PendingActivity).where(PendingActivity.user_id == user.id)
+        )
+        assert len(result.scalars().all()) == 3
+
+    async def _record_named(self, session, user, project, name):
+        await activity_recorder.record(
+            session=session,
+            user_id=user.id,
+            project_id=project.id,
+            event_type="element.updated",
+            target_id=str(uuid4()),
+            target_type="element",
+            details={"element_name": name},
+        )
+
+    async def test_savepoint_rollback_discards_its_events(
+        self, db_session, user, project
+    ):
+        """Test that events recorded in a rolled back savepoint are dropped."""
+        with patch(
+            "app.activity_feed.services.recorder.queue_manager.enqueue",
+            new_callable=AsyncMock,
+        ):
+            await self._record_named(db_session, user, project, "kept")
+
+            savepoint = await db_session.begin_nested()
+            await self._record_named(db_session, user, project, "discarded")
+            await savepoint.rollback()
+
+            async with db_session.begin_nested():
+                await self._record_named(db_session, user, project, "released")
+
+        await db_session.commit()
+
+        result = await db_session.execute(
+            select(PendingActivity).where(PendingActivity.user_id == user.id)
+        )
+        names = sorted(p.details["element_name"] for p in result.scalars().all())
+        assert names == ["kept", "released"]
+
+    async def test_released_savepoint_keeps_events_for_outer_rollback(
+        self, db_session, user, project
+    ):
+        """Test that a released savepoint doesn't insert before the outer commit."""
+        with patch(
+            "app.activity_feed.services.recorder.queue_manager.enqueue",
+            new_callable=AsyncMock,
+        ):
+            outer = await db_session.begin_nested()
+            await self._record_named(db_session, user, project, "before inner")
+
+            async with db_session.begin_nested():
+                await self._record_named(db_session, user, project, "inner")
+
+            await outer.rollback()
+
+        await db_session.commit()
+
+        result = await db_session.execute(
+            select(PendingActivity).where(PendingActivity.user_id == user.id)
+        )
+        assert result.scalars().all() == []
+
+    async def test_uncommitted_unit_of_work_drops_events(
+        self, db_session, user, project
+    ):
+        """Test that a unit of work left without commit rolls back its events."""
+        user_id = user.id
+        with patch(
+            "app.activity_feed.services.recorder.queue_manager.enqueue",
+            new_callable=AsyncMock,
+        ):
+            async with UnitOfWorkFactory.create(db_session) as uow:
+                await self._record_named(uow.session, user, project, "uncommitted")
+                assert uow.is_dirty
+
+        assert uow._rolled_back
+
+        # A later commit on the same session must not insert them
+        await db_session.commit()
+
+        result = await db_session.execute(
+            select(PendingActivity).where(PendingActivity.user_id == user_id)
+        )
+        assert result.scalars().all() == []
+
 
 @pytest.mark.asyncio
 class TestRecorderConfiguration:
@@ -268,7 +410,7 @@ class TestRecorderConfiguration:
                     details={"name": "Test Widget"},
                 )
 
-        await db_session.flush()
+        await activity_recorder.flush(db_session)
 
         result = await db_session.execute(
             select(PendingActivity).where(
@@ -320,7 +462,7 @@ class TestRecorderConfiguration:
                     details={"element_name": "Test"},
                 )
 
-        await db_session.flush()
+        await activity_recorder.flush(db_session)
 
         # Only element event should be recorded
         result = await db_session.execute(
@@ -1,8 +1,10 @@
+import asyncio
 import pytest
+from unittest.mock import MagicMock
 from uuid import uuid4
 from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
 from sqlalchemy import text
-from app.filemanager.core.unit_of_work import UnitOfWorkFactory
+from app.filemanager.core.unit_of_work import RepositoryProxy, UnitOfWorkFactory
 
 # Импортируем ваше исключение
 from app.filemanager.core.exceptions import FolderNotFound
@@ -106,3 +108,75 @@ class TestUnitOfWork:
             await uow.commit()
             await uow.commit()
             assert uow._committed
+
+    async def test_uncommitted_delete_is_rolled_back(
+        self, db_session: AsyncSession, project
+    ):
+        """Тест: удаление без commit() откатывается и не попадает в следующий commit."""
+        async with UnitOfWorkFactory.create(db_session) as uow:
+            folder = await uow.folders.create_folder(
+                project_id=project.id,
+                name="Test Delete",
+                slug="test-delete",
+                created_by=project.created_by,
+            )
+            folder_id = folder.id
+            await uow.commit()
+
+        async with UnitOfWorkFactory.create(db_session) as uow:
+            folder = await uow.folders.get_folder_by_id(folder_id)
+            await db_session.delete(folder)
+            assert uow.has_writes
+
+        assert uow._rolled_back
+
+        # Следующий commit на той же сессии не должен удалить папку
+        async with UnitOfWorkFactory.create(db_session) as uow:
+            await uow.commit()
+
+        async with UnitOfWorkFactory.create(db_session) as uow:
+            saved_folder = await uow.folders.get_folder_by_id(folder_id)
+            assert saved_folder is not None
+
+
+def _plain_wrapper(func):
+    """Декоратор без functools.wraps, возвращающий корутину."""
+
+    def inner(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return inner
+
+
+class _Repository:
+    async def get_async(self, session, value):
+        return value
+
+    def get_sync(self, session, value):
+        return value
+
+    @_plain_wrapper
+    async def get_wrapped(self, session, value):
+        await asyncio.sleep(0)
+        return value
+
+
+@pytest.mark.asyncio
+class TestRepositoryProxy:
+
+    async def test_async_method_result_awaited(self):
+        """Тест: async-метод репозитория возвращает результат."""
+        proxy = RepositoryProxy(_Repository, MagicMock())
+        assert await proxy.get_async(1) == 1
+
+    async def test_sync_method_result_returned(self):
+        """Тест: sync-метод доступен через await."""
+        proxy = RepositoryProxy(_Repository, MagicMock())
+        assert await proxy.get_sync(2) == 2
+
+    async def test_wrapped_coroutine_method_awaited(self):
+        """Тест: корутина из обёртки без functools.wraps дожидается."""
+        proxy = RepositoryProxy(_Repository, MagicMock())
+        assert await proxy.get_wrapped(21) == 21
+        # Повторный вызов идёт через закешированную обёртку
+        assert await proxy.get_wrapped(42) == 42
@@ -1,8 +1,15 @@
+import functools
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
+import threading
 import time
 
-from app.monitoring.arq_monitoring import monitored_task
+from app.monitoring.arq_monitoring import (
+    _AlertRateLimiter,
+    monitored_task,
+    flush_task_stats,
+    shutdown_pending_stats,
+)
 
 
 @pytest.fixture
@@ -13,10 +20,20 @@ def mock_config():
         mock.ARQ_IGNORED_TASKS = ["ignored_task"]
         mock.ARQ_TASK_FAILURE_ALERT = True
         mock.ARQ_TASK_SLOW_THRESHOLD_SECONDS = 1.0
+        mock.ARQ_STATS_FLUSH_INTERVAL_SECONDS = 0
+        mock.ARQ_STATS_FLUSH_MAX_EVENTS = 1000
+        mock.ARQ_SYNC_TASK_WORKERS = 2
         mock.get_redis_key = MagicMock(return_value="test:key")
         yield mock
 
 
+@pytest.fixture(autouse=True)
+def clear_slow_alerts():
+    """Сбрасываем локальную дедупликацию алертов между тестами"""
+    with patch.dict("app.monitoring.decorators._local_dedup", clear=True) as sent:
+        yield sent
+
+
 @pytest.fixture
 def mock_redis():
     """Мок Redis"""
@@ -28,10 +45,20 @@ def mock_redis():
         redis_mock.lpush = AsyncMock()
         redis_mock.ltrim = AsyncMock()
         redis_mock.get = AsyncMock(return_value=None)
+        redis_mock.set = AsyncMock(return_value=True)
+        pipe_mock = MagicMock()
+        pipe_mock.execute = AsyncMock(return_value=[1, True])
+        redis_mock.pipeline = MagicMock(return_value=pipe_mock)
         mock.return_value = redis_mock
         yield redis_mock
 
 
+@pytest.fixture
+def mock_pipeline(mock_redis):
+    """Мок Redis pipeline"""
+    yield mock_redis.pipeline.return_value
+
+
 @pytest.fixture
 def mock_telegram():
     """Мок Telegram репортера"""
@@ -43,7 +70,9 @@ def mock_telegram():
 @pytest.mark.asyncio
 class TestMonitoredTask:
 
-    async def test_successful_task_execution(self, mock_config, mock_redis):
+    async def test_successful_task_execution(
+        self, mock_config, mock_redis, mock_pipeline
+    ):
         """Успешное выполнение задачи"""
         executed = False
 
@@ -55,16 +84,18 @@ class TestMonitoredTask:
 
         ctx = {}
         result = await test_task(ctx)
+        await shutdown_pending_stats()
 
         assert executed is True
         assert result == "success"
-        # Проверяем что записаны метрики успеха
-        assert mock_redis.incr.called
+        # Проверяем что записаны метрики успеха одним pipeline
+        assert mock_pipeline.incr.called
+        mock_pipeline.execute.assert_awaited_once()
 
-    async def test_task_failure_sends_alert(self, mock_config, mock_redis):
+    async def test_task_failure_sends_alert(
+        self, mock_config, mock_redis, mock_pipeline
+    ):
         """Ошибка в задаче отправляет алерт"""
-        # Настраиваем mock_redis.incr чтобы возвращать число
-        mock_redis.incr = AsyncMock(return_value=1)
 
         with patch("app.monitoring.arq_monitoring.telegram_reporter") as mock_telegram:
             mock_telegram.send_alert = AsyncMock()
@@ -77,11 +108,13 @@ class TestMonitoredTask:
 
             with pytest.raises(ValueError):
                 await failing_task(ctx)
+            await shutdown_pending_stats()
 
             # Проверяем что был отправлен алерт
             mock_telegram.send_alert.assert_called_once()
             # Проверяем что записаны метрики ошибок
-            assert mock_redis.incr.called
+            assert mock_pipeline.incr.called
+            mock_pipeline.incrby.assert_called_once_with("test:key", 1)
 
     async def test_ignored_task_not_monitored(self, mock_config, mock_redis):
         """Игнорируемые задачи не мониторятся"""
@@ -109,23 +142,24 @@ class TestMonitoredTask:
 
             ctx = {}
 
-            # Патчим time.time чтобы эмулировать медленное выполнение
-            original_time = time.time
-
+            # Патчим time.monotonic_ns чтобы эмулировать медленное выполнение
             def fake_time():
                 call_count[0] += 1
                 if call_count[0] == 1:
-                    return 0.0  # Начало
+                    return 0  # Начало
                 else:
-                    return 2.0  # Конец (больше порога 1.0)
+                    return 2_000_000_000  # Конец (больше порога 1.0)
 
             with patch(
-                "app.monitoring.arq_monitoring.time.time", side_effect=fake_time
+                "app.monitoring.arq_monitoring.time.monotonic_ns",
+                side_effect=fake_time,
             ):
                 await slow_task(ctx)
+            await shutdown_pending_stats()
 
             # Должна быть попытка проверить Redis на дедупликацию
-            assert mock_redis.get.called
+            mock_redis.set.assert_called_once_with("test:key", "1", ex=3600, nx=True)
+            mock_telegram.send_alert.assert_called_once()
 
     async def test_monitoring_disabled_skips_tracking(self, mock_redis):
         """Выключенный мониторинг пропускает трекинг"""
@@ -158,7 +192,7 @@ class TestMonitoredTask:
         assert documented_task.__name__ == "documented_task"
         assert documented_task.__doc__ == "Task documentation"
 
-    async def test_records_execution_time(self, mock_config, mock_redis):
+    async def test_records_execution_time(self, mock_config, mock_redis, mock_pipeline):
         """Записывается время выполнения"""
 
         @monitored_task
@@ -167,12 +201,15 @@ class TestMonitoredTask:
 
         ctx = {}
         await test_task(ctx)
+        await shutdown_pending_stats()
 
         # Проверяем что время было записано в Redis
-        assert mock_redis.lpush.called
-        assert mock_redis.ltrim.called
+        assert mock_pipeline.lpush.called
+        assert mock_pipeline.ltrim.called
 
-    async def test_recurring_failures_tracked(self, mock_config, mock_redis):
+    async def test_recurring_failures_tracked(
+        self, mock_config, mock_redis, mock_pipeline
+    ):
         """Повторяющиеся ошибки отслеживаются"""
         with patch("app.monitoring.arq_monitoring.telegram_reporter") as mock_telegram:
             mock_telegram.send_alert = AsyncMock()
@@ -184,14 +221,172 @@ class TestMonitoredTask:
             ctx = {}
 
             # Первая ошибка
-            mock_redis.incr = AsyncMock(return_value=1)
+            mock_pipeline.execute.return_value = [1, True]
             with pytest.raises(RuntimeError):
                 await failing_task(ctx)
+            await shutdown_pending_stats()
 
             # Вторая ошибка
-            mock_redis.incr = AsyncMock(return_value=2)
+            mock_pipeline.execute.return_value = [2, True]
             with pytest.raises(RuntimeError):
                 await failing_task(ctx)
+            await shutdown_pending_stats()
 
             # Должно быть 2 алерта
             assert mock_telegram.send_alert.call_count == 2
+            details = mock_telegram.send_alert.call_args.kwargs["details"]
+            assert details["Failure Count"] == "2 in last hour"
+
+    async def test_aggregated_stats_flushed_in_batch(
+        self, mock_config, mock_redis, mock_pipeline
+    ):
+        """Агрегированная статистика пишется одним батчем"""
+        mock_config.ARQ_STATS_FLUSH_INTERVAL_SECONDS = 60
+
+        @monitored_task
+        async def test_task(ctx):
+            return "success"
+
+        await test_task({})
+        await test_task({})
+        await shutdown_pending_stats()
+
+        # До сброса в Redis ничего не пишется
+        mock_pipeline.execute.assert_not_called()
+
+        await flush_task_stats()
+
+        mock_pipeline.execute.assert_awaited_once()
+        mock_pipeline.incrby.assert_called_once_with("test:key", 2)
+
+    async def test_success_stats_do_not_block_task(
+        self, mock_config, mock_redis, mock_pipeline
+    ):
+        """Запись статистики не задерживает завершение задачи"""
+
+        @monitored_task
+        async def test_task(ctx):
+            return "success"
+
+        result = await test_task({})
+
+        # Статистика пишется в фоне после возврата результата
+        assert result == "success"
+        mock_pipeline.execute.assert_not_called()
+
+        await shutdown_pending_stats()
+        mock_pipeline.execute.assert_awaited_once()
+
+    async def test_failure_alerts_rate_limited(self, mock_config, mock_redis):
+        """Шторм ошибок не превышает лимит алертов"""
+        limiter = _AlertRateLimiter(per_minute=1, burst=1)
+
+        with patch(
+            "app.monitoring.arq_monitoring.telegram_reporter"
+        ) as mock_telegram, patch(
+            "app.monitoring.arq_monitoring._alert_limiter", limiter
+        ):
+            mock_telegram.send_alert = AsyncMock()
+
+            @monitored_task
+            async def failing_task(ctx):
+                raise RuntimeError("Storm")
+
+            for _ in range(3):
+                with pytest.raises(RuntimeError):
+                    await failing_task({})
+            await shutdown_pending_stats()
+
+            # Отправлен только первый алерт, остальные подавлены
+            mock_telegram.send_alert.assert_called_once()
+            assert limiter.suppressed == 2
+
+    async def test_slow_task_alert_deduplicated(self, mock_config, mock_redis):
+        """Повторный алерт о медленной задаче не отправляется"""
+        mock_redis.set = AsyncMock(return_value=None)
+
+        with patch("app.monitoring.arq_monitoring.telegram_reporter") as mock_telegram:
+            mock_telegram.send_alert = AsyncMock()
+
+            @monitored_task
+            async def slow_task(ctx):
+                return "success"
+
+            with patch(
+                "app.monitoring.arq_monitoring.time.monotonic_ns",
+                side_effect=[0, 2_000_000_000, 2_000_000_000],
+            ):
+                await slow_task({})
+            await shutdown_pending_stats()
+
+            mock_telegram.send_alert.assert_not_called()
+
+    async def test_slow_task_deduplicated_locally(self, mock_config, mock_redis):
+        """Повторный медленный запуск дедуплицируется без Redis"""
+        with patch("app.monitoring.arq_monitoring.telegram_reporter") as mock_telegram:
+            mock_telegram.send_alert = AsyncMock()
+
+            @monitored_task
+            async def slow_task(ctx):
+                return "success"
+
+            for _ in range(2):
+                with patch(
+                    "app.monitoring.arq_monitoring.time.monotonic_ns",
+                    side_effect=[0, 2_000_000_000, 2_000_000_000],
+                ):
+                    await slow_task({})
+                await shutdown_pending_stats()
+
+            # В Redis обращаемся только за первым алертом
+            mock_redis.set.assert_called_once()
+            mock_telegram.send_alert.assert_called_once()
+
+    async def test_sync_task_runs_in_thread_pool(self, mock_config, mock_redis):
+        """Синхронная задача выполняется вне event loop"""
+        main_thread = threading.get_ident()
+
+        @monitored_task
+        def sync_task(ctx, value):
+            return value, threading.get_ident()
+
+        result, thread_id = await sync_task({}, "success")
+        await shutdown_pending_stats()
+
+        assert result == "success"
+        assert thread_id != main_thread
+        assert sync_task.__name__ == "sync_task"
+
+    async def test_wrapped_coroutine_task_is_awaited(self, mock_config, mock_redis):
+        """Обёртка через functools.wraps над корутиной не уходит в пул потоков"""
+        main_thread = threading.get_ident()
+
+        async def inner(ctx, value):
+            return value, threading.get_ident()
+
+        @functools.wraps(inner)
+        def wrapper(ctx, value):
+            return inner(ctx, value)
+
+        task = monitored_task(wrapper)
+        result, thread_id = await task({}, "success")
+        await shutdown_pending_stats()
+
+        assert result == "success"
+        assert thread_id == main_thread
+
+    async def test_sync_wrapper_returning_coroutine_is_awaited(
+        self, mock_config, mock_redis
+    ):
+        """Корутина, возвращённая синхронной обёрткой, выполняется"""
+        inner = AsyncMock(return_value="success")
+
+        @monitored_task
+        def wrapper(ctx, value):
+            return inner(ctx, value)
+
+        result = await wrapper({}, "value")
+        await shutdown_pending_stats()
+
+        assert result == "success"
+        inner.assert_awaited_once_with({}, "value")
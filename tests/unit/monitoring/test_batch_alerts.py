@@ -0,0 +1,165 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.monitoring.batch_alerts import (
+    _coalesce_summaries,
+    _collect_slow_requests_batch,
+    _collect_task_warnings_batch,
+)
+from app.monitoring.config import monitoring_config
+from app.monitoring.middleware import SLOW_SAMPLE_SEPARATOR
+
+
+@pytest.fixture
+def mock_redis():
+    """Мок Redis клиента"""
+    with patch("app.monitoring.batch_alerts.get_redis_client") as mock, patch(
+        "app.monitoring.batch_alerts._failed_tasks_script", None
+    ):
+        redis_mock = AsyncMock()
+        redis_mock.scan = AsyncMock(return_value=(0, []))
+        redis_mock.register_script = MagicMock(return_value=AsyncMock())
+        pipe_mock = MagicMock()
+        pipe_mock.execute = AsyncMock()
+        redis_mock.pipeline = MagicMock(return_value=pipe_mock)
+        mock.return_value = redis_mock
+        yield redis_mock
+
+
+@pytest.fixture
+def failed_tasks_script(mock_redis):
+    """Мок Lua скрипта счётчиков упавших задач"""
+    yield mock_redis.register_script.return_value
+
+
+@pytest.fixture
+def mock_pipeline(mock_redis):
+    """Мок Redis pipeline"""
+    yield mock_redis.pipeline.return_value
+
+
+def _sample(timestamp, user):
+    return SLOW_SAMPLE_SEPARATOR.join((str(timestamp), user))
+
+
+@pytest.mark.asyncio
+class TestCollectSlowRequests:
+
+    async def test_aggregates_grouped_by_endpoint(self, mock_redis, mock_pipeline):
+        """Поля агрегатов разбираются по последнему двоеточию"""
+        mock_pipeline.execute.side_effect = [
+            [
+                {
+                    "GET /api/v1:batch:count": "2",
+                    "GET /api/v1:batch:sum": "5.0",
+                    "GET /api/v1:batch:max": "3.0",
+                    "POST /api/items:count": "1",
+                    "POST /api/items:sum": "1.5",
+                    "POST /api/items:max": "1.5",
+                },
+                1,
+            ],
+            [
+                [(_sample(1700000000.5, "user@example.com"), 3.0)],
+                [(_sample(1700000001, "anonymous"), 1.5)],
+                2,
+            ],
+        ]
+
+        result = await _collect_slow_requests_batch("2024-01-01-10")
+
+        by_endpoint = {item["endpoint"]: item for item in result}
+        assert by_endpoint["GET /api/v1:batch"] == {
+            "endpoint": "GET /api/v1:batch",
+            "count": 2,
+            "max_time": 3.0,
+            "avg_time": 2.5,
+            "samples": [
+                {"time": 3.0, "user": "user@example.com", "timestamp": 1700000000.5}
+            ],
+        }
+        assert by_endpoint["POST /api/items"]["count"] == 1
+
+        samples_key = monitoring_config.get_redis_key(
+            "slow_requests_samples", "2024-01-01-10", "GET /api/v1:batch"
+        )
+        mock_pipeline.zrevrange.assert_any_call(samples_key, 0, 2, withscores=True)
+
+    async def test_empty_batch_skips_samples(self, mock_redis, mock_pipeline):
+        """Без агрегатов семплы не запрашиваются"""
+        mock_pipeline.execute.return_value = [{}, 0]
+
+        assert await _collect_slow_requests_batch("2024-01-01-10") == []
+        mock_pipeline.execute.assert_awaited_once()
+
+    async def test_malformed_sample_skipped(self, mock_redis, mock_pipeline):
+        """Семпл без разделителя пропускается, агрегаты сохраняются"""
+        mock_pipeline.execute.side_effect = [
+            [{"GET /api/test:count": "1", "GET /api/test:sum": "2.0"}, 1],
+            [[("broken", 2.0)], 1],
+        ]
+
+        (item,) = await _collect_slow_requests_batch("2024-01-01-10")
+
+        assert item["samples"] == []
+        assert item["max_time"] == 0.0
+        assert item["avg_time"] == 2.0
+
+
+class TestCoalesceSummaries:
+
+    def test_summaries_joined_within_limit(self):
+        """Сводки объединяются, пока помещаются в лимит"""
+        assert _coalesce_summaries(["aaa", "bbb", "ccc"], 8) == ["aaa\n\nbbb", "ccc"]
+
+    def test_oversized_summary_sent_alone(self):
+        """Слишком длинная сводка уходит отдельным сообщением"""
+        assert _coalesce_summaries(["a", "b" * 10, "c"], 5) == ["a", "b" * 10, "c"]
+
+    def test_empty_input(self):
+        """Пустой буфер не дает сообщений"""
+        assert _coalesce_summaries([], 100) == []
+
+
+@pytest.mark.asyncio
+class TestCollectTaskWarnings:
+
+    async def test_failed_counters_parsed_from_flat_pages(
+        self, mock_redis, failed_tasks_script
+    ):
+        """Курсор и пары ключ/счётчик разбираются по страницам"""
+        failed_tasks_script.side_effect = [
+            ["17", "monitoring:stats:2024-01-01:tasks:failure:send_email", "3"],
+            [
+                "0",
+                "monitoring:stats:2024-01-01:tasks:failure:sync_project",
+                "1",
+                "monitoring:stats:2024-01-01:tasks:failure:resize_image",
+                "12",
+            ],
+        ]
+
+        warnings = await _collect_task_warnings_batch("2024-01-01")
+
+        assert warnings["failed"] == {
+            "send_email": 3,
+            "sync_project": 1,
+            "resize_image": 12,
+        }
+        # Один EVALSHA на страницу, следующий вызов продолжает с курсора
+        cursors = [
+            call.kwargs["args"][0] for call in failed_tasks_script.await_args_list
+        ]
+        assert cursors == [0, "17"]
+
+    async def test_empty_page_keeps_scanning(self, mock_redis, failed_tasks_script):
+        """Страница без ненулевых счётчиков не прерывает обход"""
+        failed_tasks_script.side_effect = [
+            ["5"],
+            ["0", "monitoring:stats:2024-01-01:tasks:failure:send_email", "2"],
+        ]
+
+        warnings = await _collect_task_warnings_batch("2024-01-01")
+
+        assert warnings["failed"] == {"send_email": 2}
+        assert failed_tasks_script.await_count == 2
@@ -1,8 +1,12 @@
 import pytest
 from unittest.mock import patch
 
+from dataclasses import FrozenInstanceError, fields
+
 from app.monitoring.config import (
     MonitoringConfig,
+    MonitoringConfigSnapshot,
+    freeze_monitoring_config,
     AlertLevel,
     HealthCheckConfig,
     MetricsConfig,
@@ -58,6 +62,58 @@ class TestMonitoringConfig:
         assert config.should_monitor_path("/health/check") is False
         assert config.should_monitor_path("/metrics") is False
 
+    def test_derived_values_follow_field_changes(self):
+        """Кешированные значения пересчитываются при изменении полей"""
+        config = MonitoringConfig(
+            MONITORING_ENABLED=True,
+            TELEGRAM_BOT_TOKEN="token",
+            TELEGRAM_CHAT_ID="123",
+            MONITORING_ENV="development",
+            IGNORED_PATHS=["/health"],
+        )
+
+        config.MONITORING_ENABLED = False
+        config.MONITORING_ENV = "prod"
+        config.IGNORED_PATHS = []
+
+        assert config.is_enabled is False
+        assert config.is_production is True
+        assert config.should_monitor_path("/health") is True
+
+    def test_frozen_snapshot_matches_config(self):
+        """Замороженный снимок повторяет значения и методы конфига"""
+        config = MonitoringConfig(
+            MONITORING_ENABLED=True,
+            TELEGRAM_BOT_TOKEN="token",
+            TELEGRAM_CHAT_ID="123",
+            MONITORING_ENV="production",
+            IGNORED_PATHS=["/health"],
+            IGNORED_EXCEPTIONS=["HTTPException"],
+            REDIS_KEY_PREFIX="monitoring",
+        )
+        snapshot = freeze_monitoring_config(config)
+
+        assert snapshot.is_enabled is True
+        assert snapshot.is_production is True
+        assert snapshot.SLOW_REQUEST_THRESHOLD_SECONDS == 3.0
+        assert snapshot.should_monitor_path("/health/check") is False
+        assert snapshot.should_monitor_path("/api/users") is True
+        assert snapshot.should_monitor_exception("HTTPException") is False
+        assert snapshot.get_redis_key("health") == "monitoring:health"
+
+        with pytest.raises(FrozenInstanceError):
+            snapshot.MONITORING_ENABLED = False
+
+    def test_snapshot_declares_every_setting(self):
+        """Снимок объявляет все поля конфига, списки хранятся кортежами"""
+        snapshot = freeze_monitoring_config(MonitoringConfig())
+        snapshot_fields = {field.name for field in fields(MonitoringConfigSnapshot)}
+
+        assert isinstance(snapshot, MonitoringConfigSnapshot)
+        assert set(MonitoringConfig.model_fields) <= snapshot_fields
+        assert isinstance(snapshot.IGNORED_PATHS, tuple)
+        assert not hasattr(snapshot, "__dict__")
+
     def test_get_redis_key_formatting(self):
         """Формирование Redis ключей"""
         config = MonitoringConfig(REDIS_KEY_PREFIX="monitoring")
@@ -1,7 +1,14 @@
 import pytest
 from unittest.mock import AsyncMock, patch
 
-from app.monitoring.decorators import deduplicated
+from app.monitoring.decorators import deduplicated, _local_dedup
+
+
+@pytest.fixture(autouse=True)
+def clear_local_dedup():
+    """Локальный кеш не переносится между тестами"""
+    with patch.dict(_local_dedup, clear=True):
+        yield
 
 
 @pytest.fixture
@@ -55,6 +62,22 @@ class TestDeduplicatedDecorator:
         assert result2 is None
         assert execution_count == 1  # Не увеличилось
 
+    async def test_repeat_call_skips_redis_within_ttl(self, mock_redis):
+        """Повторный вызов в пределах TTL не обращается к Redis"""
+        execution_count = 0
+
+        @deduplicated(key="local_key", ttl=60)
+        async def test_func():
+            nonlocal execution_count
+            execution_count += 1
+            return "success"
+
+        assert await test_func() == "success"
+        assert await test_func() is None
+
+        assert execution_count == 1
+        mock_redis.set.assert_called_once()
+
     async def test_custom_prefix_used(self, mock_redis):
         """Используется кастомный префикс"""
 
@@ -1,8 +1,9 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 
-from app.monitoring import setup_monitoring, send_startup_notification
+from app.monitoring import alert_queue, setup_monitoring, send_startup_notification
 from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
 
 @pytest.fixture
@@ -47,6 +48,17 @@ class TestMonitoringSetup:
 
         assert middleware_added or len(app.user_middleware) > 0
 
+    def test_setup_registers_alert_queue_shutdown(self, mock_config):
+        """Setup останавливает очередь алертов при завершении приложения"""
+        with patch.object(alert_queue, "stop", AsyncMock()) as stop:
+            app = FastAPI()
+            setup_monitoring(app)
+
+            with TestClient(app):
+                stop.assert_not_awaited()
+
+            stop.assert_awaited_once()
+
     def test_setup_monitoring_disabled(self):
         """Setup не добавляет middleware если отключен"""
         with patch("app.monitoring.monitoring_config") as config:
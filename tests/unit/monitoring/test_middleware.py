@@ -1,10 +1,17 @@
+import functools
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from fastapi import Request, HTTPException
-from starlette.datastructures import Headers
+from fastapi import HTTPException
 
-from app.monitoring.middleware import MonitoringMiddleware, ErrorDeduplicator
-from app.monitoring.config import AlertLevel
+from app.monitoring.middleware import (
+    SLOW_SAMPLE_SEPARATOR,
+    AlertQueue,
+    ErrorDeduplicator,
+    MonitoringMiddleware,
+    alert_queue,
+)
+from app.monitoring.config import AlertLevel, monitoring_config
 
 
 @pytest.fixture
@@ -15,6 +22,7 @@ def mock_config():
         mock.MONITOR_EXCEPTIONS = True
         mock.MONITOR_SLOW_REQUESTS = True
         mock.SLOW_REQUEST_THRESHOLD_SECONDS = 1.0
+        mock.ALERT_RATE_LIMIT_MINUTES = 10
         mock.should_monitor_path = MagicMock(return_value=True)
         mock.should_monitor_exception = MagicMock(return_value=True)
         mock.get_redis_key = MagicMock(return_value="test:key")
@@ -24,138 +32,354 @@ def mock_config():
 @pytest.fixture
 def mock_redis():
     """Мок Redis клиента"""
-    with patch("app.monitoring.middleware.get_redis_client") as mock:
+    with patch("app.monitoring.middleware.get_redis_client") as mock, patch(
+        "app.monitoring.middleware._hset_max_script", None
+    ):
         redis_mock = AsyncMock()
-        redis_mock.get = AsyncMock(return_value=None)
-        redis_mock.setex = AsyncMock()
         redis_mock.incr = AsyncMock()
         redis_mock.expire = AsyncMock()
         redis_mock.set = AsyncMock(return_value=True)
         redis_mock.lpush = AsyncMock()
+        redis_mock.register_script = MagicMock(return_value=AsyncMock())
+        pipe_mock = MagicMock()
+        pipe_mock.execute = AsyncMock(return_value=[])
+        redis_mock.pipeline = MagicMock(return_value=pipe_mock)
         mock.return_value = redis_mock
         yield redis_mock
 
 
 @pytest.fixture
-def mock_request():
-    """Мок Request объекта"""
-    request = MagicMock(spec=Request)
-    request.url.path = "/api/test"
-    request.url.query = ""
-    request.method = "GET"
-    request.headers = Headers({"user-agent": "test-agent"})
-    request.client.host = "127.0.0.1"
-    return request
+def http_scope():
+    """ASGI scope HTTP запроса"""
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/test",
+        "query_string": b"",
+        "headers": [(b"user-agent", b"test-agent")],
+        "client": ("127.0.0.1", 12345),
+    }
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+class _SendRecorder:
+    """Собирает отправленные ASGI сообщения"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def __call__(self, message):
+        self.messages.append(message)
+
+    @property
+    def status(self):
+        return self.messages[0]["status"]
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _raising_app(exc):
+    async def app(scope, receive, send):
+        raise exc
+
+    return app
 
 
 @pytest.mark.asyncio
 class TestMonitoringMiddleware:
 
     async def test_successful_request_passes_through(
-        self, mock_config, mock_redis, mock_request
+        self, mock_config, mock_redis, http_scope
     ):
         """Успешный запрос проходит без вмешательства"""
-        app = MagicMock()
-        middleware = MonitoringMiddleware(app)
+        middleware = MonitoringMiddleware(_ok_app)
+        send = _SendRecorder()
 
-        async def call_next(request):
-            response = MagicMock()
-            response.status_code = 200
-            return response
+        await middleware(http_scope, _receive, send)
 
-        response = await middleware.dispatch(mock_request, call_next)
+        assert send.status == 200
+        assert send.messages[1]["body"] == b"ok"
 
-        assert response.status_code == 200
-
-    async def test_ignored_path_skips_monitoring(self, mock_config, mock_request):
+    async def test_ignored_path_skips_monitoring(self, mock_config, http_scope):
         """Игнорируемые пути не мониторятся"""
         mock_config.should_monitor_path.return_value = False
 
-        app = MagicMock()
-        middleware = MonitoringMiddleware(app)
-
         called = False
 
-        async def call_next(request):
+        async def app(scope, receive, send):
             nonlocal called
             called = True
-            return MagicMock()
 
-        await middleware.dispatch(mock_request, call_next)
+        middleware = MonitoringMiddleware(app)
+        await middleware(http_scope, _receive, _SendRecorder())
 
         assert called is True
-        # Проверяем что мониторинг не вызывался через отсутствие вызовов telegram
+        mock_config.should_monitor_exception.assert_not_called()
+
+    async def test_slow_request_is_reported(self, mock_config, http_scope):
+        """Запрос дольше порога передается в отчет о медленных запросах"""
+        middleware = MonitoringMiddleware(_ok_app)
+
+        with patch.object(middleware, "_report_slow_request") as mock_report, patch(
+            "app.monitoring.middleware.time.monotonic", side_effect=[10.0, 12.5]
+        ):
+            await middleware(http_scope, _receive, _SendRecorder())
+
+            mock_report.assert_called_once()
+            assert mock_report.call_args.args[1] == 2.5
+
+    async def test_slow_monitoring_off_skips_timing(self, mock_config, http_scope):
+        """Без мониторинга медленных запросов время не замеряется"""
+        mock_config.MONITOR_SLOW_REQUESTS = False
+        middleware = MonitoringMiddleware(_ok_app)
+
+        with patch("app.monitoring.middleware.time.monotonic") as mock_monotonic:
+            await middleware(http_scope, _receive, _SendRecorder())
+
+            mock_monotonic.assert_not_called()
+
+    async def test_path_filter_decision_is_cached(self, mock_config, http_scope):
+        """Решение по пути вычисляется один раз"""
+        mock_config.should_monitor_path.return_value = False
+        middleware = MonitoringMiddleware(_ok_app)
+
+        await middleware(http_scope, _receive, _SendRecorder())
+        await middleware(http_scope, _receive, _SendRecorder())
+
+        mock_config.should_monitor_path.assert_called_once_with("/api/test")
+
+    async def test_non_http_scope_passes_through(self, mock_config):
+        """Не-HTTP запросы (lifespan, websocket) проходят напрямую"""
+        app = AsyncMock()
+        middleware = MonitoringMiddleware(app)
+        scope = {"type": "lifespan"}
+
+        await middleware(scope, _receive, _SendRecorder())
+
+        app.assert_awaited_once()
+        mock_config.should_monitor_path.assert_not_called()
 
     async def test_http_exception_500_triggers_alert(
-        self, mock_config, mock_redis, mock_request
+        self, mock_config, mock_redis, http_scope
     ):
         """HTTP 500 ошибка вызывает алерт"""
-        app = MagicMock()
-        middleware = MonitoringMiddleware(app)
-
-        async def call_next(request):
-            raise HTTPException(status_code=500, detail="Internal error")
+        middleware = MonitoringMiddleware(
+            _raising_app(HTTPException(status_code=500, detail="Internal error"))
+        )
 
         with patch.object(middleware, "_handle_exception") as mock_handle:
             mock_handle.return_value = None
 
             with pytest.raises(HTTPException):
-                await middleware.dispatch(mock_request, call_next)
+                await middleware(http_scope, _receive, _SendRecorder())
 
             mock_handle.assert_called_once()
 
     async def test_http_exception_404_no_alert(
-        self, mock_config, mock_redis, mock_request
+        self, mock_config, mock_redis, http_scope
     ):
         """HTTP 404 не вызывает алерт"""
-        app = MagicMock()
-        middleware = MonitoringMiddleware(app)
-
-        async def call_next(request):
-            raise HTTPException(status_code=404, detail="Not found")
+        middleware = MonitoringMiddleware(
+            _raising_app(HTTPException(status_code=404, detail="Not found"))
+        )
 
         with patch.object(middleware, "_handle_exception") as mock_handle:
             with pytest.raises(HTTPException):
-                await middleware.dispatch(mock_request, call_next)
+                await middleware(http_scope, _receive, _SendRecorder())
 
             mock_handle.assert_not_called()
 
     async def test_unhandled_exception_sends_alert(
-        self, mock_config, mock_redis, mock_request
+        self, mock_config, mock_redis, http_scope
     ):
         """Необработанное исключение отправляет алерт"""
-        app = MagicMock()
-        middleware = MonitoringMiddleware(app)
+        middleware = MonitoringMiddleware(_raising_app(ValueError("Unexpected error")))
+        send = _SendRecorder()
+
+        with patch("app.monitoring.middleware.telegram_reporter") as mock_telegram:
+            mock_telegram.send_alert = AsyncMock()
+
+            await middleware(http_scope, _receive, send)
+            await alert_queue.stop()
+
+            assert send.status == 500
+            mock_telegram.send_alert.assert_awaited_once()
+            details = mock_telegram.send_alert.call_args.kwargs["details"]
+            assert details["Endpoint"] == "GET /api/test"
+            assert details["User-Agent"] == "test-agent"
+            traceback_str = mock_telegram.send_alert.call_args.kwargs["traceback_str"]
+            assert "ValueError: Unexpected error" in traceback_str
+
+    async def test_rate_limited_exception_skips_traceback(
+        self, mock_config, mock_redis, http_scope
+    ):
+        """Для ограниченного по частоте алерта traceback не форматируется"""
+        middleware = MonitoringMiddleware(_raising_app(ValueError("Unexpected error")))
+        middleware.deduplicator.should_send_alert = AsyncMock(return_value=False)
+        send = _SendRecorder()
+
+        with patch("app.monitoring.middleware._format_traceback") as mock_format:
+            await middleware(http_scope, _receive, send)
 
-        async def call_next(request):
-            raise ValueError("Unexpected error")
+            assert send.status == 500
+            mock_format.assert_not_called()
+
+    async def test_exception_after_response_started_is_reraised(
+        self, mock_config, mock_redis, http_scope
+    ):
+        """Ошибка после начала ответа пробрасывается, а не заменяется на 500"""
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            raise ValueError("Stream broke")
+
+        middleware = MonitoringMiddleware(app)
+        send = _SendRecorder()
 
         with patch("app.monitoring.middleware.telegram_reporter") as mock_telegram:
             mock_telegram.send_alert = AsyncMock()
 
-            response = await middleware.dispatch(mock_request, call_next)
+            with pytest.raises(ValueError):
+                await middleware(http_scope, _receive, send)
+            await alert_queue.stop()
 
-            assert response.status_code == 500
-            mock_telegram.send_alert.assert_called_once()
+        assert len(send.messages) == 1
 
-    async def test_monitoring_disabled_skips_checks(self, mock_request):
+    async def test_monitoring_disabled_skips_checks(self, http_scope):
         """Выключенный мониторинг пропускает проверки"""
         with patch("app.monitoring.middleware.monitoring_config") as config:
             config.is_enabled = False
 
-            app = MagicMock()
-            middleware = MonitoringMiddleware(app)
-
             called = False
 
-            async def call_next(request):
+            async def app(scope, receive, send):
                 nonlocal called
                 called = True
-                return MagicMock()
 
-            await middleware.dispatch(mock_request, call_next)
+            middleware = MonitoringMiddleware(app)
+            await middleware(http_scope, _receive, _SendRecorder())
 
             assert called is True
+            config.should_monitor_path.assert_not_called()
+
+    async def test_slow_request_reported_in_one_round_trip(
+        self, mock_config, mock_redis
+    ):
+        """Первый медленный запрос пишется одним pipeline и шлет алерт"""
+        mock_config.SLOW_REQUESTS_BATCH_MINUTES = 60
+        mock_redis.pipeline.return_value.execute.return_value = [True]
+        middleware = MonitoringMiddleware(_ok_app)
+        request_info = {"path": "/api/test", "method": "GET", "query": None}
+
+        with patch("app.monitoring.middleware.telegram_reporter") as mock_telegram:
+            mock_telegram.send_alert = AsyncMock()
+
+            await middleware._report_slow_request(request_info, 2.5, None)
+            await alert_queue.stop()
+
+            mock_redis.pipeline.return_value.execute.assert_awaited_once()
+            mock_redis.set.assert_not_awaited()
+            mock_telegram.send_alert.assert_awaited_once()
+
+    async def test_slow_request_batch_writes(self, mock_config, mock_redis):
+        """Медленный запрос пишет агрегаты и семпл батча в pipeline"""
+        mock_config.SLOW_REQUESTS_BATCH_MINUTES = 60
+        mock_config.get_redis_key = MagicMock(
+            side_effect=lambda *parts: ":".join(parts)
+        )
+        pipe = mock_redis.pipeline.return_value
+        pipe.execute.return_value = [None]
+        middleware = MonitoringMiddleware(_ok_app)
+        request_info = {"path": "/api/v1:batch", "method": "POST", "query": None}
+
+        with patch("app.monitoring.middleware.datetime") as mock_datetime:
+            mock_datetime.utcnow.return_value.strftime.return_value = "2024-01-01-10"
+            await middleware._report_slow_request(
+                request_info, 2.5, {"email": "user@example.com", "id": 1}
+            )
+
+        agg_key = "slow_requests_agg:2024-01-01-10"
+        samples_key = "slow_requests_samples:2024-01-01-10:POST /api/v1:batch"
+        pipe.hincrby.assert_called_once_with(agg_key, "POST /api/v1:batch:count", 1)
+        pipe.hincrbyfloat.assert_called_once_with(
+            agg_key, "POST /api/v1:batch:sum", 2.5
+        )
+        hset_max = mock_redis.register_script.return_value
+        hset_max.assert_awaited_once_with(
+            keys=[agg_key], args=["POST /api/v1:batch:max", 2.5], client=pipe
+        )
+        pipe.eval.assert_not_called()
+        pipe.zremrangebyrank.assert_called_once_with(samples_key, 0, -4)
+
+        (key, members), _ = pipe.zadd.call_args
+        assert key == samples_key
+        ((member, score),) = members.items()
+        timestamp, user = member.split(SLOW_SAMPLE_SEPARATOR)
+        assert user == "user@example.com"
+        assert float(timestamp) > 0
+        assert score == 2.5
+        pipe.execute.assert_awaited_once()
+
+    async def test_repeated_slow_request_no_alert(self, mock_config, mock_redis):
+        """Повторный медленный запрос в пределах батча не шлет алерт"""
+        mock_config.SLOW_REQUESTS_BATCH_MINUTES = 60
+        mock_redis.pipeline.return_value.execute.return_value = [None]
+        middleware = MonitoringMiddleware(_ok_app)
+        request_info = {"path": "/api/test", "method": "GET", "query": None}
+
+        with patch("app.monitoring.middleware.telegram_reporter") as mock_telegram:
+            mock_telegram.send_alert = AsyncMock()
+
+            await middleware._report_slow_request(request_info, 2.5, None)
+
+            mock_telegram.send_alert.assert_not_called()
+
+
+@pytest.mark.asyncio
+class TestAlertQueue:
+
+    async def test_submit_sends_alert_in_background(self):
+        """Алерт отправляется воркером, а не в вызывающем коде"""
+        queue = AlertQueue(maxsize=10, workers=2)
+        send_alert = AsyncMock()
+
+        queue.submit(send_alert(title="test"))
+        send_alert.assert_not_awaited()
+
+        await queue.stop()
+
+        send_alert.assert_awaited_once_with(title="test")
+        assert queue.running is False
+
+    async def test_full_queue_drops_alert(self):
+        """При переполненной очереди алерт отбрасывается"""
+        queue = AlertQueue(maxsize=1, workers=1)
+        send_alert = AsyncMock()
+
+        # Воркер еще не успел забрать первый алерт
+        queue.submit(send_alert(title="first"))
+        queue.submit(send_alert(title="second"))
+        await queue.stop()
+
+        assert queue.dropped == 1
+        send_alert.assert_awaited_once_with(title="first")
+
+    async def test_worker_survives_failed_alert(self):
+        """Ошибка отправки не останавливает воркер"""
+        queue = AlertQueue(maxsize=10, workers=1)
+        send_alert = AsyncMock(side_effect=[RuntimeError("Telegram down"), None])
+
+        queue.submit(send_alert(title="first"))
+        queue.submit(send_alert(title="second"))
+        await queue.stop()
+
+        assert send_alert.await_count == 2
 
 
 class TestErrorDeduplicator:
@@ -183,28 +407,53 @@ class TestErrorDeduplicator:
 
         assert fp1 != fp2
 
+    def test_generate_fingerprint_uses_message_head(self):
+        """Учитывается только начало первой строки сообщения"""
+        dedup = ErrorDeduplicator()
+
+        fingerprint = functools.partial(dedup.generate_fingerprint, "/api", "GET")
+
+        short = ValueError("Bad value\nparams: (1, 2)")
+        long = ValueError("Bad value\nparams: " + "x" * 10_000)
+        assert fingerprint(short) == fingerprint(long)
+
+        head = ValueError("y" * 100)
+        assert fingerprint(ValueError("y" * 100 + "tail")) == fingerprint(head)
+
     @pytest.mark.asyncio
     async def test_rate_limiting_blocks_duplicate(self):
         """Rate limiting блокирует дубликаты"""
         with patch("app.monitoring.middleware.get_redis_client") as mock_get_redis:
             redis_mock = AsyncMock()
+            pipe = MagicMock()
+            redis_mock.pipeline = MagicMock(return_value=pipe)
             mock_get_redis.return_value = redis_mock
 
+            # Первый вызов - разрешен (SET NX прошел)
+            pipe.execute = AsyncMock(return_value=[True, 600_000])
+            should_send = await ErrorDeduplicator().should_send_alert("test_fp")
+            assert should_send is True
+
+            # Другой воркер - заблокирован (ключ выставлен 1 минуту назад)
             dedup = ErrorDeduplicator()
+            window = dedup.rate_limit_minutes * 60
+            pipe.execute = AsyncMock(return_value=[None, (window - 60) * 1000])
+            with patch("app.monitoring.middleware.time.time", return_value=1000.0):
+                should_send = await dedup.should_send_alert("test_fp")
+            assert should_send is False
+            assert dedup.local_cache["test_fp"] == pytest.approx(940.0)
 
-            # Первый вызов - разрешен
-            redis_mock.get = AsyncMock(return_value=None)
-            redis_mock.setex = AsyncMock()
-            should_send = await dedup.should_send_alert("test_fingerprint")
-            assert should_send is True
+    @pytest.mark.asyncio
+    async def test_recent_local_alert_skips_redis(self, mock_redis):
+        """Недавний алерт с этого воркера блокируется без обращения к Redis"""
+        pipe = mock_redis.pipeline.return_value
+        pipe.execute.return_value = [True, 600_000]
+        dedup = ErrorDeduplicator()
 
-            # Второй вызов сразу - заблокирован (возвращаем недавнее время)
-            import time
+        assert await dedup.should_send_alert("local_fp") is True
+        assert await dedup.should_send_alert("local_fp") is False
 
-            recent_time = str(time.time() - 60)  # 1 минуту назад
-            redis_mock.get = AsyncMock(return_value=recent_time)
-            should_send = await dedup.should_send_alert("test_fingerprint")
-            assert should_send is False
+        pipe.execute.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_redis_failure_uses_local_cache(self):
@@ -221,6 +470,44 @@ class TestErrorDeduplicator:
             # Проверяем что попало в локальный кеш
             assert "test_fp" in dedup.local_cache
 
+    @pytest.mark.asyncio
+    async def test_alert_key_matches_config_key(self, mock_redis):
+        """Ключ алерта совпадает с ключом из конфигурации"""
+        dedup = ErrorDeduplicator()
+
+        await dedup.should_send_alert("test_fp")
+
+        expected = monitoring_config.get_redis_key("error", "test_fp")
+        pipe = mock_redis.pipeline.return_value
+        assert pipe.set.call_args.args[0] == expected
+        pipe.pttl.assert_called_once_with(expected)
+
+    def test_remember_sent_evicts_expired_entries(self):
+        """Устаревшие записи удаляются из начала локального кеша"""
+        dedup = ErrorDeduplicator()
+        window = dedup.rate_limit_minutes * 60
+
+        dedup._remember_sent("old_fp", 0.0, 0.0)
+        dedup._remember_sent("recent_fp", 10.0, 10.0)
+        dedup._remember_sent("new_fp", window + 5.0, window + 5.0)
+
+        assert list(dedup.local_cache) == ["recent_fp", "new_fp"]
+
+    def test_stat_key_follows_utc_day(self):
+        """Ключи статистики переключаются при смене дня"""
+        dedup = ErrorDeduplicator()
+
+        with patch("app.monitoring.middleware.time.time", return_value=86400 * 2):
+            key = dedup.stat_key("errors:type", "ValueError")
+            assert key.endswith(":stats:1970-01-03:errors:type:ValueError")
+            assert dedup.stat_key("errors:total").endswith(
+                ":stats:1970-01-03:errors:total"
+            )
+
+        with patch("app.monitoring.middleware.time.time", return_value=86400 * 3):
+            key = dedup.stat_key("errors:type", "ValueError")
+            assert key.endswith(":stats:1970-01-04:errors:type:ValueError")
+
     @pytest.mark.asyncio
     async def test_record_error_stats(self, mock_redis):
         """Запись статистики ошибок"""
@@ -228,6 +515,8 @@ class TestErrorDeduplicator:
 
         await dedup.record_error("/api/test", 500, "ValueError")
 
-        # Проверяем что были вызовы к Redis
-        assert mock_redis.incr.call_count >= 3  # total, type, endpoint
-        assert mock_redis.expire.call_count >= 3
+        # Все счетчики отправляются одним pipeline
+        pipe = mock_redis.pipeline.return_value
+        assert pipe.incr.call_count == 4  # total, type, endpoint, status
+        assert pipe.expire.call_count == 4
+        pipe.execute.assert_awaited_once()